@@ -138,6 +138,22 @@ def test_geom_to_ob():  # FIXME
     pass
 
 
+def test_geom_to_mesh_invalid_faces():
+    from bl_ext.user_default.bfds.lang.ON_GEOM import geom_to_ob
+
+    me = bpy.data.meshes.new("Test invalid GEOM")
+    geom_to_ob.geom_to_mesh(
+        bpy.context,
+        me=me,
+        fds_verts=(0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0),
+        fds_faces=(1, 2, 3, 1, 2, 3, 1, 1, 2),  # duplicate, degenerate
+        fds_surfs=(0, 0, 0),
+    )
+    assert len(me.polygons) == 1
+    assert not me.validate()  # already valid
+    bpy.data.meshes.remove(me)
+
+
 def test_ob_to_geom():  # FIXME
     from bl_ext.user_default.bfds.lang.ON_GEOM import ob_to_geom
 
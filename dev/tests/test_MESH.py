@@ -186,6 +186,50 @@ Cell Qty: 1848 | Size: 0.091·0.083·0.071m | Aspect: 1.3 | Poisson: No
     assert res == fds_string[1:-1]
 
 
+def test_MULT_native():
+    bpy.ops.mesh.primitive_cube_add(size=1.0, location=(5.0, 6.0, 7.0))
+    ob = bpy.context.object
+    ob.name = "Test"
+    ob.bf_namelist_cls = "ON_OBST"
+    ob.bf_xb = "BBOX"
+    ob.bf_xb_export = True
+    ob.bf_mult_export = True
+    ob.bf_mult_dx = 3.0
+    ob.bf_mult_i_upper = 99
+    ob.bf_mult_native = True
+    res = ob.to_fds_list(bpy.context).to_string()
+    ob.bf_mult_native = False
+    res_expanded = ob.to_fds_list(bpy.context).to_string()
+    _remove_ob(ob)
+    assert res.count("&OBST ") == 1 and "MULT_ID='Test_mult'" in res
+    assert "&MULT ID='Test_mult' DX=3.000 I_UPPER=99 /" in res
+    assert res_expanded.count("&OBST ") == 100 and "&MULT " not in res_expanded
+
+
+def test_estimate():
+    from bl_ext.user_default.bfds.lang.ON_MULT.multiply import get_nmult
+
+    context = bpy.context
+    est0 = context.scene.to_estimate(context)
+    ob = _create_ob()
+    ob.bf_mesh_nsplits = 2, 1, 1
+    ob.bf_mesh_nsplits_export = True
+    ob.bf_mult_export = True
+    ob.bf_mult_dy = 3.0
+    ob.bf_mult_j_lower = 1
+    ob.bf_mult_j_lower_skip = 3
+    ob.bf_mult_j_upper_skip = 5
+    ob.bf_mult_j_upper = 7
+    assert get_nmult(ob) == 4
+    est = context.scene.to_estimate(context)
+    nmesh = len(ob.to_fds_list(context).get_flat_ns())
+    _remove_ob(ob)
+    assert est["obs"] == est0["obs"] + 1
+    assert est["namelists"]["MESH"] - est0["namelists"].get("MESH", 0) == nmesh == 8
+    assert est["cells"] - est0["cells"] == 1848 * 4
+    assert est["fds_size"] > est0["fds_size"]
+
+
 def test_import():
     import_fds_string = """
 &MESH ID='Test' IJK=24,24,24, XB=-0.12,-0.06,-0.12,-0.06,-0.12,-0.06, MULT_ID='mesh' /
@@ -0,0 +1,244 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os, sys, bpy, pytest
+
+from bl_ext.user_default.bfds.lang.OP_XB import ob_to_xbs, calc_xbs_caches
+from bl_ext.user_default.bfds import utils
+
+
+def _create_obs(bf_xb, n=4):
+    obs = list()
+    for i in range(n):
+        bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0 + i * 0.1, location=(i, 0, 0))
+        ob = bpy.context.active_object
+        ob.name = f"sphere_{bf_xb}_{i}"
+        ob.bf_namelist_cls = "ON_OBST"
+        ob.bf_xb = bf_xb
+        ob.bf_xb_export = True
+        if bf_xb == "PIXELS":
+            ob.scale = (1.0, 1.0, 0.01)  # flat
+        obs.append(ob)
+    return obs
+
+
+def _get_xbs(context, ob, bf_xb):
+    hids, xbs, msgs = ob_to_xbs(context, ob=ob, bf_xb=bf_xb)
+    return hids, [tuple(xb) for xb in xbs], list(msgs)
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="fork is unavailable or unsafe")
+@pytest.mark.parametrize("bf_xb", ("VOXELS", "PIXELS", "FACES", "EDGES"))
+def test_calc_xbs_caches_parallel(bf_xb):
+    context = bpy.context
+    obs = _create_obs(bf_xb)
+    results = list()
+    for ob in obs:
+        results.append(_get_xbs(context, ob=ob, bf_xb=bf_xb))  # serial
+        utils.geometry.rm_geometric_cache(ob)
+    calc_xbs_caches(context, obs=obs, max_workers=2)
+    for ob, result in zip(obs, results):
+        assert ob.get("ob_to_xbs_cache") is not None
+        assert _get_xbs(context, ob=ob, bf_xb=bf_xb) == result  # from cache
+        bpy.data.meshes.remove(ob.data, do_unlink=True)
+
+
+def test_raster_voxels():
+    context = bpy.context
+    bpy.ops.mesh.primitive_cube_add(size=2.0, location=(0.0, 0.0, 0.0))
+    ob = context.active_object
+    ob.name = "cube_RASTER"
+    ob.bf_namelist_cls = "ON_OBST"
+    ob.bf_xb = "VOXELS"
+    ob.bf_xb_export = True
+    ob.bf_xb_custom_voxel = True
+    ob.bf_xb_voxel_size = 0.25
+    ob.bf_xb_voxelizer = "RASTER"
+    _, xbs, msgs = _get_xbs(context, ob=ob, bf_xb="VOXELS")
+    assert len(xbs) == 1
+    assert xbs[0] == pytest.approx((-1.0, 1.0, -1.0, 1.0, -1.0, 1.0))
+    assert msgs[0].startswith("XB Voxels: 1 ")
+    bpy.data.meshes.remove(ob.data, do_unlink=True)
+    # Same volume as the Remesh voxelizer, on a sphere
+    volumes = list()
+    for voxelizer in ("REMESH", "RASTER"):
+        bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, location=(0.0, 0.0, 0.0))
+        ob = context.active_object
+        ob.bf_namelist_cls = "ON_OBST"
+        ob.bf_xb = "VOXELS"
+        ob.bf_xb_export = True
+        ob.bf_xb_voxelizer = voxelizer
+        _, xbs, _ = _get_xbs(context, ob=ob, bf_xb="VOXELS")
+        volumes.append(
+            sum((x1 - x0) * (y1 - y0) * (z1 - z0) for x0, x1, y0, y1, z0, z1 in xbs)
+        )
+        bpy.data.meshes.remove(ob.data, do_unlink=True)
+    assert volumes[1] == pytest.approx(volumes[0], rel=0.15)
+
+
+@pytest.mark.parametrize("location", ((0.0, 0.0, 0.0), (0.013, 0.027, 0.031)))
+@pytest.mark.parametrize("bf_xb_voxelizer", ("REMESH", "RASTER"))
+def test_greedy_voxel_merge(bf_xb_voxelizer, location):
+    context = bpy.context
+    results = list()
+    for merge in ("GROW", "GREEDY"):
+        bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, location=location)
+        ob = context.active_object
+        ob.bf_namelist_cls = "ON_OBST"
+        ob.bf_xb = "VOXELS"
+        ob.bf_xb_export = True
+        ob.bf_xb_voxelizer = bf_xb_voxelizer
+        ob.bf_xb_voxel_merge = merge
+        _, xbs, msgs = _get_xbs(context, ob=ob, bf_xb="VOXELS")
+        assert "| Reduction: " in msgs[0]
+        volume = sum(
+            (x1 - x0) * (y1 - y0) * (z1 - z0) for x0, x1, y0, y1, z0, z1 in xbs
+        )
+        results.append((len(xbs), volume))
+        bpy.data.meshes.remove(ob.data, do_unlink=True)
+    assert results[1][0] <= results[0][0]  # less boxes
+    assert results[1][1] == pytest.approx(results[0][1])  # same voxels
+
+
+def test_greedy_occupancy_boxes():
+    import numpy as np
+    from bl_ext.user_default.bfds.lang.OP_XB.calc_raster import get_occupancy_boxes
+
+    # Off-center sphere, where the first axis order is not the best one
+    g = np.arange(64) - 31.5
+    x, y, z = np.meshgrid(g - 0.3, g - 0.17, g - 0.41, indexing="ij")
+    occupancy = x**2 + y**2 + z**2 <= 30**2
+    boxes = get_occupancy_boxes(occupancy, merge="GROW")
+    greedy_boxes = get_occupancy_boxes(occupancy, merge="GREEDY")
+    assert len(greedy_boxes) < len(boxes)
+    covered = np.zeros_like(occupancy, dtype=np.int8)
+    for ix0, ix1, iy0, iy1, iz0, iz1 in greedy_boxes:
+        covered[ix0:ix1, iy0:iy1, iz0:iz1] += 1
+    assert (covered == occupancy).all()  # same voxels, no overlaps
+
+
+def test_raster_voxels_tiled():
+    from bl_ext.user_default.bfds.lang.OP_XB.calc_raster import (
+        get_voxel_tris,
+        calc_raster_xbs,
+        is_tiled,
+    )
+
+    context = bpy.context
+    assert is_tiled((5, 4, 9), tile_size=4) and not is_tiled((4, 4, 9), tile_size=4)
+    # Merged across the tile seams
+    bpy.ops.mesh.primitive_cube_add(size=2.0, location=(0.0, 0.0, 0.0))
+    ob = context.active_object
+    tris, voxel_size = get_voxel_tris(context, ob=ob)
+    xbs = calc_raster_xbs(tris, voxel_size, scale_length=1.0, tile_size=4)
+    assert len(xbs) == 1
+    assert xbs[0] == pytest.approx((-1.0, 1.0, -1.0, 1.0, -1.0, 1.0))
+    bpy.data.meshes.remove(ob.data, do_unlink=True)
+    # Same voxels as the untiled grid, serial and parallel
+    bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, location=(0.1, 0.2, 0.3))
+    ob = context.active_object
+    tris, voxel_size = get_voxel_tris(context, ob=ob)
+    volumes = list()
+    for max_workers, tile_size in ((1, None), (1, 4), (2, 4)):
+        xbs = calc_raster_xbs(
+            tris,
+            voxel_size,
+            scale_length=1.0,
+            max_workers=max_workers,
+            tile_size=tile_size,
+        )
+        volumes.append(
+            sum((x1 - x0) * (y1 - y0) * (z1 - z0) for x0, x1, y0, y1, z0, z1 in xbs)
+        )
+    assert volumes[1] == pytest.approx(volumes[0])
+    assert volumes[2] == pytest.approx(volumes[0])
+    bpy.data.meshes.remove(ob.data, do_unlink=True)
+
+
+def test_voxel_disk_cache(tmp_path, monkeypatch):
+    from bl_ext.user_default.bfds.utils import voxel_cache
+
+    monkeypatch.setattr(voxel_cache, "_get_dirpath", lambda: str(tmp_path))
+    context = bpy.context
+    bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, location=(0.0, 0.0, 0.0))
+    ob = context.active_object
+    ob.bf_namelist_cls = "ON_OBST"
+    ob.bf_xb = "VOXELS"
+    ob.bf_xb_export = True
+    key = voxel_cache.get_key(context, ob)
+    assert voxel_cache.load(key) is None
+    result = _get_xbs(context, ob=ob, bf_xb="VOXELS")
+    xbs, msgs = voxel_cache.load(key)  # saved
+    assert xbs == result[1] and msgs == result[2]
+    utils.geometry.rm_geometric_cache(ob)  # eg. a new session
+    assert _get_xbs(context, ob=ob, bf_xb="VOXELS") == result
+    # Changed key
+    ob.location.x += 1.0
+    context.view_layer.update()  # matrix_world
+    assert voxel_cache.get_key(context, ob) != key
+    ob.location.x -= 1.0
+    context.view_layer.update()
+    assert voxel_cache.get_key(context, ob) == key
+    ob.bf_xb_center_voxels = not ob.bf_xb_center_voxels
+    assert voxel_cache.get_key(context, ob) != key
+    bpy.data.meshes.remove(ob.data, do_unlink=True)
+    voxel_cache.clear()
+    assert not list(tmp_path.iterdir())
+    # Eviction of the least recently used files
+    for i in range(3):
+        filepath = tmp_path / f"test_{i}.npz"
+        filepath.write_bytes(b"0" * 100)
+        os.utime(filepath, ns=(i, (3 - i) * 10**9))  # test_2 is the oldest
+    voxel_cache.evict(str(tmp_path), max_size=250)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["test_0.npz", "test_1.npz"]
+
+
+def _get_occupancy_faces(occupancy):
+    import numpy as np
+
+    # Boundary quad faces of the filled voxels, as from the Remesh modifier
+    cos, normals = list(), list()
+    for axis in range(3):
+        pad = [(0, 0)] * 3
+        pad[axis] = (1, 1)
+        steps = np.diff(np.pad(occupancy, pad).astype(np.int8), axis=axis)
+        ijks = np.argwhere(steps)
+        p, q = (i for i in range(3) if i != axis)
+        quad = list()
+        for dp, dq in ((0, 0), (1, 0), (1, 1), (0, 1)):
+            co = ijks.astype(float)
+            co[:, p] += dp
+            co[:, q] += dq
+            quad.append(co)
+        cos.append(np.stack(quad, axis=1))
+        n = np.zeros((len(ijks), 3))
+        n[:, axis] = -steps[tuple(ijks.T)]
+        normals.append(n)
+    cos, normals = np.concatenate(cos)[::-1], np.concatenate(normals)[::-1]
+    loop_totals = np.full(len(normals), 4)
+    return cos.reshape(-1, 3), loop_totals, np.arange(4 * len(normals)), normals
+
+
+def test_grow_voxel_merge():
+    import numpy as np
+    from bl_ext.user_default.bfds.lang.OP_XB.calc_voxels import calc_voxel_xbs
+
+    # Same boxes as the original loop implementation, ties included
+    occupancy = np.array(
+        (
+            ((1, 1, 0), (1, 0, 0), (1, 1, 1)),
+            ((0, 0, 1), (1, 0, 1), (0, 0, 0)),
+            ((1, 1, 1), (0, 0, 0), (1, 0, 1)),
+        ),
+        dtype=bool,
+    )
+    faces = _get_occupancy_faces(occupancy)
+    xbs = calc_voxel_xbs(faces, voxel_size=1.0, scale_length=1.0, merge="GROW")
+    assert xbs == [
+        (2.0, 3.0, 2.0, 3.0, 2.0, 3.0),
+        (2.0, 3.0, 2.0, 3.0, 0.0, 1.0),
+        (0.0, 1.0, 2.0, 3.0, 0.0, 3.0),
+        (0.0, 2.0, 1.0, 2.0, 0.0, 1.0),
+        (2.0, 3.0, 0.0, 1.0, 0.0, 3.0),
+        (1.0, 2.0, 0.0, 2.0, 2.0, 3.0),
+        (0.0, 1.0, 0.0, 1.0, 0.0, 2.0),
+    ]
@@ -0,0 +1,27 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import os, bpy
+from bl_ext.user_default.bfds import batch_export
+
+
+def test_parse_items():
+    blends = batch_export.parse_items(
+        ("a.blend", "a.blend:Scene 1", "b.blend:A:B", "C.BLEND:D", "c.blend:E")
+    )
+    assert blends == {
+        os.path.abspath("a.blend"): [],  # all Scenes
+        os.path.abspath("b.blend"): ["A:B"],
+        os.path.abspath("C.BLEND"): ["D"],
+        os.path.abspath("c.blend"): ["E"],
+    }
+
+
+def test_export_scenes(tmp_path):
+    sc = bpy.context.scene
+    bf_config_directory = sc.bf_config_directory
+    sc.bf_config_directory = str(tmp_path)
+    results = batch_export.export_scenes((sc.name, "Missing scene"))
+    sc.bf_config_directory = bf_config_directory
+    assert results[0]["ok"] and results[0]["error"] is None
+    assert (tmp_path / f"{sc.name}.fds").exists()
+    assert not results[1]["ok"] and "Missing scene" in results[1]["error"]
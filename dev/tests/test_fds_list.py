@@ -0,0 +1,366 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import re, sys, bpy, pytest
+
+from bl_ext.user_default.bfds.types import (
+    FDSList,
+    FDSFragment,
+    FDSMulti,
+    FDSNamelist,
+    FDSParam,
+    BFException,
+    iter_fds_namelists,
+)
+
+F90_NAMELISTS = (
+    "&HEAD CHID='test', TITLE='Test \"case\"' /\n&TAIL /",
+    "&OBST ID='a' XB=1.0,2.0,3.0,4.0,5.0,6.0 SURF_ID='A','B' /",
+    "! comment, don't\n&MESH IJK=10,20,30 XB=-1.5,1.5,-2.25,2.25,0.,3. /\n &NOTN X=1 /",
+    "&REAC FUEL='PROPANE' SOOT_YIELD=1.e-2 CO_YIELD=2.3E-03 /",
+    "&MATL ID='M' CONDUCTIVITY=.1 SPECIFIC_HEAT = 1.0 , DENSITY=1000 /",
+    "&SURF ID='S', MATL_ID(1,1)='M', MATL_MASS_FRACTION(1,1:2)=0.5,0.5 /",
+    "&DEVC ID='d/1' QUANTITY='TEMP' XYZ=1,2,3 INITIAL_STATE=.TRUE. LATCH=F /",
+    "&MISC\n  SIMULATION_MODE='VLES'\n  ,TMPA=20.\n/",
+    "&OBST\tXB=1,2,3,4,5,6,\n   SURF_ID='INERT' /\n&obst xb=0,1,0,1,0,1 /\n",
+    "&TIME T_END=0. /&TAIL /\n&DUMP DT_DEVC=-1.5 NFRAMES=+100 /",
+    "&PROP ID='p' PART_ID='it''s' /",
+    "&HEAD CHID='a\nb' /",
+    "&RAMP ID='r' T=0. F=0. /\n&RAMP ID='r' T=1.0 F=1.00 /",
+    "&TAIL /\n&OBST XB=1,2 ",
+    "&GEOM ID='g' VERTS=0.,0.,0., 1.,0.,0., 1.,1.,0. FACES=1,2,3,1 /",
+    "&SLCF PBX=0.5 QUANTITY='VELOCITY' VECTOR=.TRUE. CELL_CENTERED=T /",
+    "&HVAC ID='a' NODE_ID='n1','n2' AREA=0.1 ROUGHNESS=1E-3 LENGTH=1.E1 /",
+    "&INIT XB=0,1,0,1,0,1 TEMPERATURE=-0.0 /",
+)
+
+F90_PARAMS = (
+    "ID='a' XB=1,2,3,4,5,6",
+    "DX=1.5 N_LOWER=-2, N_UPPER=3 ,",
+    "A=.FALSE.\nB='x y'",
+)
+
+
+# Legacy regex scanner, reference of the parity tests
+
+_RE_SCAN_F90_NAMELISTS = re.compile(
+    r"""
+    ^&                    # & at the beginning of the line
+    ([A-Z][A-Z0-9]{3})    # namelist label (group 0)
+    [,\s\t]               # 1 separator
+    (                     # namelist params (group 1)
+    (?:'.*?'|".*?"|.*?)*  # 0+ any char, protect quoted strings, greedy
+    )                     # (separators are stripped later)
+    /                     # / end char
+    """,
+    re.VERBOSE | re.DOTALL | re.IGNORECASE | re.MULTILINE,
+)  # MULTILINE, so that ^ is the beginning of each line
+
+_RE_SCAN_F90_PARAMS = re.compile(
+    r"""
+    ([A-Z][A-Z0-9_\(\):,]*?)  # label (group 0)
+    [,\s\t]*                  # 0+ separators
+    =                         # = sign
+    [,\s\t]*                  # 0+ separators
+    (                         # value (group 1)
+        (?:'.*?'|".*?"|.+?)*?     # 1+ any char, protect str, not greedy
+            (?=                       # end previous match when:
+                (?:                       # there is another label:
+                    [,\s\t]+                  # 1+ separators
+                    [A-Z][A-Z0-9_\(\):,]*?    # label
+                    [,\s\t]*                  # 0+ separators
+                    =                         # = sign
+                )
+            |                         # or
+                $                         # it is end of line
+            )
+    )
+    """,
+    re.VERBOSE | re.DOTALL | re.IGNORECASE,
+)  # no MULTILINE, so that $ is the end of the file
+
+
+def _from_fds_regex(fds_list, f90_namelists=None, f90_params=None, f90_value=None):
+    # Fill fds_list as FDSList.from_fds(), with the legacy regex scanner
+    fds_list.clear()
+
+    if f90_namelists:
+        for match in re.finditer(_RE_SCAN_F90_NAMELISTS, f90_namelists):
+            label, f90_params = match.groups()
+            fds_namelist = FDSNamelist(fds_label=label)
+            _from_fds_regex(fds_namelist, f90_params=f90_params)
+            fds_list.append(fds_namelist)
+
+    elif f90_params:
+        f90_params = " ".join(f90_params.strip(", \t").splitlines())
+        for match in re.finditer(_RE_SCAN_F90_PARAMS, f90_params):
+            label, f90_value = match.groups()
+            fds_param = FDSParam(fds_label=label)
+            _from_fds_regex(fds_param, f90_value=f90_value)
+            fds_list.append(fds_param)
+
+    elif f90_value:
+        f90_value = " ".join(f90_value.strip().splitlines())
+        values = re.findall(FDSList._RE_SCAN_F90_VALUES, f90_value)
+        for i, v in enumerate(values):
+            if v in (".TRUE.", "T"):
+                values[i] = True
+            elif v in (".FALSE.", "F"):
+                values[i] = False
+            else:
+                try:
+                    values[i] = eval(v)
+                except Exception as err:
+                    msg = f"Malformed FDS file: <{fds_list.fds_label}={f90_value}> (value: <{v}>)\n<{err}>"
+                    raise BFException(fds_list, msg)
+        if isinstance(values[0], float):
+            match = re.findall(FDSList._RE_SCAN_DECIMAL_POS, f90_value)
+            fds_list.precision = match and max(len(m) for m in match) or 1
+            match = re.findall(FDSList._RE_SCAN_INTEGER, f90_value)
+            if match:
+                fds_list.exponential = True
+                fds_list.precision += max(len(m) for m in match) - 1
+        fds_list.extend(values)
+
+
+def _get_tree(fds_list):
+    return [
+        (
+            n.fds_label,
+            [(p.fds_label, list(p), p.precision, p.exponential) for p in n],
+        )
+        for n in fds_list
+    ]
+
+
+@pytest.mark.parametrize("f90_namelists", F90_NAMELISTS)
+def test_from_fds_namelists_parity(f90_namelists):
+    fds_list = FDSList(f90_namelists=f90_namelists)
+    fds_list_re = FDSList()
+    _from_fds_regex(fds_list_re, f90_namelists=f90_namelists)
+    assert _get_tree(fds_list) == _get_tree(fds_list_re)
+    assert fds_list.to_string() == fds_list_re.to_string()
+
+
+@pytest.mark.parametrize("f90_params", F90_PARAMS)
+def test_from_fds_params_parity(f90_params):
+    fds_list = FDSList(f90_params=f90_params)
+    fds_list_re = FDSList()
+    _from_fds_regex(fds_list_re, f90_params=f90_params)
+    assert [(p.fds_label, list(p)) for p in fds_list] == [
+        (p.fds_label, list(p)) for p in fds_list_re
+    ]
+
+
+def test_from_fds_values():
+    fds_list = FDSList(
+        f90_namelists="&DEVC ID='d' XYZ=1.5,2,3e2 IOR=-3 LATCH=.FALSE. /"
+    )
+    fds_namelist = fds_list[0]
+    assert fds_namelist.fds_label == "DEVC"
+    assert fds_namelist.get_fds_param(fds_label="ID").get_value() == "d"
+    fds_param = fds_namelist.get_fds_param(fds_label="XYZ")
+    assert fds_param.get_value() == (1.5, 2, 300.0)
+    assert fds_param.precision == 1 and fds_param.exponential
+    assert fds_namelist.get_fds_param(fds_label="IOR").get_value() == -3
+    assert fds_namelist.get_fds_param(fds_label="LATCH").get_value() is False
+
+
+def test_from_fds_malformed():
+    with pytest.raises(BFException):
+        FDSList(f90_namelists="&OBST XB=1,2,a /")
+    with pytest.raises(BFException):
+        FDSList(f90_namelists="&OBST ID='x' FOO /")
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, 64, 2**20))
+def test_iter_fds_namelists(tmp_path, chunk_size):
+    f90_namelists = "\n".join(
+        (
+            "! Test case, don't care",
+            "&HEAD CHID='test/1', TITLE='it''s a/b' /",
+            *(
+                f"&OBST ID='ob{i}' XB={i}.0,1,2,3,4,5 SURF_ID='INERT' /"
+                for i in range(20)
+            ),
+            "&TAIL /&OBST ID='not a namelist' /",
+            "&TAIL /",
+        )
+    )
+    filepath = tmp_path / "test.fds"
+    filepath.write_text(f90_namelists, encoding="windows-1252")
+    fds_list = FDSList(f90_namelists=f90_namelists)
+    fds_namelists = list(iter_fds_namelists(filepath, chunk_size=chunk_size))
+    assert len(fds_namelists) == len(fds_list) == 23
+    assert [n.to_string() for n in fds_namelists] == [n.to_string() for n in fds_list]
+
+
+def test_compact_param():
+    import numpy as np
+
+    verts = ",".join(f"{i * 0.125:.3f}" for i in range(3000))
+    faces = ",".join(str(i % 1000 + 1) for i in range(4000))
+    f90_namelists = f"&GEOM ID='g' VERTS={verts} FACES={faces} SURF_ID='A' /"
+    fds_list = FDSList(f90_namelists=f90_namelists)
+    fds_list_re = FDSList()
+    _from_fds_regex(fds_list_re, f90_namelists=f90_namelists)
+    fds_namelist = fds_list[0]
+    fds_param = fds_namelist.get_fds_param(fds_label="VERTS")
+    assert isinstance(fds_param.get_value(), np.ndarray)
+    assert len(fds_param) == 3000 and fds_param[1] == 0.125
+    assert fds_param.precision == 3 and not fds_param.exponential
+    fds_param = fds_namelist.get_fds_param(fds_label="FACES")
+    assert fds_param.get_value().dtype == np.int64
+    assert fds_list.to_string() == fds_list_re.to_string()
+
+
+def test_indexed():
+    fds_list = FDSList(f90_namelists="&OBST ID='a' XB=1,2,3,4,5,6 SURF_ID='A' ID='b' /")
+    fds_namelist = fds_list[0]
+    with fds_namelist.indexed():
+        assert "XB" in fds_namelist and "FOO" not in fds_namelist
+        assert fds_namelist._get_index(cls=None) == {
+            "ID": [0, 3],
+            "XB": [1],
+            "SURF_ID": [2],
+        }
+        assert (
+            fds_namelist.get_fds_param(fds_label="ID", remove=True).get_value() == "a"
+        )
+        assert fds_namelist.get_fds_param(fds_label="ID").get_value() == "b"
+        assert fds_namelist.get_fds_param(fds_label="FOO") is None
+        fds_params = fds_namelist.get_fds_params(fds_label="SURF_ID", remove=True)
+        assert [p.get_value() for p in fds_params] == ["A"]
+        assert "SURF_ID" not in fds_namelist
+        fds_namelist.append(FDSList(f90_params="SURF_ID='B'"))  # drop the index
+        assert fds_namelist.get_fds_param(fds_label="SURF_ID").get_value() == "B"
+    assert None not in list(fds_namelist)  # tombstones purged
+    assert fds_namelist.to_string() == "&OBST XB=1,2,3,4,5,6 ID='b' SURF_ID='B' /"
+    with fds_list.indexed():
+        assert "OBST" in fds_list and "MESH" not in fds_list
+        assert fds_list._get_index(cls=None) == {"OBST": [0]}
+        assert fds_list.get_fds_param(fds_label="XB")  # namelists, not indexed
+        assert len(fds_list.get_fds_namelists(fds_label="OBST", remove=True)) == 1
+    assert not fds_list
+
+
+def test_write_to():
+    import io
+
+    fds_list = FDSList(msgs=("! Test", ""), header="--- Header")
+    fds_list.append(FDSList(header="--- Empty"))
+    fds_list.append(FDSList(f90_namelists="\n".join(F90_NAMELISTS[:3])))
+    stream = io.StringIO()
+    fds_list.write_to(stream)
+    assert stream.getvalue() == fds_list.to_string()
+    assert stream.getvalue().startswith("--- Header\n! Test\n&HEAD")
+    assert "--- Empty" not in stream.getvalue()
+
+
+def test_fds_fragment():
+    fds_list = FDSList(f90_namelists="&OBST ID='a' SURF_ID='A' /\n&OBST ID='b' /")
+    fds_fragment = FDSFragment(text=fds_list.to_string(), iterable=fds_list)
+    fds_list = FDSList(header="--- Header", iterable=(fds_fragment, FDSFragment("")))
+    assert (
+        fds_list.to_string() == "--- Header\n&OBST ID='a' SURF_ID='A' /\n&OBST ID='b' /"
+    )
+    assert len(fds_list.get_fds_namelists(fds_label="OBST")) == 2
+    assert not FDSList(header="--- Header", iterable=(FDSFragment(""),)).to_string()
+
+
+@pytest.mark.parametrize("precision", (0, 1, 3, 6))
+def test_float_format(precision):
+    import random
+
+    random.seed(precision)
+    values = [-0.0, 0.0, -0.0004, 0.0005, 0.0015, 0.0025, 2.675, -2.0005, 1e20, 5]
+    values.extend(random.uniform(-1e4, 1e4) for _ in range(1000))
+    values.extend(k / 10**precision + 0.5 / 10**precision for k in range(-500, 500))
+    fds_param = FDSParam(fds_label="XB", value=tuple(values), precision=precision)
+    p = precision
+    assert fds_param._to_strings() == tuple(f"{round(v,p):.{p}f}" for v in values)
+    fds_param.exponential = True
+    assert fds_param._to_strings() == tuple(f"{v:.{p}E}" for v in values)
+
+
+def test_multi_lazy():
+    def gen_ids(n):
+        for i in range(n):
+            yield FDSParam(fds_label="ID", value=f"ob{i}")
+            if i == 2:
+                raise AssertionError("Not lazy")
+
+    fds_namelist = FDSNamelist(fds_label="OBST", msg="Test")
+    fds_namelist.append(FDSParam(fds_label="ID", value="ob"))  # replaced
+    fds_namelist.append(FDSParam(fds_label="SURF_ID", value="INERT"))
+    fds_namelist.append(
+        FDSMulti(
+            iterable=(
+                gen_ids(10),
+                (FDSParam(fds_label="XB", value=(i, 1, 0, 1, 0, 1)) for i in range(10)),
+            ),
+            msg="Multi",
+        )
+    )
+    lines = fds_namelist.iter_lines()
+    assert next(lines) == "Multi"
+    assert next(lines) == "Test\n&OBST ID='ob0' XB=0,1,0,1,0,1 SURF_ID='INERT' /"
+    assert next(lines) == "Test\n&OBST ID='ob1' XB=1,1,0,1,0,1 SURF_ID='INERT' /"
+
+
+@pytest.mark.skipif(sys.platform != "linux", reason="fork is unavailable or unsafe")
+@pytest.mark.parametrize("chunk_size", (64, 2**20))
+def test_iter_fds_namelists_parallel(tmp_path, chunk_size):
+    f90_namelists = "\n".join(
+        (
+            *(f"&OBST ID='ob{i}' XB={i}.0,1,2,3,4,5 /" for i in range(50)),
+            "&HEAD TITLE='not\n&OBST ID=''a namelist'' /\nstart' /",  # false split
+            *(f"&OBST ID='ob{i}' XB={i}.0,1,2,3,4,5 /" for i in range(50)),
+            "&GEOM ID='g' VERTS=" + ",".join(f"{i}.5" for i in range(3000)) + " /",
+            "&TAIL /",
+        )
+    )
+    filepath = tmp_path / "test.fds"
+    filepath.write_text(f90_namelists)
+    fds_list = FDSList(f90_namelists=f90_namelists)
+    fds_namelists = list(
+        iter_fds_namelists(filepath, chunk_size=chunk_size, max_workers=2)
+    )
+    assert len(fds_namelists) == len(fds_list) == 103
+    assert [n.to_string() for n in fds_namelists] == [n.to_string() for n in fds_list]
+
+
+def _flat_n_to_string_ref(n):
+    from bl_ext.user_default.bfds.config import MAXLEN, INDENT
+    from bl_ext.user_default.bfds.utils.text import append_word
+
+    body = [f"&{n.fds_label}"]
+    for p in n:
+        fds_values = p._to_strings()
+        word = f"{p.fds_label}={','.join(fds_values)}"
+        if len(word) <= MAXLEN - INDENT or len(fds_values) == 1:
+            body = append_word(body, word=word)
+        else:
+            body = append_word(body, word=f"{p.fds_label}={fds_values[0]},")
+            for v in fds_values[1:-1]:
+                body = append_word(body, word=f"{v},", separator="")
+            body = append_word(body, word=f"{fds_values[-1]}", separator="")
+    body[-1] += " /"
+    return "\n".join(body)
+
+
+@pytest.mark.parametrize("nvalues", (10, 1000))
+def test_flat_n_to_string_parity(nvalues):
+    import numpy as np
+
+    rng = np.random.default_rng(nvalues)
+    fds_namelist = FDSNamelist(fds_label="GEOM")
+    fds_namelist.append(FDSParam(fds_label="ID", value="g"))
+    fds_namelist.append(
+        FDSParam(fds_label="VERTS", value=rng.random(nvalues) * 100.0, precision=6)
+    )
+    fds_namelist.append(FDSParam(fds_label="SURF_ID", value=("A", "B,C", "D")))
+    fds_namelist.append(
+        FDSParam(fds_label="FACES", value=rng.integers(1, nvalues, nvalues))
+    )
+    f90 = fds_namelist._flat_n_to_string(fds_namelist)
+    assert f90 == _flat_n_to_string_ref(fds_namelist)
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-import bpy
+import bpy, pytest
 
 
 def test_binpacking():
@@ -66,3 +66,209 @@ def test_gis():
         1588317.6265875068,
         4990506.711860527,
     )
+
+
+def test_bl_text_fds_list():
+    from bl_ext.user_default.bfds.utils import ui
+
+    bl_text = bpy.data.texts.new("Test free text")
+    bl_text.from_string("&MATL ID='A' DENSITY=1000. /")
+    fds_list = ui.get_bl_text_fds_list(bl_text)
+    assert fds_list.get_fds_namelist(fds_label="MATL")
+    assert ui.get_bl_text_fds_list(bl_text) is fds_list  # cached
+    bl_text.from_string("&PROP ID='B' /")  # edited
+    fds_list = ui.get_bl_text_fds_list(bl_text)
+    assert not fds_list.get_fds_namelist(fds_label="MATL")
+    assert fds_list.get_fds_namelist(fds_label="PROP")
+    assert not ui.get_bl_text_fds_list(None)
+    bpy.data.texts.remove(bl_text)
+
+
+def test_ob_fds_cache():
+    from bl_ext.user_default.bfds.utils import cache
+    from bl_ext.user_default.bfds.types import BFException
+
+    context = bpy.context
+    bpy.ops.mesh.primitive_cube_add()
+    ob = context.active_object
+    ob.name = "Test cached"
+    ob.bf_namelist_cls = "ON_OBST"
+    sc_key = cache.get_sc_key(context)
+    fds_fragment = cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key)
+    assert fds_fragment.to_string() == ob.to_fds_list(context).to_string()
+    assert cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key) is fds_fragment
+    ob.name = "Test renamed"  # changed key
+    fds_fragment = cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key)
+    assert "ID='Test renamed'" in fds_fragment.to_string()
+    cache.rm_ob_fds_cache(ob)  # changed geometry
+    assert cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key) is not fds_fragment
+    ma = bpy.data.materials.new("Test cached SURF")
+    ma.bf_surf_export = True
+    ob.active_material = ma
+    ob.bf_surf_id_export = True
+    fds_fragment = cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key)
+    ma.bf_surf_export = False  # changed Material, checked again
+    with pytest.raises(BFException):
+        cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key)
+    bpy.data.objects.remove(ob)
+    bpy.data.materials.remove(ma)
+
+
+def test_layer_collection_map():
+    from bl_ext.user_default.bfds.utils import geometry
+
+    context = bpy.context
+    sc = context.scene
+    co_parent = bpy.data.collections.new("Test parent")
+    co_child = bpy.data.collections.new("Test child")
+    sc.collection.children.link(co_parent)
+    co_parent.children.link(co_child)
+    obs = list()
+    for co in (co_parent, co_child):
+        ob = bpy.data.objects.new(f"Test in {co.name}", bpy.data.meshes.new("Test"))
+        co.objects.link(ob)
+        obs.append(ob)
+    lc_map = geometry.get_layer_collection_map(context)
+    for ob in obs:
+        assert lc_map[ob] == ob.get_layer_collection(context)
+    for co in (sc.collection, co_parent, co_child):
+        assert lc_map[co] == co.get_layer_collection(context)
+    lc_map[co_child].exclude = True
+    lc_map = geometry.get_layer_collection_map(context)
+    exported_obs = list(
+        geometry.get_exported_obs(context, obs=sc.objects, lc_map=lc_map)
+    )
+    assert obs[0] in exported_obs and obs[1] not in exported_obs
+    assert not co_child.to_fds_list(context, lc_map=lc_map)
+    for ob in obs:
+        bpy.data.objects.remove(ob)
+    bpy.data.collections.remove(co_child)
+    bpy.data.collections.remove(co_parent)
+
+
+def test_profiler():
+    from bl_ext.user_default.bfds.utils import profiler
+
+    context = bpy.context
+    bpy.ops.mesh.primitive_cube_add()
+    ob = context.active_object
+    ob.name = "Test profiled"
+    ob.bf_namelist_cls = "ON_OBST"
+    assert not profiler.is_active()
+    profiler.start()
+    fds = context.scene.to_fds(context, full=True)
+    report = profiler.stop()
+    assert not profiler.is_active()
+    assert "! Export profile:" in fds
+    names = {(r["category"], r["name"]) for r in report["records"]}
+    assert ("stage", "collections") in names
+    assert ("object", "Test profiled") in names
+    assert ("namelist", "ON_OBST") in names
+    assert ("format", "to_string") in names
+    assert "Test profiled" in profiler.report_to_string(report)
+    assert "! Export profile:" not in context.scene.to_fds(context, full=True)
+    bpy.data.objects.remove(ob)
+
+
+def test_write_unchanged(tmp_path):
+    from bl_ext.user_default.bfds.utils import io
+
+    filepath = str(tmp_path / "test.fds")
+    write_to = lambda f: f.write("&HEAD CHID='test' /")
+    assert io.write_txt_stream(filepath, write_to=write_to)
+    assert not io.write_txt_stream(filepath, write_to=write_to)  # unchanged
+    assert io.flush_manifests() == [filepath]
+    assert (tmp_path / io.WRITE_MANIFEST_NAME).exists()
+    assert not io.write_txt_stream(filepath, write_to=write_to)  # from manifest
+    assert io.write_txt_stream(filepath, write_to=lambda f: f.write("&TAIL /"))
+    with open(filepath, "w") as f:  # touched by others
+        f.write("&HEAD CHID='other' /")
+    assert io.write_txt_stream(filepath, write_to=lambda f: f.write("&TAIL /"))
+    assert io.read_txt_file(filepath) == "&TAIL /"
+    assert io.write_bin_file(str(tmp_path / "test.bingeom"), b"\x01\x02")
+    assert not io.write_bin_file(str(tmp_path / "test.bingeom"), b"\x01\x02")
+    io.flush_manifests()
+    # Sessions
+    assert not io.write_txt_stream(filepath, write_to=lambda f: f.write("&TAIL /"))
+    with io.write_session() as skipped:  # the previous skip is dropped
+        with io.write_session() as nested_skipped:
+            assert not io.write_bin_file(str(tmp_path / "test.bingeom"), b"\x01\x02")
+        assert not nested_skipped  # flushed by the outermost session
+    assert skipped == [str(tmp_path / "test.bingeom")]
+
+
+def test_refs():
+    from bl_ext.user_default.bfds.utils import refs
+    from bl_ext.user_default.bfds.types import FDSList
+
+    fds_list = FDSList(
+        f90_namelists="&OBST SURF_IDS='A','B','C' SURF_ID6='D' /\n&VENT SURF_ID='E' SURF_IDS='F' /\n&MATL ID='G' /"
+    )
+    obst, vent, matl = fds_list.get_fds_namelists()
+    assert refs.get_ref_ids(obst) == {"A", "B", "C"}  # first found only
+    assert refs.get_ref_ids(vent) == {"E"}
+    assert refs.get_ref_ids(matl) == set()
+    refs.add_fds_namelist(obst)  # not recording
+    refs.start()
+    refs.add_fds_namelist(vent)
+    refs.add_ref_ids(("H",))
+    assert refs.stop() == {"E", "H"}
+    assert refs.stop() == set()
+
+
+def test_catf_export(tmp_path):
+    context = bpy.context
+    sc = context.scene
+    co = bpy.data.collections.new("Test CATF")
+    sc.collection.children.link(co)
+    bpy.ops.mesh.primitive_cube_add()
+    ob = context.active_object
+    ob.name = "Test CATF obst"
+    for ob_co in ob.users_collection:
+        ob_co.objects.unlink(ob)
+    co.objects.link(ob)
+    ob.bf_namelist_cls = "ON_OBST"
+    bf_config_directory = sc.bf_config_directory
+    sc.bf_config_directory = str(tmp_path)
+    sc.bf_config_catf_export = True
+    try:
+        sc.to_fds(context, full=True, save=True)
+        co_filepath = tmp_path / f"{sc.name}_{bpy.path.clean_name(co.name)}.fds"
+        fds = (tmp_path / f"{sc.name}.fds").read_text()
+        assert "&CATF OTHER_FILES=" in fds and co_filepath.name in fds
+        assert "&OBST ID='Test CATF obst'" not in fds
+        assert "&OBST ID='Test CATF obst'" in co_filepath.read_text()
+        result = sc.to_fds(context, full=True, save=True)  # unchanged
+        assert result.filepath == str(tmp_path / f"{sc.name}.fds")
+        assert str(co_filepath) in result.skipped
+    finally:
+        sc.bf_config_catf_export = False
+        sc.bf_config_directory = bf_config_directory
+        bpy.data.objects.remove(ob)
+        bpy.data.collections.remove(co)
+
+
+def test_import_missing_file(tmp_path):
+    from bl_ext.user_default.bfds.types import BFException
+
+    context = bpy.context
+    sc = context.scene
+    bf_config_directory = sc.bf_config_directory
+    with pytest.raises(BFException):
+        sc.from_fds(context, filepath=str(tmp_path / "missing" / "case.fds"))
+    assert sc.bf_config_directory == bf_config_directory  # restored
+
+
+def test_face_centers():
+    import numpy as np
+    from bl_ext.user_default.bfds.utils import geometry
+
+    co = np.array(((0, 0, 0), (2, 0, 0), (2, 2, 0), (0, 2, 0), (0, 0, 4)), dtype=float)
+    loop_totals = np.array((4, 3))
+    vertex_index = np.array((0, 1, 2, 3, 0, 1, 4))
+    centers = geometry.get_face_centers(co, loop_totals, vertex_index)
+    assert centers.tolist() == [[1.0, 1.0, 0.0], [2 / 3, 0.0, 4 / 3]]
+    assert geometry.get_face_centers(co, loop_totals[:0], vertex_index[:0]).shape == (
+        0,
+        3,
+    )
@@ -0,0 +1,182 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, headless batch export of FDS cases from many .blend files.
+
+Run from the command line, with the BFDS extension enabled:
+
+    blender -b --python batch_export.py -- [-j JOBS] [-o SUMMARY] ITEM [ITEM ...]
+
+Each ITEM is a .blend filepath, optionally followed by :SCENE_NAME
+(eg. "case.blend:Scene"), split at the first ".blend:";
+without a Scene name, all its Scenes are exported, even if other ITEMs
+name some of them.
+Each .blend file is exported by a Blender worker process,
+at most JOBS at the same time, calling BFScene.to_fds(full=True, save=True).
+The summary of timings and failures is written to SUMMARY as JSON,
+or printed if not set. Blender exits with 1 if any export failed.
+"""
+
+import os, sys, json, time, argparse, tempfile, subprocess
+from concurrent.futures import ThreadPoolExecutor
+import bpy
+
+
+def parse_items(items):
+    """!
+    Group the command line items by .blend file, in order.
+    @param items: list of "filepath.blend" or "filepath.blend:SCENE_NAME".
+    @return dict {abs blend filepath: list of Scene names, empty for all}.
+    """
+    blends, all_scenes = dict(), set()
+    for item in items:
+        # Split at the first .blend: (eg. C:\case.blend:A:B, Scene "A:B")
+        i = item.lower().find(".blend:")
+        if i < 0:
+            filepath, sc_name = item, None  # no Scene (eg. C:\case.blend)
+        else:
+            filepath, sc_name = item[: i + 6], item[i + 7 :]
+        filepath = os.path.abspath(filepath)
+        sc_names = blends.setdefault(filepath, list())
+        if sc_name:
+            sc_names.append(sc_name)
+        else:
+            all_scenes.add(filepath)
+    # A bare .blend filepath exports all its Scenes, even if some are named
+    for filepath in all_scenes:
+        blends[filepath].clear()
+    return blends
+
+
+def _run_worker(blender, filepath, sc_names, timeout):
+    """!
+    Export the Scenes of a .blend file in a Blender worker process.
+    @param blender: the Blender executable.
+    @param filepath: the .blend filepath.
+    @param sc_names: list of Scene names, empty for all.
+    @param timeout: timeout in seconds, or None.
+    @return list of the results of the exported Scenes.
+    """
+    t0 = time.perf_counter()
+    fd, result_filepath = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    command = [
+        blender,
+        "-b",
+        filepath,
+        "--python-exit-code",
+        "1",
+        "--python",
+        os.path.abspath(__file__),
+        "--",
+        "--worker",
+        result_filepath,
+        *sc_names,
+    ]
+    results, error = list(), None
+    try:
+        res = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        with open(result_filepath, "r", encoding="utf8") as f:
+            results = json.load(f)
+    except subprocess.TimeoutExpired:
+        error = f"Timeout after {timeout} s"
+    except OSError as err:  # Blender not found
+        error = str(err)
+    except ValueError:  # worker crashed, no results
+        error = f"Blender exit code {res.returncode}:\n{res.stderr[-2000:]}"
+    finally:
+        os.remove(result_filepath)
+    if not results:
+        error = error or "No exported Scene"
+        results = list(
+            {"scene": n, "ok": False, "error": error, "time": None, "skipped": 0}
+            for n in sc_names or (None,)
+        )
+    for r in results:
+        r["blend"] = filepath
+        r["worker_time"] = time.perf_counter() - t0
+    return results
+
+
+def export_scenes(sc_names):
+    """!
+    Export the Scenes of the loaded .blend file to FDS, in the worker process.
+    @param sc_names: list of Scene names, empty for all.
+    @return list of results: {"scene", "ok", "error", "time", "skipped"}.
+    """
+    context = bpy.context
+    results = list()
+    for sc_name in sc_names or list(sc.name for sc in bpy.data.scenes):
+        t0 = time.perf_counter()
+        result = {"scene": sc_name, "ok": False, "error": None, "skipped": 0}
+        try:
+            sc = bpy.data.scenes.get(sc_name)
+            if sc is None:
+                raise KeyError(f"Scene not found: <{sc_name}>")
+            if not hasattr(sc, "to_fds"):
+                raise RuntimeError("BFDS extension not enabled")
+            with context.temp_override(scene=sc):
+                export_result = sc.to_fds(bpy.context, full=True, save=True)
+            result["ok"], result["skipped"] = True, len(export_result.skipped)
+        except Exception as err:
+            result["error"] = str(err)
+        result["time"] = time.perf_counter() - t0
+        results.append(result)
+    return results
+
+
+def main(argv):
+    """!
+    Batch export entry point, or worker process entry point.
+    @param argv: command line arguments after "--".
+    @return exit code, 1 if any export failed.
+    """
+    parser = argparse.ArgumentParser(
+        prog="blender -b --python batch_export.py --",
+        description="Export FDS cases from many .blend files in parallel",
+    )
+    parser.add_argument("items", nargs="*", help="filepath.blend[:SCENE_NAME]")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1, help="max workers"
+    )
+    parser.add_argument("-o", "--summary", help="JSON summary filepath")
+    parser.add_argument("--timeout", type=float, help="timeout per .blend file, s")
+    parser.add_argument("--blender", default=bpy.app.binary_path, help="executable")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)  # result filepath
+    args = parser.parse_args(argv)
+
+    # Worker process, with its .blend file loaded
+    if args.worker:
+        results = export_scenes(args.items)
+        with open(args.worker, "w", encoding="utf8") as f:
+            json.dump(results, f)
+        return 0
+
+    # Main process
+    t0 = time.perf_counter()
+    blends = parse_items(args.items)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = list(
+            executor.submit(_run_worker, args.blender, f, sc_names, args.timeout)
+            for f, sc_names in blends.items()
+        )
+        results = list(r for future in futures for r in future.result())
+    failed = sum(not r["ok"] for r in results)
+    summary = {
+        "total_time": time.perf_counter() - t0,
+        "jobs": args.jobs,
+        "exported": len(results) - failed,
+        "failed": failed,
+        "results": results,
+    }
+    if args.summary:
+        with open(args.summary, "w", encoding="utf8") as f:
+            json.dump(summary, f, indent=1)
+    else:
+        print(json.dumps(summary, indent=1))
+    return failed and 1 or 0
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1 :] if "--" in sys.argv else list()
+    sys.exit(main(argv))
@@ -5,7 +5,14 @@ BFDS, handlers.
 """
 
 import bpy
-from bpy.app.handlers import persistent, load_post, save_pre, depsgraph_update_post
+from bpy.app.handlers import (
+    persistent,
+    load_post,
+    save_pre,
+    depsgraph_update_post,
+    undo_post,
+    redo_post,
+)
 from bpy.types import Object
 
 from .. import utils, config
@@ -51,6 +58,10 @@ def _load_post(self):
     # Set simplified property panel
     toggle_simple_property_panel()
 
+    # Remove the parsed texts and exported Objects of the previous file
+    utils.ui.rm_bl_text_caches()
+    utils.cache.rm_ob_fds_caches()
+
 
 @persistent
 def _save_pre(self):
@@ -66,7 +77,7 @@ def _save_pre(self):
 @persistent
 def _depsgraph_update_post(scene):
     """!
-    Detect object change and erase cached geometry.
+    Detect object change and erase cached geometry and FDS text.
     """
     for update in bpy.context.view_layer.depsgraph.updates:
         ob = update.id.original
@@ -76,6 +87,15 @@ def _depsgraph_update_post(scene):
             and (update.is_updated_geometry or update.is_updated_transform)
         ):
             ob["ob_to_xbs_cache"] = None
+            utils.cache.rm_ob_fds_cache(ob)
+
+
+@persistent
+def _undo_post(scene):
+    """!
+    Erase the cached FDS text, as undo and redo restore any Object.
+    """
+    utils.cache.rm_ob_fds_caches()
 
 
 # Register
@@ -86,10 +106,14 @@ def register():
     load_post.append(_load_post)
     save_pre.append(_save_pre)
     depsgraph_update_post.append(_depsgraph_update_post)
+    undo_post.append(_undo_post)
+    redo_post.append(_undo_post)
 
 
 def unregister():
     log.debug("Unregister handlers...")
+    redo_post.remove(_undo_post)
+    undo_post.remove(_undo_post)
     depsgraph_update_post.remove(_depsgraph_update_post)
     save_pre.remove(_save_pre)
     load_post.remove(_load_post)
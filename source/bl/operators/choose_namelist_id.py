@@ -7,8 +7,7 @@ BFDS, operators to choose IDs for MATL_ID, PROP_ID in free text.
 import logging, csv
 from bpy.types import Operator
 from bpy.props import EnumProperty
-from ...types import FDSList
-from ... import config
+from ... import config, utils
 
 log = logging.getLogger(__name__)
 
@@ -19,12 +18,8 @@ def get_referenced_ids(context, fds_label="SURF"):
     """!
     Get fds_label IDs referenced in Free Text.
     """
-    fds_list = FDSList()
-    sc = context.scene
-
-    # Get namelists from Free Text
-    if sc.bf_config_text:
-        fds_list.from_fds(f90_namelists=sc.bf_config_text.as_string())
+    # Get namelists from Free Text, cached
+    fds_list = utils.ui.get_bl_text_fds_list(context.scene.bf_config_text)
 
     # Prepare list of IDs
     items = list()
@@ -64,7 +64,7 @@ class ExportSceneToFDS(Operator, ExportHelper):
 
         # Export
         try:
-            sc.to_fds(context=context, full=True, save=True)
+            result = sc.to_fds(context=context, full=True, save=True)
         except Exception as err:
             w.cursor_modal_restore()
             self.report({"ERROR"}, str(err))
@@ -72,7 +72,11 @@ class ExportSceneToFDS(Operator, ExportHelper):
 
         # Close
         w.cursor_modal_restore()
-        self.report({"INFO"}, "FDS case exported")
+        if result.skipped:
+            n = len(result.skipped)
+            self.report({"INFO"}, f"FDS case exported, unchanged files skipped: {n}")
+        else:
+            self.report({"INFO"}, "FDS case exported")
         return {"FINISHED"}
 
 
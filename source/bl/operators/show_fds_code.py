@@ -8,7 +8,7 @@ import logging
 from bpy.types import Operator
 from bpy.props import StringProperty, EnumProperty
 from ...types import BFException
-from ... import utils
+from ... import utils, lang
 
 log = logging.getLogger(__name__)
 
@@ -163,12 +163,35 @@ class SCENE_OT_bf_show_fds_code(_show_fds_code, Operator):
         return context.scene.to_fds_list(context).to_string()
 
 
+class SCENE_OT_bf_estimate_export(_show_fds_code, Operator):
+    """!
+    Estimate the FDS export of Scene, without exporting it.
+    """
+
+    bl_label = "Estimate"
+    bl_idname = "scene.bf_estimate_export"
+    bl_description = "Estimate namelists, cells and file sizes exported from Scene"
+
+    @classmethod
+    def poll(cls, context):
+        return context.scene
+
+    def execute(self, context):
+        self.report({"INFO"}, "Export estimate shown")
+        return {"FINISHED"}
+
+    def _get_lines(self, context):
+        est = context.scene.to_estimate(context)
+        return lang.bf_scene.estimate_to_string(est)
+
+
 bl_classes = [
     WM_OT_bf_dialog,
     OBJECT_OT_bf_show_fds_code,
     COLLECTION_OT_bf_show_fds_code,
     MATERIAL_OT_bf_show_fds_code,
     SCENE_OT_bf_show_fds_code,
+    SCENE_OT_bf_estimate_export,
 ]
 
 
@@ -7,7 +7,7 @@ BFDS, preferences panel.
 import bpy
 import logging
 from bpy.types import AddonPreferences
-from bpy.props import BoolProperty, StringProperty
+from bpy.props import BoolProperty, StringProperty, EnumProperty
 from ..ui.simple import toggle_simple_ui
 from .. import config
 
@@ -36,6 +36,33 @@ class BFPreferences(AddonPreferences):
         update=update_bf_pref_simplify_ui,
     )
 
+    bf_pref_parallel_import: BoolProperty(
+        name="Parallel Import",
+        description="Read large FDS case files with parallel worker processes, forked from Blender (Linux only, experimental: a fork can deadlock)",
+        default=False,
+    )
+
+    bf_pref_parallel_export: BoolProperty(
+        name="Parallel Export",
+        description="Convert the geometry of many Objects and large Raster voxel grids with parallel worker processes, forked from Blender (Linux only, experimental: a fork can deadlock)",
+        default=False,
+    )
+
+    bf_pref_export_profile: EnumProperty(
+        name="Export Profile",
+        description="Record the time spent by each stage and Object of the FDS export",
+        items=(
+            ("NONE", "None", "Do not profile the export"),
+            ("TEXT", "Text", "Write the profile report to a Blender Text"),
+            (
+                "JSON",
+                "JSON",
+                "Write the profile report to a JSON file next to the FDS file",
+            ),
+        ),
+        default="NONE",
+    )
+
     bf_pref_fds_command: StringProperty(
         name="Run FDS",
         description="\n".join(
@@ -80,6 +107,9 @@ class BFPreferences(AddonPreferences):
 
         col = layout.column()
         col.prop(self, "bf_pref_simplify_ui")
+        col.prop(self, "bf_pref_parallel_import")
+        col.prop(self, "bf_pref_parallel_export")
+        col.prop(self, "bf_pref_export_profile")
         col.prop(paths, "use_load_ui", text="Load UI setup when loading .blend files")
         col.prop(
             paths,
@@ -80,6 +80,76 @@ BEARING_P = 1
 MAXLEN = 80
 # number of columns for second line indent
 INDENT = 6
+# size of the write buffer of the exported FDS case file, bytes
+WRITE_BUFFER_SIZE = 2**20
+
+
+# Writing of the exported files (eg. .fds, .bingeom, .ge1)
+
+# skip writing the files unchanged since the last export
+WRITE_SKIP_UNCHANGED = True
+# name of the manifest of the written file hashes, one per directory
+WRITE_MANIFEST_NAME = ".bfds_manifest.json"
+# lines not hashed, as they change at each export
+WRITE_HASH_SKIP = ("! Date:", "! Export profile:")
+# max size of the exported text kept in memory, then spooled to disk, bytes
+WRITE_SPOOL_SIZE = 2**26
+
+
+# Reading of the imported FDS case file
+
+# size of the chunks read from the FDS case file, chars
+READ_CHUNK_SIZE = 2**20
+# min number of homogeneous numeric values, read to a compact array (eg. GEOM VERTS)
+COMPACT_PARAM_LEN = 1000
+# min size of the FDS case file read by parallel worker processes, bytes
+PARALLEL_READ_MIN_SIZE = 2**23
+# max number of parallel worker processes, None for the number of CPUs
+PARALLEL_READ_MAX_WORKERS = None
+
+
+# Caching of the exported Objects
+
+# cache the FDS text of each exported Object, until it is changed
+OB_FDS_CACHE = True
+# Object namelists never cached, as their export writes other files (eg. bingeom)
+OB_FDS_CACHE_SKIP = {"ON_GEOM"}
+
+
+# Parallel conversion of the exported geometry (eg. voxels)
+
+# min number of Objects, converted by parallel worker processes
+PARALLEL_EXPORT_MIN_OBS = 4
+# max number of parallel worker processes, None for the number of CPUs
+PARALLEL_EXPORT_MAX_WORKERS = None
+
+
+# Raster voxelization of the exported geometry, without the Remesh modifier
+
+# max number of (triangle, voxel column) pairs rasterized at once, to bound memory
+RASTER_CHUNK_SIZE = 2**22
+# max number of voxels of a tile side, larger voxel grids are split in tiles
+RASTER_TILE_SIZE = 256
+
+
+# Persistent disk cache of the voxels, across Blender sessions
+
+# cache the merged voxels and pixels of each Object on disk, until it is changed
+VOXEL_CACHE = True
+# name of the cache directory, in the extension user directory
+VOXEL_CACHE_DIRNAME = "voxel_cache"
+# max size of the cache directory, least recently used files are evicted, bytes
+VOXEL_CACHE_MAX_SIZE = 2**28
+# version of the cached voxels, increase it when the voxelization output changes
+VOXEL_CACHE_VERSION = 4
+
+
+# Dry-run estimate of the exported FDS case, without exporting it
+
+# mean number of chars of the non geometric parameters of a namelist (eg. ID, SURF_ID)
+ESTIMATE_NAMELIST_CHARS = 40
+# rough voxelization rate, voxels per second, for the voxelization time estimate
+ESTIMATE_VOXEL_RATE = 2e6
 
 
 # Automatic sanity checks of the geometries,
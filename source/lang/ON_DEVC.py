@@ -5,7 +5,13 @@ from bpy.types import Object
 from bpy.props import FloatProperty, BoolProperty, StringProperty
 from ..types import BFParam, BFNamelistOb
 from .bf_object import OP_namelist_cls, OP_ID, OP_FYI, OP_ID_suffix, OP_other
-from .OP_XB import OP_XB, OP_XB_voxel_size, OP_XB_center_voxels
+from .OP_XB import (
+    OP_XB,
+    OP_XB_voxel_size,
+    OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
+)
 from .OP_XYZ import OP_XYZ
 from .OP_SURF_ID import OP_SURF_ID
 
@@ -52,6 +58,8 @@ class ON_DEVC(BFNamelistOb):
         OP_XB,
         OP_XB_voxel_size,
         OP_XB_center_voxels,
+        OP_XB_voxelizer,
+        OP_XB_voxel_merge,
         OP_XYZ,
         OP_ID_suffix,
         OP_other,
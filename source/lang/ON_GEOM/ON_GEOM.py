@@ -272,16 +272,17 @@ class ON_GEOM(BFNamelistOb):
             # Zval terrain
             "ZVALS": None,
         }
-        for fds_label in ps:
-            fds_param = fds_list.get_fds_param(fds_label=fds_label, remove=True)
-            if fds_param:
-                ps[fds_label] = fds_param.get_value()  # assign value
-        # Read SURF_ID params, to prepare Material slots
-        super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_ID")
-        super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_IDS")
-        super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_ID6")
+        with fds_list.indexed():  # many labels are probed
+            for fds_label in ps:
+                fds_param = fds_list.get_fds_param(fds_label=fds_label, remove=True)
+                if fds_param:
+                    ps[fds_label] = fds_param.get_value()  # assign value
+            # Read SURF_ID params, to prepare Material slots
+            super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_ID")
+            super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_IDS")
+            super().from_fds_list(context, fds_list=fds_list, fds_label="SURF_ID6")
         # Treat alternative geometries
-        if ps["VERTS"] and ps["FACES"]:
+        if ps["VERTS"] is not None and ps["FACES"] is not None:  # maybe np.arrays
             geom_to_mesh(
                 context,
                 me=self.element.data,
@@ -4,7 +4,7 @@
 BFDS, FDS bingeom files input/output routines.
 """
 
-import struct, logging
+import io, struct, logging
 import numpy as np
 from ... import utils
 from ...types import BFException
@@ -75,7 +75,7 @@ def read_bingeom_file(filepath):
 def _write_record(f, data):
     """!
     Write a record to a binary unformatted sequential Fortran90 file.
-    @param f: open Python file object in 'wb' mode.
+    @param f: open Python file object in 'wb' mode, or binary stream.
     @param data: np.array() of data.
     """
     # Calc start and end record tag
@@ -83,7 +83,7 @@ def _write_record(f, data):
     # print(f"Write: record tag: {tag} dlen: {len(data)}\ndata: {data}")  # TODO log debug
     # Write start tag, data, and end tag
     f.write(struct.pack("i", tag))
-    data.tofile(f)
+    f.write(data.tobytes())
     f.write(struct.pack("i", tag))
 
 
@@ -107,12 +107,11 @@ def write_bingeom_file(
     @param fds_volus: volumes connectivity in FDS flat format, eg. (i0, j0, k0, w0, i1, ...)
     @param filepath: destination filepath
     @param force_dir: make directory
+    @return True if written, False if unchanged.
     """
 
     try:
-        if force_dir:
-            utils.io.make_dir(filepath)
-        with open(filepath, "wb") as f:
+        with io.BytesIO() as f:
             _write_record(f, np.array((geom_type,), dtype="int32"))  # 1 or 2 if terrain
             _write_record(
                 f,
@@ -126,9 +125,11 @@ def write_bingeom_file(
                     dtype="int32",
                 ),
             )
-            _write_record(f, np.array(fds_verts, dtype="float64"))
-            _write_record(f, np.array(fds_faces, dtype="int32"))
-            _write_record(f, np.array(fds_surfs, dtype="int32"))
-            _write_record(f, np.array(fds_volus, dtype="int32"))
+            _write_record(f, np.asarray(fds_verts, dtype="float64"))
+            _write_record(f, np.asarray(fds_faces, dtype="int32"))
+            _write_record(f, np.asarray(fds_surfs, dtype="int32"))
+            _write_record(f, np.asarray(fds_volus, dtype="int32"))
+            data = f.getvalue()
+        return utils.io.write_bin_file(filepath, data, force_dir=force_dir)
     except Exception as err:
         raise BFException(None, f"Error writing bingeom file: <{filepath}>\n{err}")
@@ -6,6 +6,7 @@ BFDS, translate FDS GEOM notation to Blender object geometry.
 
 import math
 import bpy, bmesh, logging
+import numpy as np
 from mathutils import Matrix, Vector
 from ...types import BFException
 from . import bingeom
@@ -67,15 +68,24 @@ def geom_to_mesh(
     @param fds_surfs: boundary condition indexes in FDS flat format, eg. (b0, b1, ...)
     @param fds_faces_surfs: faces connectivity and boundary condition indexes faces connectivity, eg. (i0, j0, k0, b0, i1, ...)
     """
+    # Get np.arrays, no copy if already
+    fds_verts = np.asarray(fds_verts, dtype=np.float64)
     # Transform fss to fs and ss
-    if fds_faces_surfs:
-        if fds_faces or fds_surfs:
+    if fds_faces_surfs is not None and len(fds_faces_surfs):
+        if fds_faces is not None or fds_surfs is not None:
             raise AssertionError("Set faces and surfs or faces_surfs, not both")
         else:
-            fds_faces, fds_surfs = list(), list()
-            for i in range(0, len(fds_faces_surfs), 4):
-                fds_faces.extend(fds_faces_surfs[i : i + 3])
-                fds_surfs.append(fds_faces_surfs[i + 3])
+            fds_faces_surfs = np.asarray(fds_faces_surfs, dtype=np.int32)
+            if len(fds_faces_surfs) % 4:
+                raise BFException(
+                    me, f"Bad GEOM: FACES vector length not multiple of 4"
+                )
+            fds_faces_surfs = fds_faces_surfs.reshape(-1, 4)
+            fds_faces = fds_faces_surfs[:, :3].ravel()
+            fds_surfs = fds_faces_surfs[:, 3]
+    else:
+        fds_faces = np.asarray(fds_faces, dtype=np.int32)
+        fds_surfs = np.asarray(fds_surfs, dtype=np.int32)
     # Check input length
     if len(fds_verts) % 3:
         raise BFException(me, f"Bad GEOM: VERTS vector length not multiple of 3")
@@ -85,41 +95,54 @@ def geom_to_mesh(
         raise BFException(
             me, f"Bad GEOM: FACE SURFS vector length different from FACES vector"
         )
-    if max(fds_surfs) > len(me.materials):
+    if len(fds_surfs) and fds_surfs.max() > len(me.materials):
         raise BFException(
             me,
-            f"Bad GEOM: Max FACE SURF index ({max(fds_surfs)}) > SURF_ID {len(me.materials)}",
+            f"Bad GEOM: Max FACE SURF index ({fds_surfs.max()}) > SURF_ID {len(me.materials)}",
         )
-    # Create a new bmesh,
-    bm = bmesh.new()
-    bm.from_mesh(me)  # add to current mesh
-    # Fill the bm.verts
+    n_verts, n_faces = len(fds_verts) // 3, len(fds_faces) // 3
+    if n_faces and (fds_faces.min() < 1 or fds_faces.max() > n_verts):
+        raise BFException(me, f"Bad GEOM: FACES vertex index out of VERTS range")
+    # Get current mesh geometry, the new one is appended
+    n_verts0, n_loops0, n_faces0 = len(me.vertices), len(me.loops), len(me.polygons)
+    co = np.empty(3 * n_verts0, dtype=np.float32)
+    me.vertices.foreach_get("co", co)
+    vertex_index = np.empty(n_loops0, dtype=np.int32)
+    me.loops.foreach_get("vertex_index", vertex_index)
+    loop_start = np.empty(n_faces0, dtype=np.int32)
+    me.polygons.foreach_get("loop_start", loop_start)
+    material_index = np.empty(n_faces0, dtype=np.int32)
+    me.polygons.foreach_get("material_index", material_index)
+    # Fill the mesh in bulk, no Python lists
     scale_length = context.scene.unit_settings.scale_length
-    for i in range(0, len(fds_verts), 3):
-        bm.verts.new(
-            (
-                fds_verts[i] / scale_length,
-                fds_verts[i + 1] / scale_length,
-                fds_verts[i + 2] / scale_length,
-            )
-        )
-    # Fill the bm.faces
-    bm.verts.ensure_lookup_table()
-    for i in range(0, len(fds_faces), 3):
-        bm.faces.new(
+    me.vertices.add(n_verts)
+    me.loops.add(3 * n_faces)
+    me.polygons.add(n_faces)
+    me.vertices.foreach_set(
+        "co", np.concatenate((co, fds_verts / scale_length)).astype(np.float32)
+    )
+    me.loops.foreach_set(
+        "vertex_index",
+        np.concatenate((vertex_index, fds_faces - 1 + n_verts0)),  # -1 from F90
+    )
+    me.polygons.foreach_set(
+        "loop_start",
+        np.concatenate(
             (
-                bm.verts[fds_faces[i] - 1],  # -1 from F90 to py indexes
-                bm.verts[fds_faces[i + 1] - 1],
-                bm.verts[fds_faces[i + 2] - 1],
+                loop_start,
+                np.arange(n_loops0, n_loops0 + 3 * n_faces, 3, dtype=np.int32),
             )
-        )
-    # Update mesh
-    bm.to_mesh(me)
-    bm.free()
+        ),
+    )
     # Assign materials to faces
-    for iface, face in enumerate(me.polygons):
-        material_index = fds_surfs[iface] - 1  # -1 from F90 to py indexes
-        face.material_index = material_index
+    me.polygons.foreach_set(
+        "material_index",
+        np.concatenate((material_index, np.maximum(fds_surfs - 1, 0))),  # -1 from F90
+    )
+    # Update mesh, and remove duplicate or degenerate faces (eg. i0 == j0)
+    me.update(calc_edges=True)
+    if me.validate(verbose=False):
+        log.warning(f"Bad GEOM <{me.name}>: invalid FACES removed")
     # Set the GEOM type
     match geom_type:
         case 1:
@@ -5,6 +5,7 @@ BFDS, translate Blender object geometry to FDS GEOM notation.
 """
 
 import bpy, bmesh, mathutils, logging
+import numpy as np
 from ... import utils, config
 from ...types import BFException
 from . import bingeom
@@ -56,7 +57,7 @@ def get_fds_trisurface(context, ob, check, is_open, world):
     @param check: set to check the bmesh sanity.
     @param is_open: set if bmesh should be open.
     @param world: set to return the object in world coordinates.
-    @return FDS GEOM notation.
+    @return FDS GEOM notation, as np.arrays.
     """
     # Get bmesh and check it, if requested
     bm = utils.geometry.get_object_bmesh(
@@ -64,33 +65,29 @@ def get_fds_trisurface(context, ob, check, is_open, world):
     )
     if check:
         _is_bm_sane(context, ob, bm, protect=True, is_open=is_open)
-    # Get geometric data from bmesh
-    fds_verts, fds_faces, fds_surfs = list(), list(), list()
-    fds_faces_surfs = list()
-    scale_length = context.scene.unit_settings.scale_length
-    for v in bm.verts:
-        co = v.co
-        fds_verts.extend(
-            (co.x * scale_length, co.y * scale_length, co.z * scale_length)
-        )
-    if ob.material_slots:
-        for f in bm.faces:
-            v = f.verts
-            fds_faces.extend((v[0].index + 1, v[1].index + 1, v[2].index + 1))
-            fds_surfs.append(f.material_index + 1)  # FDS index start from 1, not 0
-            fds_faces_surfs.extend(  # this is for GEOM ASCII notation
-                (v[0].index + 1, v[1].index + 1, v[2].index + 1, f.material_index + 1)
-            )
-    else:
-        for f in bm.faces:
-            v = f.verts
-            fds_faces.extend((v[0].index + 1, v[1].index + 1, v[2].index + 1))
-            fds_surfs.append(0)  # no material_slots
-            fds_faces_surfs.extend(  # this is for GEOM ASCII notation
-                (v[0].index + 1, v[1].index + 1, v[2].index + 1, 0)
-            )
-    bm.free()  # clean up bmesh
-    if not fds_verts or not fds_faces:
+    # Get geometric data from bmesh, in bulk through a tmp Mesh
+    me_tmp = bpy.data.meshes.new("tmp")
+    try:
+        bm.to_mesh(me_tmp)
+        bm.free()  # clean up bmesh
+        n_verts, n_faces = len(me_tmp.vertices), len(me_tmp.polygons)
+        scale_length = context.scene.unit_settings.scale_length
+        co = np.empty(3 * n_verts, dtype=np.float32)
+        me_tmp.vertices.foreach_get("co", co)
+        fds_verts = co.astype(np.float64) * scale_length
+        vertex_index = np.empty(3 * n_faces, dtype=np.int32)  # triangulated
+        me_tmp.loops.foreach_get("vertex_index", vertex_index)
+        fds_faces = vertex_index + 1  # FDS index start from 1, not 0
+        fds_surfs = np.zeros(n_faces, dtype=np.int32)  # no material_slots
+        if ob.material_slots:
+            me_tmp.polygons.foreach_get("material_index", fds_surfs)
+            fds_surfs += 1  # FDS index start from 1, not 0
+    finally:
+        bpy.data.meshes.remove(me_tmp)
+    fds_faces_surfs = np.column_stack(  # this is for GEOM ASCII notation
+        (fds_faces.reshape(-1, 3), fds_surfs)
+    ).ravel()
+    if not len(fds_verts) or not len(fds_faces):
         raise BFException(ob, "The object is empty")
     return fds_verts, fds_faces, fds_surfs, fds_faces_surfs
 
@@ -11,7 +11,13 @@ from .bf_object import (
     OP_COLOR_override,
     OP_TRANSPARENCY_override,
 )
-from .OP_XB import OP_XB, OP_XB_voxel_size, OP_XB_center_voxels
+from .OP_XB import (
+    OP_XB,
+    OP_XB_voxel_size,
+    OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
+)
 from .ON_MULT import OP_other_MULT_ID
 
 log = logging.getLogger(__name__)
@@ -30,6 +36,8 @@ class ON_HOLE(BFNamelistOb):
         OP_XB,
         OP_XB_voxel_size,
         OP_XB_center_voxels,
+        OP_XB_voxelizer,
+        OP_XB_voxel_merge,
         OP_other_MULT_ID,
         OP_RGB_override,
         OP_COLOR_override,
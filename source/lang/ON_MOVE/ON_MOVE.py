@@ -70,10 +70,11 @@ class ON_MOVE(BFNamelist):  # not in namelist menu
             "DY": 0.0,
             "DZ": 0.0,
         }
-        for fds_label in ps:
-            fds_param = fds_list.get_fds_param(fds_label=fds_label, remove=True)
-            if fds_param:
-                ps[fds_label] = fds_param.get_value()  # assign value
+        with fds_list.indexed():  # many labels are probed
+            for fds_label in ps:
+                fds_param = fds_list.get_fds_param(fds_label=fds_label, remove=True)
+                if fds_param:
+                    ps[fds_label] = fds_param.get_value()  # assign value
         m = calc_bl_matrix(
             t34=ps["T34"],
             dx=ps["DX"],
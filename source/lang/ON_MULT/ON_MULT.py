@@ -354,6 +354,19 @@ class OP_MULT_N_UPPER(BFParam):
     bpy_other = {"update": update_bf_mult}
 
 
+class OP_MULT_native(BFParam):
+    label = "Native MULT"
+    description = (
+        "Export a single MULT namelist, referenced by MULT_ID,\n"
+        "instead of generating all the multiples"
+    )
+    bpy_type = Object
+    bpy_idname = "bf_mult_native"
+    bpy_prop = BoolProperty
+    bpy_default = False
+    bpy_other = {"update": update_bf_mult}
+
+
 class ON_MULT(BFNamelist):  # not in namelist menu
     label = "MULT"
     description = "Multiplier"
@@ -388,6 +401,7 @@ class ON_MULT(BFNamelist):  # not in namelist menu
         OP_MULT_N_LOWER_SKIP,
         OP_MULT_N_UPPER_SKIP,
         OP_MULT_N_UPPER,
+        OP_MULT_native,  # not an FDS parameter
     )
 
     def draw(self, context, layout):  # TODO feedback if DXB used
@@ -463,22 +477,60 @@ class ON_MULT(BFNamelist):  # not in namelist menu
         col.separator()
         col.prop(ob, "bf_mult_n_upper", text="")
 
+        row = layout.row()
+        row.active = get_mult_native(context, ob) or not ob.bf_mult_native
+        row.prop(ob, "bf_mult_native")
+
+
+def get_mult_native(context, ob):
+    """!
+    Check if the multiples of ob are exported as a native FDS MULT namelist.
+    Otherwise, the multiples are generated, as FDS cannot express them:
+    no MULT_ID in the namelist, no XB, or MESH assigned to MPI processes.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @return True or False.
+    """
+    if not ob.bf_mult_export or not ob.bf_mult_native:
+        return False
+    if not BFNamelist.get_subclass(cls_name=ob.bf_namelist_cls).has_bf_param(
+        OP_other_MULT_ID
+    ):
+        return False
+    if ob.bf_namelist_cls == "ON_MESH":
+        return not context.scene.bf_config_mpi_processes_export
+    return ob.bf_xb_export
+
 
 # Called by other namelists
 # that support a MULT_ID
 # and the relative MULT namelist
 # (See also: ON_MOVE)
-# It is not exported: multiples are always generated
+# Exported only if native, otherwise multiples are generated
 
 
 class OP_other_MULT_ID(BFParam):
     label = "MULT_ID"
     description = "Reference to multiplier transformation"
-    fds_label = "MULT_ID"  # for importing only
+    fds_label = "MULT_ID"
     bpy_type = Object
 
+    def get_value(self, context):
+        return f"{self.element.name}_mult"
+
     def get_exported(self, context):
-        return False
+        return get_mult_native(context, self.element)
+
+    def to_fds_list(self, context) -> FDSList:
+        if self.get_exported(context):
+            return FDSList(
+                iterable=(
+                    super().to_fds_list(context),
+                    ON_MULT(element=self.element).to_fds_list(context),
+                )
+            )
+        else:
+            return FDSList()
 
     def set_value(self, context, value=None):
         # Get required MULT parameters from dict created by SN_MULT
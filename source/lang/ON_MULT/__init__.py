@@ -1,4 +1,4 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from .ON_MULT import ON_MULT, OP_other_MULT_ID
-from .multiply import multiply_xbs
+from .ON_MULT import ON_MULT, OP_other_MULT_ID, get_mult_native
+from .multiply import multiply_xbs, get_nmult
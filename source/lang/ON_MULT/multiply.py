@@ -2,6 +2,7 @@
 
 from ... import utils
 from ..OP_XB.xbs_to_ob import xbs_to_ob
+from .ON_MULT import get_mult_native
 
 
 def multiply_xbs(context, ob, hids, xbs, msgs):
@@ -13,6 +14,12 @@ def multiply_xbs(context, ob, hids, xbs, msgs):
         nmult = 1
         return hids, xbs, msgs, nmult
 
+    # Native FDS MULT, multiples generated by FDS
+    if get_mult_native(context, ob):
+        nmult = 1
+        msgs.append(f"Multiples: {get_nmult(ob)} by MULT ID='{ob.name}_mult'")
+        return hids, xbs, msgs, nmult
+
     # Init the rest
     dxb = ob.bf_mult_dxb
     d = (ob.bf_mult_dx, ob.bf_mult_dy, ob.bf_mult_dz)
@@ -68,6 +75,41 @@ def multiply_xbs(context, ob, hids, xbs, msgs):
     return multi_hids, multi_xbs, msgs, nmult
 
 
+def get_nmult(ob):
+    """!
+    Return the number of multiples generated by FDS MULT from ob, without building them.
+    The skip logic is the same of multiply_xb().
+    """
+    if not ob.bf_mult_export:
+        return 1
+    if any(ob.bf_mult_dxb):
+        # N, DXB
+        lower, upper = ob.bf_mult_n_lower, ob.bf_mult_n_upper
+        lower_skip, upper_skip = ob.bf_mult_n_lower_skip, ob.bf_mult_n_upper_skip
+        n = max(0, upper - lower + 1)
+        if lower_skip >= lower or upper_skip <= upper:  # has_skip
+            n -= max(0, min(upper, upper_skip) - max(lower, lower_skip) + 1)
+        return n
+    # I,J,K
+    ranges = (
+        (ob.bf_mult_i_lower, ob.bf_mult_i_upper),
+        (ob.bf_mult_j_lower, ob.bf_mult_j_upper),
+        (ob.bf_mult_k_lower, ob.bf_mult_k_upper),
+    )
+    skips = (
+        (ob.bf_mult_i_lower_skip, ob.bf_mult_i_upper_skip),
+        (ob.bf_mult_j_lower_skip, ob.bf_mult_j_upper_skip),
+        (ob.bf_mult_k_lower_skip, ob.bf_mult_k_upper_skip),
+    )
+    n, nskip, has_skip = 1, 1, False
+    for (lower, upper), (lower_skip, upper_skip) in zip(ranges, skips):
+        n *= max(0, upper - lower + 1)
+        nskip *= max(0, min(upper, upper_skip) - max(lower, lower_skip) + 1)
+        if lower_skip >= lower or upper_skip <= upper:
+            has_skip = True
+    return n - nskip if has_skip else n
+
+
 def multiply_xb(
     xb,
     hid,
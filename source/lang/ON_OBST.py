@@ -13,7 +13,13 @@ from .bf_object import (
     OP_TRANSPARENCY_override,
 )
 from .OP_SURF_ID import OP_SURF_ID
-from .OP_XB import OP_XB, OP_XB_voxel_size, OP_XB_center_voxels
+from .OP_XB import (
+    OP_XB,
+    OP_XB_voxel_size,
+    OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
+)
 from .ON_MULT import OP_other_MULT_ID
 
 log = logging.getLogger(__name__)
@@ -33,6 +39,8 @@ class ON_OBST(BFNamelistOb):
         OP_XB,
         OP_XB_voxel_size,
         OP_XB_center_voxels,
+        OP_XB_voxelizer,
+        OP_XB_voxel_merge,
         OP_ID_suffix,
         OP_other_MULT_ID,
         OP_RGB_override,
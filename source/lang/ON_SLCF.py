@@ -6,7 +6,13 @@ from bpy.props import BoolProperty
 from ..types import BFParam, BFNamelistOb, BFException
 from .bf_object import OP_namelist_cls, OP_ID, OP_FYI, OP_ID_suffix, OP_other
 from .ON_DEVC import OP_DEVC_QUANTITY
-from .OP_XB import OP_XB, OP_XB_voxel_size, OP_XB_center_voxels
+from .OP_XB import (
+    OP_XB,
+    OP_XB_voxel_size,
+    OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
+)
 from .OP_PB import OP_PB, OP_PBX, OP_PBY, OP_PBZ
 
 log = logging.getLogger(__name__)
@@ -48,6 +54,8 @@ class ON_SLCF(BFNamelistOb):
         OP_XB,
         OP_XB_voxel_size,
         OP_XB_center_voxels,
+        OP_XB_voxelizer,
+        OP_XB_voxel_merge,
         OP_PB,
         OP_PBX,
         OP_PBY,
@@ -15,7 +15,13 @@ from .bf_object import (
     OP_TRANSPARENCY_override,
 )
 from .OP_SURF_ID import OP_SURF_ID
-from .OP_XB import OP_XB, OP_XB_voxel_size, OP_XB_center_voxels
+from .OP_XB import (
+    OP_XB,
+    OP_XB_voxel_size,
+    OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
+)
 from .OP_XYZ import OP_XYZ
 from .OP_PB import OP_PB, OP_PBX, OP_PBY, OP_PBZ
 from .ON_MULT import OP_other_MULT_ID
@@ -53,6 +59,8 @@ class ON_other(BFNamelistOb):
         OP_XB,
         OP_XB_voxel_size,
         OP_XB_center_voxels,
+        OP_XB_voxelizer,
+        OP_XB_voxel_merge,
         OP_XYZ,
         OP_PB,
         OP_PBX,
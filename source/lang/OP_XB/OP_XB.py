@@ -63,6 +63,68 @@ class OP_XB_center_voxels(BFParam):
         return ob.bf_xb_export and ob.bf_xb in ("VOXELS", "PIXELS")
 
 
+class OP_XB_voxelizer(BFParam):
+    label = "Voxelizer"
+    description = "Voxelization algorithm for the current Object"
+    bpy_type = Object
+    bpy_idname = "bf_xb_voxelizer"
+    bpy_prop = EnumProperty
+    bpy_default = "REMESH"
+    bpy_other = {
+        "update": update_bf_xb,
+        "items": (
+            (
+                "REMESH",
+                "Remesh",
+                "Voxelize by the Blender Remesh modifier, limited Object size",
+                100,
+            ),
+            (
+                "RASTER",
+                "Raster",
+                "Voxelize by ray parity on the evaluated triangles, closed mesh needed",
+                200,
+            ),
+        ),
+    }
+
+    def get_active(self, context):
+        ob = self.element
+        return ob.bf_xb_export and ob.bf_xb == "VOXELS"
+
+
+class OP_XB_voxel_merge(BFParam):
+    label = "Voxel Merging"
+    description = "Merging algorithm of the voxels into boxes for the current Object"
+    bpy_type = Object
+    bpy_idname = "bf_xb_voxel_merge"
+    bpy_prop = EnumProperty
+    bpy_default = "GROW"
+    bpy_other = {
+        "update": update_bf_xb,
+        "items": (
+            (
+                "GROW",
+                "Grow",
+                "Merge neighbour boxes with the same cross-section, fast",
+                100,
+            ),
+            (
+                "GREEDY",
+                "Greedy",
+                "Decompose voxels into boxes, trying all axis orders, slower. "
+                "Never more boxes than Grow "
+                "(not applied to large Raster voxel grids, split in tiles)",
+                200,
+            ),
+        ),
+    }
+
+    def get_active(self, context):
+        ob = self.element
+        return ob.bf_xb_export and ob.bf_xb == "VOXELS"
+
+
 class OP_XB(BFParam):
     label = "XB"
     description = "Export as volumes/faces/edges"
@@ -4,7 +4,9 @@ from .OP_XB import (
     OP_XB,
     OP_XB_voxel_size,
     OP_XB_center_voxels,
+    OP_XB_voxelizer,
+    OP_XB_voxel_merge,
     OP_XB_BBOX,
 )
-from .ob_to_xbs import ob_to_xbs
+from .ob_to_xbs import ob_to_xbs, calc_xbs_caches, get_max_workers
 from .xbs_to_ob import xbs_to_ob
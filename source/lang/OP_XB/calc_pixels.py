@@ -7,7 +7,7 @@ BFDS, pixelization algorithms.
 import bpy, logging
 from ...types import BFException
 from ... import utils
-from .calc_voxels import _get_voxel_size, get_voxels
+from .calc_voxels import _get_voxel_size, get_voxel_faces, calc_voxel_xbs
 
 log = logging.getLogger(__name__)
 
@@ -19,6 +19,27 @@ def get_pixels(context, ob):
     @param ob: the Blender object.
     @return the xbs and the voxel size.
     """
+    faces, voxel_size, flat_axis, flat_origin = get_pixel_faces(context, ob)
+    scale_length = context.scene.unit_settings.scale_length
+    xbs = calc_pixel_xbs(
+        faces,
+        voxel_size=voxel_size,
+        scale_length=scale_length,
+        flat_axis=flat_axis,
+        flat_origin=flat_origin,
+    )
+    if not xbs:
+        raise BFException(ob, "No pixel created: No voxel created")
+    return xbs, voxel_size * scale_length
+
+
+def get_pixel_faces(context, ob):
+    """!
+    Get the faces of the solidified and remeshed flat object, for calc_pixel_xbs().
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @return the face arrays, the voxel size, the flat axis and the flat origin.
+    """
     log.debug(f"Get pixels in Object <{ob.name}>...")
     # Check object and init
     if ob.type not in {"MESH", "CURVE", "SURFACE", "FONT", "META"}:
@@ -53,17 +74,32 @@ def get_pixels(context, ob):
     )
     # Add solidify modifier
     _add_solidify_mod(context, ob_copy, voxel_size)
-    # Voxelize (already corrected for unit_settings)
+    # Get the faces to be voxelized
     try:
-        xbs, voxel_size = get_voxels(context=context, ob=ob_copy)
+        faces, voxel_size = get_voxel_faces(context=context, ob=ob_copy)
     except BFException as err:
         raise BFException(ob, f"No pixel created: {err}")
     finally:
         bpy.data.meshes.remove(ob_copy.data, do_unlink=True)  # clean up
+    return faces, voxel_size, flat_axis, flat_origin
+
+
+def calc_pixel_xbs(faces, voxel_size, scale_length, flat_axis, flat_origin):
+    """!
+    Calc pixels in xbs format from the faces of the solidified flat object.
+    No Blender data is used, so it can run in a worker process.
+    @param faces: the face arrays, from get_pixel_faces().
+    @param voxel_size: the voxel size of the object.
+    @param scale_length: the Scene unit scale.
+    @param flat_axis: the object flat axis.
+    @param flat_origin: local origin of flat object.
+    @return the pixels in xbs format.
+    """
+    # Voxelize (already corrected for unit_settings)
+    xbs = calc_voxel_xbs(faces, voxel_size=voxel_size, scale_length=scale_length)
     # Flatten the solidified object xbs
     choice = (_x_flatten_xbs, _y_flatten_xbs, _z_flatten_xbs)[flat_axis]
-    xbs = choice(xbs, flat_origin)
-    return xbs, voxel_size
+    return choice(xbs, flat_origin)
 
 
 def _add_solidify_mod(context, ob, voxel_size):
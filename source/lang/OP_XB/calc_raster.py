@@ -0,0 +1,356 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, raster voxelization algorithms, without the Remesh modifier.
+"""
+
+import logging, multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from ...types import BFException
+from ...config import RASTER_CHUNK_SIZE, RASTER_TILE_SIZE
+from .calc_voxels import (
+    _get_voxel_size,
+    _get_voxel_grid,
+    _grow_boxes_along_x,
+    _grow_boxes_along_y,
+    _grow_boxes_along_z,
+    _get_box_xbs,
+    _get_runs,
+    _get_greedy_boxes,
+)
+
+log = logging.getLogger(__name__)
+
+# The evaluated triangles of the Object are rasterized on the voxel grid,
+# by casting a ray along +z from the center of each voxel column:
+# each crossed triangle toggles the occupancy of the voxels above it,
+# so that voxels with their centers inside the solid are filled (ray parity).
+# The voxel grid is the same as the Remesh modifier one (see _get_voxel_grid()),
+# aligned to world origin or to the Object center.
+# Large grids are split in tiles, rasterized by worker processes,
+# so that the memory of each tile is bounded by its size (see _get_tiled_boxes()).
+
+
+def get_voxel_tris(context, ob):
+    """!
+    Get the evaluated triangles of the object, for calc_raster_xbs().
+    No temporary datablock is created.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @return the triangle arrays and the voxel size.
+    """
+    log.debug(f"Get raster voxels in Object <{ob.name}>...")
+    # Check object and init
+    if ob.type not in {"MESH", "CURVE", "SURFACE", "FONT", "META"}:
+        raise BFException(ob, "Object can not be converted to a mesh.")
+    if not ob.data.vertices:
+        raise BFException(ob, "Empty object, no available geometry")
+    voxel_size = _get_voxel_size(context, ob)
+    # Get the evaluated Mesh (eg. modifiers applied), owned by ob_eval
+    dg = context.evaluated_depsgraph_get()
+    ob_eval = ob.evaluated_get(dg)
+    me = ob_eval.to_mesh()
+    try:
+        co = np.empty(3 * len(me.vertices), dtype=np.float32)
+        me.vertices.foreach_get("co", co)
+        tris = np.empty(3 * len(me.loop_triangles), dtype=np.int32)
+        me.loop_triangles.foreach_get("vertices", tris)
+    finally:
+        ob_eval.to_mesh_clear()  # no mem leaks
+    if not len(tris):
+        raise BFException(ob, "No voxel created")
+    # Set in world coordinates
+    m = np.array(ob.matrix_world, dtype=np.float64)
+    co = co.astype(np.float64).reshape(-1, 3) @ m[:3, :3].T + m[:3, 3]
+    # Get the voxel grid, aligned to world origin or to ob center
+    xb = (
+        *(co[:, 0].min(), co[:, 0].max()),
+        *(co[:, 1].min(), co[:, 1].max()),
+        *(co[:, 2].min(), co[:, 2].max()),
+    )
+    pv0, pv1, origin = _get_voxel_grid(xb, voxel_size, ob.bf_xb_center_voxels)
+    corner = tuple(pv0[i] * voxel_size + origin[i] for i in range(3))
+    shape = tuple(pv1[i] - pv0[i] for i in range(3))
+    return (co, tris.reshape(-1, 3), corner, shape), voxel_size
+
+
+def calc_raster_xbs(
+    tris, voxel_size, scale_length, merge="GROW", max_workers=1, tile_size=None
+):
+    """!
+    Calc voxels in xbs format from the triangles of the object.
+    No Blender data is used, so it can run in a worker process.
+    @param tris: the triangle arrays, from get_voxel_tris().
+    @param voxel_size: the voxel size of the object.
+    @param scale_length: the Scene unit scale.
+    @param merge: the voxel merging algorithm, in (GROW, GREEDY).
+    @param max_workers: number of worker processes for the tiles, 1 to run serially.
+    @param tile_size: max number of voxels of a tile side, None for the default.
+    @return the voxels in xbs format.
+    """
+    co, tris, corner, shape = tris
+    co = (co - corner) / voxel_size  # in voxel grid coordinates
+    tile_size = tile_size or RASTER_TILE_SIZE
+    if not is_tiled(shape, tile_size):
+        occupancy = get_occupancy(co, tris, shape)
+        boxes = get_occupancy_boxes(occupancy, merge=merge)
+    else:
+        # The greedy boxes of the tiles cannot be merged across the seams,
+        # so merge is ignored, see is_tiled()
+        boxes = _get_tiled_boxes(co, tris, shape, max_workers, tile_size)
+    if not boxes:
+        return list()
+    return list(_get_box_xbs(boxes, corner, voxel_size, scale_length))
+
+
+def is_tiled(shape, tile_size=None):
+    """!
+    Check if the voxel grid is split in tiles, where the merge algorithm is ignored.
+    @param shape: the voxel grid shape (nx, ny, nz).
+    @param tile_size: max number of voxels of a tile side, None for the default.
+    @return True if tiled.
+    """
+    tile_size = tile_size or RASTER_TILE_SIZE
+    return shape[0] > tile_size or shape[1] > tile_size
+
+
+# Large voxel grids are split in xy tiles, with the full z extent
+# of the grid, as the rays are cast along z.
+# Each tile collects the runs of filled voxels along z, and merges them along y,
+# so that the boxes split by the y seams can be merged exactly.
+# Then all boxes are merged along x, across the x seams.
+
+
+def _get_tiled_boxes(co, tris, shape, max_workers, tile_size):
+    """!
+    Get the merged boxes of the triangles, by rasterizing them in tiles.
+    @param co: the vertex coordinates, in voxel grid coordinates.
+    @param tris: the triangle vertex indexes.
+    @param shape: the voxel grid shape (nx, ny, nz).
+    @param max_workers: number of worker processes, 1 to run serially.
+    @param tile_size: max number of voxels of a tile side.
+    @return the boxes in integer coordinates: [[ix0, ix1, iy0, iy1, iz0, iz1], ...].
+    """
+    tiles = _get_tiles(co, tris, shape, tile_size)
+    if max_workers > 1 and multiprocessing.parent_process() is None:
+        log.debug("Rasterize tiles in parallel...")
+        # Fork, as the workers cannot import bpy, no nested workers
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+        )
+        with executor:
+            futures = [executor.submit(_calc_tile_boxes, *t) for t in tiles]
+            boxes = list(box for f in futures for box in f.result())
+    else:
+        boxes = list(box for t in tiles for box in _calc_tile_boxes(*t))
+    # Merge across the y seams, then along x
+    boxes = _merge_boxes_along(boxes, axis=1)
+    return _merge_boxes_along(boxes, axis=0)
+
+
+def _get_tiles(co, tris, shape, tile_size):
+    """!
+    Split the voxel grid in xy tiles, and get their triangles.
+    @param co: the vertex coordinates, in voxel grid coordinates.
+    @param tris: the triangle vertex indexes.
+    @param shape: the voxel grid shape (nx, ny, nz).
+    @param tile_size: max number of voxels of a tile side.
+    @return generator of the tile vertex coordinates and triangles,
+    in tile coordinates, tile offset and shape.
+    """
+    a, b, c = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+    lo, hi = np.minimum(np.minimum(a, b), c), np.maximum(np.maximum(a, b), c)
+    del a, b, c
+    for ix in range(0, shape[0], tile_size):
+        for iy in range(0, shape[1], tile_size):
+            offset = ix, iy, 0
+            tile_shape = (
+                min(tile_size, shape[0] - ix),
+                min(tile_size, shape[1] - iy),
+                shape[2],
+            )
+            selected = (
+                (lo[:, 0] < ix + tile_shape[0])
+                & (hi[:, 0] > ix)
+                & (lo[:, 1] < iy + tile_shape[1])
+                & (hi[:, 1] > iy)
+            )
+            if not selected.any():
+                continue  # empty tile
+            vs, tile_tris = np.unique(tris[selected], return_inverse=True)
+            tile_co = co[vs] - offset
+            yield tile_co, tile_tris.reshape(-1, 3), offset, tile_shape
+
+
+def _calc_tile_boxes(co, tris, offset, shape):
+    """!
+    Calc the boxes of a tile, merged along y.
+    No Blender data is used, so it can run in a worker process.
+    @param co: the vertex coordinates, in tile coordinates.
+    @param tris: the triangle vertex indexes.
+    @param offset: the tile offset in the voxel grid.
+    @param shape: the tile shape.
+    @return the boxes in voxel grid integer coordinates.
+    """
+    occupancy = get_occupancy(co, tris, shape)
+    boxes = list(
+        list(int(box[i]) + offset[i // 2] for i in range(6))
+        for box in _get_runs(occupancy, axis=2)
+    )
+    return _merge_boxes_along(boxes, axis=1)
+
+
+def _merge_boxes_along(boxes, axis):
+    """!
+    Merge the neighbour boxes with the same cross-section along an axis.
+    @param boxes: the boxes in integer coordinates.
+    @param axis: the merging axis.
+    @return the merged boxes.
+    """
+    others = tuple(i for i in range(6) if i // 2 != axis)
+    boxes.sort(key=lambda box: (tuple(box[i] for i in others), box[2 * axis]))
+    merged = list()
+    for box in boxes:
+        last = merged and merged[-1]
+        if (
+            last
+            and all(last[i] == box[i] for i in others)
+            and last[2 * axis + 1] == box[2 * axis]
+        ):
+            last[2 * axis + 1] = box[2 * axis + 1]  # grow last box along axis
+        else:
+            merged.append(box)
+    return merged
+
+
+def get_occupancy(co, tris, shape):
+    """!
+    Get the voxel occupancy of a closed triangle mesh, by ray parity along z.
+    @param co: the vertex coordinates, in voxel grid coordinates.
+    @param tris: the triangle vertex indexes.
+    @param shape: the voxel grid shape (nx, ny, nz).
+    @return the occupancy, a boolean np.array of the grid shape.
+    """
+    nx, ny, nz = shape
+    # Toggles of the voxels above each crossing, one more voxel for the top ones
+    toggles = np.zeros((nx, ny, nz + 1), dtype=np.uint8)
+    a, b, c = co[tris[:, 0]], co[tris[:, 1]], co[tris[:, 2]]
+    # Orient triangles counterclockwise in xy, vertical ones are never crossed
+    ab, ac = b - a, c - a
+    area = ab[:, 0] * ac[:, 1] - ab[:, 1] * ac[:, 0]
+    cw = area < 0.0
+    b[cw], c[cw] = c[cw], b[cw].copy()
+    keep = area != 0.0
+    a, b, c = a[keep], b[keep], c[keep]
+    # Voxel columns with their centers (i + .5, j + .5) in each triangle bbox
+    lo, hi = np.minimum(np.minimum(a, b), c), np.maximum(np.maximum(a, b), c)
+    i0 = np.maximum(np.ceil(lo[:, 0] - 0.5), 0).astype(np.int64)
+    i1 = np.minimum(np.floor(hi[:, 0] - 0.5), nx - 1).astype(np.int64)
+    j0 = np.maximum(np.ceil(lo[:, 1] - 0.5), 0).astype(np.int64)
+    j1 = np.minimum(np.floor(hi[:, 1] - 0.5), ny - 1).astype(np.int64)
+    ni, nj = np.maximum(i1 - i0 + 1, 0), np.maximum(j1 - j0 + 1, 0)
+    counts = ni * nj
+    # Rasterize chunks of (triangle, column) pairs, to bound memory
+    ends = np.cumsum(counts)
+    t0 = 0
+    while t0 < len(counts):
+        start = ends[t0] - counts[t0]
+        t1 = max(t0 + 1, np.searchsorted(ends, start + RASTER_CHUNK_SIZE, "right"))
+        ts = np.arange(t0, t1)
+        t = np.repeat(ts, counts[t0:t1])
+        offset = np.arange(len(t)) - np.repeat(
+            ends[t0:t1] - counts[t0:t1] - start, counts[t0:t1]
+        )
+        i = i0[t] + offset // nj[t]
+        j = j0[t] + offset % nj[t]
+        k = _get_crossings(a[t], b[t], c[t], i + 0.5, j + 0.5, nz)
+        if k is not None:
+            cross = k >= 0
+            flat = np.ravel_multi_index((i[cross], j[cross], k[cross]), toggles.shape)
+            flat, n = np.unique(flat, return_counts=True)
+            toggles.ravel()[flat[n % 2 == 1]] ^= 1
+        t0 = t1
+    # Accumulate the toggles along z
+    return np.bitwise_xor.accumulate(toggles, axis=2)[:, :, :nz].astype(bool)
+
+
+def _get_crossings(a, b, c, x, y, nz):
+    """!
+    Get the first voxel above the crossings of vertical rays with triangles.
+    The top-left fill rule is used, so that a ray crossing a shared edge
+    or vertex of a closed mesh is counted once.
+    @param a, b, c: the counterclockwise triangle vertices, one per ray.
+    @param x, y: the ray coordinates.
+    @param nz: the number of voxels along z.
+    @return the voxel indexes along z, or -1 if not crossed.
+    """
+    if not len(x):
+        return None
+    w = list()
+    inside = np.ones(len(x), dtype=bool)
+    for p, q in ((b, c), (c, a), (a, b)):  # edges, opposite to a, b, c
+        e = _get_edge_function(p, q, x, y)
+        dx, dy = q[:, 0] - p[:, 0], q[:, 1] - p[:, 1]
+        top_left = (dy < 0.0) | ((dy == 0.0) & (dx < 0.0))
+        inside &= (e > 0.0) | ((e == 0.0) & top_left)
+        w.append(e)
+    # Interpolate z of the crossing by barycentric coordinates
+    wa, wb, wc = w
+    ws = wa + wb + wc
+    ws[ws == 0.0] = 1.0  # never inside
+    z = (wa * a[:, 2] + wb * b[:, 2] + wc * c[:, 2]) / ws
+    k = np.clip(np.ceil(z - 0.5), 0, nz).astype(np.int64)
+    k[~inside] = -1
+    return k
+
+
+def _get_edge_function(p, q, x, y):
+    """!
+    Get the edge function of points wrt the edges, positive on the left side.
+    It is calculated from the lower edge vertex, so that the two opposite
+    half-edges shared by neighbour triangles get exactly opposite values.
+    @param p, q: the edge vertices.
+    @param x, y: the point coordinates.
+    @return the edge function values.
+    """
+    swap = (p[:, 0] > q[:, 0]) | ((p[:, 0] == q[:, 0]) & (p[:, 1] > q[:, 1]))
+    p0 = np.where(swap[:, None], q, p)
+    p1 = np.where(swap[:, None], p, q)
+    e = (p1[:, 0] - p0[:, 0]) * (y - p0[:, 1]) - (p1[:, 1] - p0[:, 1]) * (x - p0[:, 0])
+    return np.where(swap, -e, e)
+
+
+# The occupancy is transformed into boxes, by collecting the runs of filled voxels
+# along the axis with less runs. Then the boxes are grown along the other axis,
+# as done for the Remesh modifier faces (see calc_voxels.py),
+# or by the greedy box decomposition, if it gives less boxes.
+
+
+def get_occupancy_boxes(occupancy, merge="GROW"):
+    """!
+    Get the merged boxes from the voxel occupancy.
+    @param occupancy: the occupancy, a boolean np.array.
+    @param merge: the voxel merging algorithm, in (GROW, GREEDY).
+    @return the boxes in integer coordinates: [[ix0, ix1, iy0, iy1, iz0, iz1], ...].
+    """
+    if not occupancy.any():
+        return list()
+    if merge == "GREEDY":
+        # Never more boxes than growing
+        boxes = get_occupancy_boxes(occupancy, merge="GROW")
+        greedy_boxes = _get_greedy_boxes(occupancy)
+        return greedy_boxes if len(greedy_boxes) <= len(boxes) else boxes
+    # Choose the axis with less runs, and the growing axis
+    runs = list(
+        (_get_runs(occupancy, axis), axis, grow_boxes_along_axis)
+        for axis, grow_boxes_along_axis in enumerate(
+            (_grow_boxes_along_x, _grow_boxes_along_y, _grow_boxes_along_z)
+        )
+    )
+    runs.sort(key=lambda run: len(run[0]))
+    (boxes, _, _), (_, axis1, grow1), (_, axis2, grow2) = runs
+    # Join boxes along other axis
+    boxes = grow1(boxes.tolist(), 2 * axis2)
+    boxes = grow2(boxes, 2 * axis1)
+    return boxes
@@ -4,7 +4,8 @@
 BFDS, voxelization algorithms.
 """
 
-import bpy, bmesh, logging
+import bpy, bmesh, logging, itertools
+import numpy as np
 from math import floor, ceil
 from ...types import BFException
 from ... import utils, config
@@ -16,12 +17,12 @@ log = logging.getLogger(__name__)
 # one and only origin of axes)
 
 
-def get_voxels(context, ob):
+def get_voxel_faces(context, ob):
     """!
-    Get voxels from object in xbs format.
+    Get the faces of the remeshed object, for calc_voxel_xbs().
     @param context: the Blender context.
     @param ob: the Blender object.
-    @return the voxels in xbs format.
+    @return the face arrays and the voxel size.
     """
     log.debug(f"Get voxels in Object <{ob.name}>...")
     # Check object and init
@@ -47,57 +48,71 @@ def get_voxels(context, ob):
     bpy.data.meshes.remove(ob_tmp.data, do_unlink=True)  # no mem leaks
     # Check
     if len(bm.faces) == 0:  # no faces
+        bm.free()
         raise BFException(ob, "No voxel created")
+    # Get faces as plain arrays
+    co, loop_totals, vertex_index, normals, _ = utils.geometry.get_bmesh_arrays(bm)
+    return (co, loop_totals, vertex_index, normals), voxel_size
+
+
+def calc_voxel_xbs(faces, voxel_size, scale_length, merge="GROW"):
+    """!
+    Calc voxels in xbs format from the faces of the remeshed object.
+    No Blender data is used, so it can run in a worker process.
+    @param faces: the face arrays, from get_voxel_faces().
+    @param voxel_size: the voxel size of the object.
+    @param scale_length: the Scene unit scale.
+    @param merge: the voxel merging algorithm, in (GROW, GREEDY).
+    @return the voxels in xbs format.
+    """
+    co, loop_totals, vertex_index, normals = faces
+    centers = utils.geometry.get_face_centers(co, loop_totals, vertex_index)
     # Get faces and sort them according to normals
-    x_faces, y_faces, z_faces = _sort_faces_by_normal(bm)
-    # Choose shorter list of faces, relative functions, and parameters
+    axis_faces = _sort_faces_by_normal(centers, normals)
+    # Choose shorter array of faces, and the growing directions
     choices = [
-        (len(x_faces), _get_boxes_along_x, x_faces, _grow_boxes_along_x, 0),
-        (len(y_faces), _get_boxes_along_y, y_faces, _grow_boxes_along_y, 2),
-        (len(z_faces), _get_boxes_along_z, z_faces, _grow_boxes_along_z, 4),
+        (len(axis_faces[0]), 0, _grow_boxes_along_x),
+        (len(axis_faces[1]), 1, _grow_boxes_along_y),
+        (len(axis_faces[2]), 2, _grow_boxes_along_z),
     ]
     choices.sort(key=lambda choice: choice[0])
-    get_boxes = choices[0][1]  # get boxes by fastest orientation
-    faces = choices[0][2]
-    grow_boxes_along_first_axis = choices[1][3]  # 1st axis growing direction
-    first_sort_by = choices[2][4]
-    grow_boxes_along_second_axis = choices[2][3]  # 2nd axis growing direction
-    second_sort_by = choices[1][4]
+    axis = choices[0][1]  # get boxes by fastest orientation
+    grow_boxes_along_first_axis = choices[1][2]  # 1st axis growing direction
+    first_sort_by = 2 * choices[2][1]
+    grow_boxes_along_second_axis = choices[2][2]  # 2nd axis growing direction
+    second_sort_by = 2 * choices[1][1]
     # For each face find other sides and build boxes data structure
-    boxes, origin = get_boxes(faces, voxel_size)
-    # Join boxes along other axis and return their world coordinates
+    boxes, origin = _get_boxes_along(axis_faces[axis], axis, voxel_size)
+    if merge == "GREEDY":
+        # Decompose the filled voxels in boxes, before growing them
+        occupancy, offset = _get_boxes_occupancy(boxes)
+        greedy_boxes = _get_greedy_boxes(occupancy, offset)
+    # Join boxes along other axis
     boxes = grow_boxes_along_first_axis(boxes, first_sort_by)
     boxes = grow_boxes_along_second_axis(boxes, second_sort_by)
+    if merge == "GREEDY" and len(greedy_boxes) <= len(boxes):
+        boxes = greedy_boxes  # never more boxes than growing
     # Transform boxes to xbs in world coordinates and correct for unit_settings
-    xbs = list(_get_box_xbs(context, boxes, origin, voxel_size))
-    # Clean up
-    bm.free()
-    if not xbs:
-        raise BFException(ob, "No voxel created")
-    scale_length = context.scene.unit_settings.scale_length
-    return xbs, voxel_size * scale_length
+    return list(_get_box_xbs(boxes, origin, voxel_size, scale_length))
 
 
-def _sort_faces_by_normal(bm):
+def _sort_faces_by_normal(centers, normals):
     """!
-    Sort bmesh faces according to normal.
-    @param bm: the bmesh to handle.
-    @return the x, y and z faces lists.
+    Sort face centers according to face normals.
+    @param centers: the face centers np.array.
+    @param normals: the face normals np.array.
+    @return the x, y and z face center np.arrays.
     """
-    x_faces, y_faces, z_faces = list(), list(), list()
-    for face in bm.faces:
-        normal = face.normal
-        if abs(normal[0]) > 0.9:
-            x_faces.append(face)  # face is normal to x axis
-        elif abs(normal[1]) > 0.9:
-            y_faces.append(face)  # ... to y axis
-        elif abs(normal[2]) > 0.9:
-            z_faces.append(face)  # ... to z axis
-        else:
-            raise ValueError("Abnormal face")
-    if len(x_faces) < 2 or len(y_faces) < 2 or len(z_faces) < 2:
+    normals = np.abs(normals)
+    x = normals[:, 0] > 0.9  # face is normal to x axis
+    y = ~x & (normals[:, 1] > 0.9)  # ... to y axis
+    z = ~x & ~y & (normals[:, 2] > 0.9)  # ... to z axis
+    if not (x | y | z).all():
+        raise ValueError("Abnormal face")
+    axis_faces = centers[x], centers[y], centers[z]
+    if min(len(faces) for faces in axis_faces) < 2:
         raise ValueError("Not enough faces")
-    return x_faces, y_faces, z_faces
+    return axis_faces
 
 
 # When appling a remesh modifier to a Blender Object in BLOCKS mode,
@@ -169,14 +184,14 @@ def _get_voxel_size(context, ob):
 # temporary object, we can align the voxelization to FDS world origin
 
 
-def _align_remesh_bbox(context, ob, voxel_size, centered=False):
+def _get_voxel_grid(xb, voxel_size, centered=False):
     """!
-    Modify object mesh for remesh voxel safe alignment to world origin or to ob center by inserting 8 vertices.
-    @param context: the Blender context.
-    @param ob: the Blender object.
+    Get the voxel grid aligned to world origin or to the bounding box center.
+    @param xb: the bounding box in world coordinates, in Blender units.
     @param voxel_size: the voxel size of the object.
+    @param centered: if True, align the voxels to the bounding box center.
+    @return the integer grid limits pv0, pv1, with an odd number of voxels, and the grid origin.
     """
-    xb = utils.geometry.get_bbox_xb(context, ob, blender_units=True, world=True)
     # Calc new xbox (in Blender units)
     #           +----+ xb1, pv1
     #           |    |
@@ -208,6 +223,18 @@ def _align_remesh_bbox(context, ob, voxel_size, centered=False):
         pv0[1] + (pv1[1] - pv0[1]) // 2 * 2 + 1,
         pv0[2] + (pv1[2] - pv0[2]) // 2 * 2 + 1,
     )
+    return pv0, pv1, origin
+
+
+def _align_remesh_bbox(context, ob, voxel_size, centered=False):
+    """!
+    Modify object mesh for remesh voxel safe alignment to world origin or to ob center by inserting 8 vertices.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param voxel_size: the voxel size of the object.
+    """
+    xb = utils.geometry.get_bbox_xb(context, ob, blender_units=True, world=True)
+    pv0, pv1, origin = _get_voxel_grid(xb, voxel_size, centered=centered)
     # Calc new bounding box
     xb = (
         pv0[0] * voxel_size + origin[0],
@@ -270,125 +297,40 @@ def _insert_verts_into_mesh(me, verts):
 #    0   1 A 2   3 x
 
 
-def _get_face_center(face):
-    """!
-    Get bmesh face center point.
-    @param face: the modifier face.
-    @param verts: the center coordinates.
-    """
-    xs, ys, zs = zip(*(v.co for v in face.verts))
-    return sum(xs) / len(xs), sum(ys) / len(ys), sum(zs) / len(zs)
-
-
-def _get_boxes_along_x(faces, voxel_size):
-    """!
-    Get minimal boxes from faces by raytracing along x axis.
-    @param faces: the modifier faces.
-    @param voxel_size: the voxel size of the object.
-    @return the minimal boxes and their origins.
-    """
-    # First face center becomes origin of the integer grid for faces
-    f_origin = _get_face_center(faces[0])
-    hvs = voxel_size / 2.0  # half voxel size
-    origin = (f_origin[0], f_origin[1] - hvs, f_origin[2] - hvs)
-    # Get integer coordinates of faces and
-    # classify faces in integer piles along z
-    # piles = {(3,4):(3,4,15,25,), (3,5):(3,4,15,25), ...}
-    piles = dict()
-    for face in faces:
-        center = _get_face_center(face)
-        ix, iy, iz = (
-            round((center[0] - f_origin[0]) / voxel_size),
-            round((center[1] - f_origin[1]) / voxel_size),
-            round((center[2] - f_origin[2]) / voxel_size),
-        )
-        try:
-            piles[(iy, iz)].append(ix)
-        except KeyError:
-            piles[(iy, iz)] = [ix]
-    # Create boxes by raytracing piles along axis
-    # boxes = [[ix0, ix1, iy0, iy1, iz0, iz1], ...]
-    boxes = list()
-    for (iy, iz), ixs in piles.items():
-        ixs.sort()  # sort in +x direction
-        while ixs:
-            ix1, ix0 = ixs.pop(), ixs.pop()  # pop solid volumes from top to bottom
-            boxes.append([ix0, ix1, iy, iy + 1, iz, iz + 1])
-    return boxes, origin
-
-
-def _get_boxes_along_y(faces, voxel_size):
+def _get_boxes_along(faces, axis, voxel_size):
     """!
-    Get minimal boxes from faces by raytracing along y axis.
-    @param faces: the modifier faces.
+    Get minimal boxes from faces by raytracing along an axis.
+    @param faces: the modifier face centers np.array, normal to axis.
+    @param axis: the raytracing axis.
     @param voxel_size: the voxel size of the object.
     @return the minimal boxes and their origins.
     """
     # First face center becomes origin of the integer grid for faces
-    f_origin = _get_face_center(faces[0])
+    f_origin = faces[0]
     hvs = voxel_size / 2.0  # half voxel size
-    origin = (f_origin[0] - hvs, f_origin[1], f_origin[2] - hvs)
+    origin = f_origin - hvs
+    origin[axis] = f_origin[axis]
     # Get integer coordinates of faces and
-    # classify faces in integer piles along z
-    # piles = {(3,4):(3,4,15,25,), (3,5):(3,4,15,25), ...}
-    piles = dict()
-    for face in faces:
-        center = _get_face_center(face)
-        ix, iy, iz = (
-            round((center[0] - f_origin[0]) / voxel_size),
-            round((center[1] - f_origin[1]) / voxel_size),
-            round((center[2] - f_origin[2]) / voxel_size),
-        )
-        try:
-            piles[(iz, ix)].append(iy)
-        except KeyError:
-            piles[(iz, ix)] = [iy]
-    # Create boxes by raytracing piles along axis
-    # boxes = [[ix0, ix1, iy0, iy1, iz0, iz1], ...]
-    boxes = list()
-    for (iz, ix), iys in piles.items():
-        iys.sort()  # sort in +y direction
-        while iys:
-            iy1, iy0 = iys.pop(), iys.pop()  # pop solid volumes from top to bottom
-            boxes.append([ix, ix + 1, iy0, iy1, iz, iz + 1])
-    return boxes, origin
-
-
-def _get_boxes_along_z(faces, voxel_size):
-    """!
-    Get minimal boxes from faces by raytracing along z axis.
-    @param faces: the modifier faces.
-    @param voxel_size: the voxel size of the object.
-    @return the minimal boxes and their origins.
-    """
-    # First face center becomes origin of the integer grid for faces
-    f_origin = _get_face_center(faces[0])
-    hvs = voxel_size / 2.0  # half voxel size
-    origin = (f_origin[0] - hvs, f_origin[1] - hvs, f_origin[2])
-    # Get integer coordinates of faces and
-    # classify faces in integer piles along z
-    # piles = {(3,4):(3,4,15,25,), (3,5):(3,4,15,25), ...}
-    piles = dict()
-    for face in faces:
-        center = _get_face_center(face)
-        ix, iy, iz = (
-            round((center[0] - f_origin[0]) / voxel_size),
-            round((center[1] - f_origin[1]) / voxel_size),
-            round((center[2] - f_origin[2]) / voxel_size),
-        )
-        try:
-            piles[(ix, iy)].append(iz)
-        except KeyError:
-            piles[(ix, iy)] = [iz]
-    # Create boxes by raytracing piles along axis
+    # sort them in piles along axis, eg. along z: by (ix, iy), then -iz
+    # The piles are in first seen order and the boxes are from top to bottom,
+    # as the order of the boxes drives their growing
+    ijks = np.rint((faces - f_origin) / voxel_size).astype(np.int64)
+    p, q = (i for i in range(3) if i != axis)  # pile coordinates
+    _, first, inverse = np.unique(
+        ijks[:, (p, q)], axis=0, return_index=True, return_inverse=True
+    )
+    ijks = ijks[np.lexsort((-ijks[:, axis], first[inverse.ravel()]))]
+    # Create boxes by raytracing piles along axis,
+    # each pair of sorted faces in the same pile is a solid volume
+    ijks1, ijks0 = ijks[0::2], ijks[1::2]
+    if len(ijks0) != len(ijks1) or (ijks0[:, (p, q)] != ijks1[:, (p, q)]).any():
+        raise ValueError("Non manifold voxels")
     # boxes = [[ix0, ix1, iy0, iy1, iz0, iz1], ...]
-    boxes = list()
-    for (ix, iy), izs in piles.items():
-        izs.sort()  # sort in +z direction
-        while izs:
-            iz1, iz0 = izs.pop(), izs.pop()  # pop solid volumes from top to bottom
-            boxes.append([ix, ix + 1, iy, iy + 1, iz0, iz1])
-    return boxes, origin
+    boxes = np.empty((len(ijks0), 6), dtype=np.int64)
+    boxes[:, 2 * axis], boxes[:, 2 * axis + 1] = ijks0[:, axis], ijks1[:, axis]
+    boxes[:, 2 * p], boxes[:, 2 * p + 1] = ijks0[:, p], ijks0[:, p] + 1
+    boxes[:, 2 * q], boxes[:, 2 * q + 1] = ijks0[:, q], ijks0[:, q] + 1
+    return boxes.tolist(), tuple(origin.tolist())
 
 
 # The following functions reduce the number of boxes in xbs format,
@@ -488,19 +430,114 @@ def _grow_boxes_along_z(boxes, sort_by):
     return boxes_grown
 
 
+# The following functions decompose the filled voxels in a set of boxes
+# (3D greedy maximal box decomposition): each box is seeded
+# by the first remaining voxel, then grown as much as possible
+# along the three axes, in turn.
+# The result depends on the axis order, so all the orders are tried.
+# Unlike the growing functions above, boxes with different cross-sections
+# are split and merged again. This is not always better,
+# so the callers keep the grown boxes when they are less.
+
+
+def _get_runs(occupancy, axis):
+    """!
+    Get the runs of filled voxels along an axis, as boxes.
+    @param occupancy: the occupancy, a boolean np.array.
+    @param axis: the axis of the runs.
+    @return the boxes np.array: [[ix0, ix1, iy0, iy1, iz0, iz1], ...].
+    """
+    occupancy = np.moveaxis(occupancy, axis, -1)  # (p, q, run axis)
+    pad = np.zeros(occupancy.shape[:2] + (1,), dtype=np.int8)
+    diff = np.diff(np.concatenate((pad, occupancy.view(np.int8), pad), axis=2), axis=2)
+    starts, ends = np.argwhere(diff == 1), np.argwhere(diff == -1)  # same order
+    p, q, k0, k1 = starts[:, 0], starts[:, 1], starts[:, 2], ends[:, 2]
+    boxes = np.empty((len(starts), 6), dtype=np.int64)
+    others = tuple(i for i in range(3) if i != axis)
+    boxes[:, 2 * axis], boxes[:, 2 * axis + 1] = k0, k1
+    boxes[:, 2 * others[0]], boxes[:, 2 * others[0] + 1] = p, p + 1
+    boxes[:, 2 * others[1]], boxes[:, 2 * others[1] + 1] = q, q + 1
+    return boxes
+
+
+def _get_boxes_occupancy(boxes):
+    """!
+    Get the voxel occupancy from the boxes.
+    @param boxes: the boxes in integer coordinates.
+    @return the occupancy, a boolean np.array, and the offset of its origin.
+    """
+    boxes = np.array(boxes, dtype=np.int64)
+    offset = boxes[:, 0::2].min(axis=0)
+    boxes -= np.repeat(offset, 2)
+    occupancy = np.zeros(boxes[:, 1::2].max(axis=0), dtype=bool)
+    for ix0, ix1, iy0, iy1, iz0, iz1 in boxes.tolist():
+        occupancy[ix0:ix1, iy0:iy1, iz0:iz1] = True
+    return occupancy, tuple(offset.tolist())
+
+
+def _get_greedy_boxes(occupancy, offset=(0, 0, 0)):
+    """!
+    Get the boxes covering the voxel occupancy, the fewest of all axis orders.
+    @param occupancy: the occupancy, a boolean np.array.
+    @param offset: the offset of the occupancy origin.
+    @return the boxes in integer coordinates: [[ix0, ix1, iy0, iy1, iz0, iz1], ...].
+    """
+    return min(
+        (
+            _get_greedy_boxes_by(occupancy, axes, offset)
+            for axes in itertools.permutations(range(3))
+        ),
+        key=len,
+    )
+
+
+def _get_greedy_boxes_by(occupancy, axes, offset):
+    """!
+    Get the boxes covering the voxel occupancy, for an axis order.
+    @param occupancy: the occupancy, a boolean np.array.
+    @param axes: the axis order, the boxes grow along the last axis first.
+    @param offset: the offset of the occupancy origin.
+    @return the boxes in integer coordinates: [[ix0, ix1, iy0, iy1, iz0, iz1], ...].
+    """
+    # Transpose, so that the seeds are scanned along the first growing axis
+    remaining = occupancy.transpose(axes).copy()  # C order
+    flat = remaining.ravel()  # a view
+    boxes, seed = list(), 0
+    while True:
+        seed += int(np.argmax(flat[seed:]))  # next remaining voxel
+        if not flat[seed]:
+            break
+        i, j, k = (int(p) for p in np.unravel_index(seed, remaining.shape))
+        # Grow along the last, then the second, then the first axis
+        row = remaining[i, j, k:]
+        k1 = k + (int(np.argmin(row)) or len(row))
+        plane = remaining[i, j:, k:k1].all(axis=1)
+        j1 = j + (int(np.argmin(plane)) or len(plane))
+        block = remaining[i:, j:j1, k:k1].all(axis=(1, 2))
+        i1 = i + (int(np.argmin(block)) or len(block))
+        remaining[i:i1, j:j1, k:k1] = False
+        # Transpose back and stash the box
+        box = [0] * 6
+        for axis, p0, p1 in zip(axes, (i, j, k), (i1, j1, k1)):
+            box[2 * axis] = p0 + offset[axis]
+            box[2 * axis + 1] = p1 + offset[axis]
+        boxes.append(box)
+    return boxes
+
+
 # Transform boxes in integer coordinates, back to world coordinates
 
 
-def _get_box_xbs(context, boxes, origin, voxel_size):
+def _get_box_xbs(boxes, origin, voxel_size, scale_length):
     """!
     Transform boxes to xbs in world coordinates.
     @param boxes: the boxes to handle.
     @param origin: local origin.
     @param voxel_size: the voxel size of the object.
+    @param scale_length: the Scene unit scale.
     @return the xbs.
     """
     # overlap = 10 ** (-config.LP)  # compatible with length precision
-    scale_length = context.scene.unit_settings.scale_length
     return (
         (
             (origin[0] + box[0] * voxel_size) * scale_length,  # - overlap,
@@ -4,80 +4,152 @@
 BFDS, translate Blender object geometry to FDS XB notation.
 """
 
-import logging
+import os, sys, logging, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from ...types import BFException
 from ... import utils
-from ...config import LP
+from ...config import (
+    LP,
+    ADDON_PACKAGE,
+    PARALLEL_EXPORT_MIN_OBS,
+    PARALLEL_EXPORT_MAX_WORKERS,
+)
 from ..ON_MULT import multiply_xbs
-from .calc_voxels import get_voxels
-from .calc_pixels import get_pixels
-
+from .calc_voxels import get_voxel_faces, calc_voxel_xbs
+from .calc_pixels import get_pixel_faces, calc_pixel_xbs
+from .calc_raster import get_voxel_tris, calc_raster_xbs, is_tiled
 
 log = logging.getLogger(__name__)
 
 
-# TODO world not applied
-def _ob_to_xbs_voxels(context, ob, world) -> tuple((list, list)):
+# The conversion of the geometry is split in two steps:
+# the geometry is first extracted to plain arrays by a _get_*_job() function,
+# that uses Blender data and returns a job: (function, args).
+# Then the job function calculates xbs and msgs without Blender data,
+# so that it can run in a worker process (see calc_xbs_caches()).
+
+
+def get_max_workers(context) -> int:
     """!
-    Transform Object solid geometry to xbs notation (voxelization).
+    Get the number of worker processes for the geometry conversion.
+    The workers are forked from Blender, that is multithreaded, and a fork can deadlock,
+    so parallel export is opt-in, and experimental.
     @param context: the Blender context.
-    @param ob: the Blender object.
-    @param world: True to return the object in world coordinates.
-    @return xbs notation and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    @return the number of worker processes, 1 if parallel export is not requested.
     """
-    xbs, voxel_size = get_voxels(context=context, ob=ob)
-    if not xbs:
-        raise BFException(ob, "XB: No exported voxels")
-    msgs = list((f"XB Voxels: {len(xbs)} | Resolution: {voxel_size:.{LP}f} m",))
-    return xbs, msgs
+    bf_prefs = context.preferences.addons[ADDON_PACKAGE].preferences
+    if not bf_prefs.bf_pref_parallel_export or sys.platform != "linux":
+        return 1  # fork is unavailable or unsafe
+    return PARALLEL_EXPORT_MAX_WORKERS or os.cpu_count() or 1
 
 
 # TODO world not applied
-def _ob_to_xbs_pixels(context, ob, world) -> tuple((list, list)):
+def _get_voxels_job(context, ob, world) -> tuple:
     """!
-    Transform Object flat geometry to xbs notation (flat voxelization).
+    Get the job transforming Object solid geometry to xbs notation (voxelization).
     @param context: the Blender context.
     @param ob: the Blender object.
     @param world: True to return the object in world coordinates.
-    @return xbs notation (flat voxelization) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    @return the job: (function, args).
     """
-    xbs, voxel_size = get_pixels(context=context, ob=ob)
-    if not xbs:
-        raise BFException(ob, "XB: No exported pixels")
     scale_length = context.scene.unit_settings.scale_length
-    res = voxel_size * scale_length
-    msgs = list((f"XB Pixels: {len(xbs)} | Resolution: {res:.{LP}f} m",))
+    merge = ob.bf_xb_voxel_merge
+    if ob.bf_xb_voxelizer == "RASTER":
+        tris, voxel_size = get_voxel_tris(context=context, ob=ob)
+        max_workers = get_max_workers(context)  # for the tiles
+        args = tris, voxel_size, scale_length, merge, max_workers
+        return _calc_xbs_raster_voxels, args
+    faces, voxel_size = get_voxel_faces(context=context, ob=ob)
+    return _calc_xbs_voxels, (faces, voxel_size, scale_length, merge)
+
+
+def _calc_xbs_voxels(faces, voxel_size, scale_length, merge) -> tuple((list, list)):
+    xbs = calc_voxel_xbs(
+        faces, voxel_size=voxel_size, scale_length=scale_length, merge=merge
+    )
+    msgs = list((_get_voxels_msg(xbs, res=voxel_size * scale_length),))
     return xbs, msgs
 
 
-def _ob_to_xbs_bbox(context, ob, world) -> tuple((list, list)):
+def _calc_xbs_raster_voxels(
+    tris, voxel_size, scale_length, merge, max_workers
+) -> tuple((list, list)):
+    xbs = calc_raster_xbs(
+        tris,
+        voxel_size=voxel_size,
+        scale_length=scale_length,
+        merge=merge,
+        max_workers=max_workers,
+    )
+    msgs = list((_get_voxels_msg(xbs, res=voxel_size * scale_length),))
+    if merge == "GREEDY" and is_tiled(shape=tris[3]):
+        msgs.append("XB Voxels: Greedy merging not applied to the tiled voxel grid")
+    return xbs, msgs
+
+
+def _get_voxels_msg(xbs, res) -> str:
     """!
-    Transform Object solid geometry to xbs notation (bounding box).
+    Get the voxels message, with the reduction ratio of merged voxels to boxes.
+    @param xbs: the voxels in xbs format.
+    @param res: the voxel size, in m.
+    @return the message.
+    """
+    volume = sum((xb[1] - xb[0]) * (xb[3] - xb[2]) * (xb[5] - xb[4]) for xb in xbs)
+    nvoxels = round(volume / res**3)
+    ratio = xbs and nvoxels / len(xbs) or 0.0
+    return f"XB Voxels: {len(xbs)} | Resolution: {res:.{LP}f} m | Reduction: {ratio:.1f}:1 from {nvoxels} voxels"
+
+
+# TODO world not applied
+def _get_pixels_job(context, ob, world) -> tuple:
+    """!
+    Get the job transforming Object flat geometry to xbs notation (flat voxelization).
     @param context: the Blender context.
     @param ob: the Blender object.
     @param world: True to return the object in world coordinates.
-    @return xbs notation (bounding box) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    @return the job: (function, args).
     """
-    xb = utils.geometry.get_bbox_xb(context, ob, world=world)
-    xbs, msgs = list((xb,)), list()
+    faces, voxel_size, flat_axis, flat_origin = get_pixel_faces(context=context, ob=ob)
+    scale_length = context.scene.unit_settings.scale_length
+    return _calc_xbs_pixels, (faces, voxel_size, scale_length, flat_axis, flat_origin)
+
+
+def _calc_xbs_pixels(
+    faces, voxel_size, scale_length, flat_axis, flat_origin
+) -> tuple((list, list)):
+    xbs = calc_pixel_xbs(
+        faces,
+        voxel_size=voxel_size,
+        scale_length=scale_length,
+        flat_axis=flat_axis,
+        flat_origin=flat_origin,
+    )
+    res = voxel_size * scale_length * scale_length  # get_pixels() size is scaled
+    msgs = list((f"XB Pixels: {len(xbs)} | Resolution: {res:.{LP}f} m",))
     return xbs, msgs
 
 
-def _ob_to_xbs_faces(context, ob, world) -> tuple((list, list)):
+def _get_faces_job(context, ob, world) -> tuple:
     """!
-    Transform Object flat faces to xbs notation (faces).
+    Get the job transforming Object flat faces to xbs notation (faces).
     @param context: the Blender context.
     @param ob: the Blender object.
     @param world: True to return the object in world coordinates.
-    @return xbs notation (faces) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    @return the job: (function, args).
     """
-    xbs = list()
     bm = utils.geometry.get_object_bmesh(context, ob, world=world)
-    bm.faces.ensure_lookup_table()
+    co, loop_totals, vertex_index, _, _ = utils.geometry.get_bmesh_arrays(bm)
     scale_length = context.scene.unit_settings.scale_length
-    for face in bm.faces:
-        verts = face.verts
-        xs, ys, zs = tuple(zip(*(v.co for v in verts)))
+    return _calc_xbs_faces, (co, loop_totals, vertex_index, scale_length)
+
+
+def _calc_xbs_faces(co, loop_totals, vertex_index, scale_length) -> tuple((list, list)):
+    xbs = list()
+    co, vertex_index, i = co.tolist(), vertex_index.tolist(), 0
+    for n in loop_totals.tolist():
+        xs, ys, zs = tuple(zip(*(co[v] for v in vertex_index[i : i + n])))
+        i += n
         x0, x1, y0, y1, z0, z1 = (min(xs), max(xs), min(ys), max(ys), min(zs), max(zs))
         deltas = [(x1 - x0, 2), (y1 - y0, 1), (z1 - z0, 0)]
         deltas.sort()
@@ -88,38 +160,138 @@ def _ob_to_xbs_faces(context, ob, world) -> tuple((list, list)):
         if deltas[0][1] == 0:
             z1 = z0 = (z0 + z1) / 2.0
         xbs.append(tuple(c * scale_length for c in (x0, x1, y0, y1, z0, z1)))
-    bm.free()
     xbs.sort()
-    if not xbs:
-        raise BFException(ob, "XB: No exported faces")
     msgs = list((f"XB Faces: {len(xbs)}",))
     return xbs, msgs
 
 
-def _ob_to_xbs_edges(context, ob, world) -> tuple((list, list)):
+def _get_edges_job(context, ob, world) -> tuple:
     """!
-    Transform Object edges in xbs notation (edges).
+    Get the job transforming Object edges in xbs notation (edges).
     @param context: the Blender context.
     @param ob: the Blender object.
     @param world: True to return the object in world coordinates.
-    @return xbs notation (edges) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    @return the job: (function, args).
     """
-    xbs = list()
     bm = utils.geometry.get_object_bmesh(context, ob, world=world)
-    bm.edges.ensure_lookup_table()
+    co, _, _, _, edges = utils.geometry.get_bmesh_arrays(bm)
     scale_length = context.scene.unit_settings.scale_length
-    for edge in bm.edges:
-        x0, y0, z0 = edge.verts[0].co
-        x1, y1, z1 = edge.verts[1].co
+    return _calc_xbs_edges, (co, edges, scale_length)
+
+
+def _calc_xbs_edges(co, edges, scale_length) -> tuple((list, list)):
+    xbs = list()
+    co = co.tolist()
+    for v0, v1 in edges.tolist():
+        x0, y0, z0 = co[v0]
+        x1, y1, z1 = co[v1]
         xbs.append(tuple(c * scale_length for c in (x0, x1, y0, y1, z0, z1)))
-    bm.free()
     xbs.sort()
-    if not xbs:
-        raise BFException(ob, "XB: No exported edges")
     msgs = list((f"XB Edges: {len(xbs)}",))
     return xbs, msgs
 
 
+_choice_to_xbs_job = {
+    "VOXELS": (_get_voxels_job, "voxels"),
+    "PIXELS": (_get_pixels_job, "pixels"),
+    "FACES": (_get_faces_job, "faces"),
+    "EDGES": (_get_edges_job, "edges"),
+}
+
+
+def _ob_to_xbs_job(context, ob, world, bf_xb) -> tuple((list, list)):
+    """!
+    Transform Object geometry according to bf_xb to xbs notation, by running its job.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @param bf_xb: string in (VOXELS, FACES, PIXELS, EDGES).
+    @return xbs notation and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    key = _get_disk_cache_key(context, ob, world, bf_xb)
+    cached = utils.voxel_cache.load(key)
+    if cached:
+        return cached
+    get_job, name = _choice_to_xbs_job[bf_xb]
+    func, args = get_job(context, ob, world)
+    xbs, msgs = func(*args)
+    if not xbs:
+        raise BFException(ob, f"XB: No exported {name}")
+    utils.voxel_cache.save(key, xbs, msgs)
+    return xbs, msgs
+
+
+def _get_disk_cache_key(context, ob, world, bf_xb):
+    """!
+    Get the key of the persistent disk cache, only for the slow voxels and pixels.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @param bf_xb: string in (VOXELS, FACES, PIXELS, EDGES).
+    @return the key or None.
+    """
+    if bf_xb not in ("VOXELS", "PIXELS"):
+        return None
+    return utils.voxel_cache.get_key(context, ob, world=world)
+
+
+def _ob_to_xbs_bbox(context, ob, world) -> tuple((list, list)):
+    """!
+    Transform Object solid geometry to xbs notation (bounding box).
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @return xbs notation (bounding box) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    xb = utils.geometry.get_bbox_xb(context, ob, world=world)
+    xbs, msgs = list((xb,)), list()
+    return xbs, msgs
+
+
+def _ob_to_xbs_voxels(context, ob, world) -> tuple((list, list)):
+    """!
+    Transform Object solid geometry to xbs notation (voxelization).
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @return xbs notation and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    return _ob_to_xbs_job(context, ob, world, bf_xb="VOXELS")
+
+
+def _ob_to_xbs_pixels(context, ob, world) -> tuple((list, list)):
+    """!
+    Transform Object flat geometry to xbs notation (flat voxelization).
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @return xbs notation (flat voxelization) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    return _ob_to_xbs_job(context, ob, world, bf_xb="PIXELS")
+
+
+def _ob_to_xbs_faces(context, ob, world) -> tuple((list, list)):
+    """!
+    Transform Object flat faces to xbs notation (faces).
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @return xbs notation (faces) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    return _ob_to_xbs_job(context, ob, world, bf_xb="FACES")
+
+
+def _ob_to_xbs_edges(context, ob, world) -> tuple((list, list)):
+    """!
+    Transform Object edges in xbs notation (edges).
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param world: True to return the object in world coordinates.
+    @return xbs notation (edges) and any error message: ((x0,x1,y0,y1,z0,z1,), ...), 'Msg'.
+    """
+    return _ob_to_xbs_job(context, ob, world, bf_xb="EDGES")
+
+
 _choice_to_xbs = {
     "BBOX": _ob_to_xbs_bbox,
     "VOXELS": _ob_to_xbs_voxels,
@@ -129,6 +301,66 @@ _choice_to_xbs = {
 }
 
 
+def calc_xbs_caches(context, obs, max_workers=1) -> None:
+    """!
+    Fill the xbs caches of Objects, converting their geometry in parallel.
+    The geometry is extracted in the main thread, then converted by worker processes.
+    The caches are set in obs order, on error they are left empty,
+    so that the error is raised again by the serial export.
+    @param context: the Blender context.
+    @param obs: the Blender Objects.
+    @param max_workers: number of worker processes, 1 to run the jobs serially.
+    """
+    # Extract the geometry of the Objects with no cache
+    jobs = list()  # (ob, key, func, args)
+    for ob in obs:
+        if (
+            not ob.bf_xb_export
+            or ob.bf_xb not in _choice_to_xbs_job
+            or ob.get("ob_to_xbs_cache") is not None
+        ):
+            continue
+        get_job, _ = _choice_to_xbs_job[ob.bf_xb]
+        try:
+            key = _get_disk_cache_key(context, ob, True, ob.bf_xb)
+            cached = utils.voxel_cache.load(key)
+            if cached:
+                ob["ob_to_xbs_cache"] = cached
+                continue
+            jobs.append((ob, key, *get_job(context, ob, True)))
+        except Exception:
+            continue  # raised again by the serial export
+    # Run the jobs, and set the caches
+    if max_workers > 1 and len(jobs) >= PARALLEL_EXPORT_MIN_OBS:
+        log.debug(f"Convert geometry of {len(jobs)} Objects in parallel...")
+        # Fork, as the workers cannot import bpy
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+        )
+        with executor:
+            futures = [executor.submit(func, *args) for _, _, func, args in jobs]
+            results = (f.result for f in futures)
+            _set_xbs_caches(jobs, results)
+    else:
+        _set_xbs_caches(jobs, (partial(func, *args) for _, _, func, args in jobs))
+
+
+def _set_xbs_caches(jobs, results):
+    """!
+    Set the xbs caches from the job results, in order, and save them to disk.
+    @param jobs: list of (ob, key, func, args).
+    @param results: callables returning the job results.
+    """
+    for (ob, key, _, _), result in zip(jobs, results):
+        try:
+            xbs, msgs = result()
+        except Exception:
+            continue  # raised again by the serial export
+        if xbs:
+            ob["ob_to_xbs_cache"] = xbs, msgs
+            utils.voxel_cache.save(key, xbs, msgs)
+
+
 def ob_to_xbs(context, ob, bf_xb, world=True) -> tuple((list, list, list)):
     """!
     Transform Object geometry according to bf_xb to FDS notation.
@@ -35,7 +35,7 @@ class SP_DUMP_render_file(BFParam):
             name=self.element.name,
             extension=".ge1",
         )
-        ge1_text = scene_to_ge1(context, self)
+        ge1_text = scene_to_ge1(context, self.element)
         utils.io.write_txt_file(filepath, ge1_text)
         return FDSParam(fds_label="RENDER_FILE", value=f"{self.element.name}.ge1")
 
@@ -39,9 +39,10 @@ def scene_to_ge1(context, scene):
     @param scene: the Blender scene.
     @return FDS GE1 notation.
     """
-    # Cursor
-    w = context.window_manager.windows[0]
-    w.cursor_modal_set("WAIT")
+    # Cursor, no window in background mode
+    w = context.window
+    if w:
+        w.cursor_modal_set("WAIT")
     # Get GE1 appearances from materials
     appearances, ma_to_appearance = list(), dict()
     for i, ma in enumerate(bpy.data.materials):
@@ -68,11 +69,8 @@ def scene_to_ge1(context, scene):
     allowed_nls = ("ON_OBST", "ON_GEOM", "ON_VENT", "ON_HOLE")
     obs = (
         ob
-        for ob in context.scene.objects
-        if ob.type == "MESH"
-        and not ob.hide_render  # show only exported obs
-        and not ob.bf_is_tmp  # do not show tmp obs
-        and ob.bf_namelist_cls in allowed_nls  # show only allowed namelists
+        for ob in utils.geometry.get_exported_obs(context, obs=scene.objects)
+        if ob.bf_namelist_cls in allowed_nls  # show only allowed namelists
         and (ob.active_material and ob.active_material.name != "OPEN")  # no OPEN
     )
     # Get GE1 faces from selected objects
@@ -112,5 +110,6 @@ def scene_to_ge1(context, scene):
     ge1_file_a = f"[APPEARANCE]\n{len(appearances)}\n{''.join(appearances)}"
     ge1_file_f = f"[FACES]\n{len(gefaces)}\n{''.join(gefaces)}"
     # Close
-    w.cursor_modal_restore()
+    if w:
+        w.cursor_modal_restore()
     return "".join((ge1_file_a, ge1_file_f))
@@ -88,6 +88,18 @@ class SP_config_text_position(BFParam):
     }
 
 
+class SP_config_catf_export(BFParam):
+    label = "Split Into CATF Files"
+    description = (
+        "Save the domain, the boundary conditions and each top level Collection\n"
+        "to their own files, included by CATF in the exported FDS case file"
+    )
+    bpy_type = Scene
+    bpy_idname = "bf_config_catf_export"
+    bpy_prop = BoolProperty
+    bpy_default = False
+
+
 class SP_config_default_voxel_size(BFParam):
     label = "Default Voxel/Pixel Size"
     description = "Default voxel/pixel resolution"
@@ -158,6 +170,7 @@ class SN_config(BFNamelistSc):
         SP_config_directory,
         SP_config_text,
         SP_config_text_position,
+        SP_config_catf_export,
         SP_config_default_voxel_size,
         SP_config_default_SURF,
         SP_config_mpi_processes,
@@ -167,5 +180,6 @@ class SN_config(BFNamelistSc):
     def draw(self, context, layout):
         row = layout.row()
         row.operator("scene.bf_show_fds_code", icon="HIDE_OFF")
+        row.operator("scene.bf_estimate_export", icon="INFO")
         row.operator("scene.bf_props_to_sc", icon="COPYDOWN")
         return super().draw(context, layout)
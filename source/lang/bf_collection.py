@@ -4,6 +4,7 @@ import logging
 
 from bpy.types import Collection
 from ..types import FDSList
+from .. import utils
 
 log = logging.getLogger(__name__)
 
@@ -30,11 +31,15 @@ class BFCollection:
             if found:
                 return found
 
-    def to_fds_list(self, context, full=False) -> FDSList:
+    def to_fds_list(self, context, full=False, lc_map=None, children=True) -> FDSList:
         """!
         Return the FDSList instance from self, never None.
+        @param lc_map: the layer_collection map from get_layer_collection_map().
+        @param children: if False, do not include the children Collections.
         """
-        layer_collection = self.get_layer_collection(context)
+        if lc_map is None:
+            lc_map = utils.geometry.get_layer_collection_map(context)
+        layer_collection = lc_map[self]
         if self.hide_render or layer_collection.exclude:
             return FDSList()  # exclude self from exporting
         header = f"\n-- Blender Collection: <{self.name}>"
@@ -44,10 +49,16 @@ class BFCollection:
         else:
             obs = list(self.objects)
         obs.sort(key=lambda k: k.name)  # alphabetic by name
-        iterable = (ob.to_fds_list(context=context) for ob in obs)
+        sc_key = utils.cache.get_sc_key(context)
+        iterable = (
+            utils.cache.get_ob_fds_list(context, ob=ob, sc_key=sc_key) for ob in obs
+        )
         fds_list = FDSList(header=header, iterable=iterable)
+        if not children:
+            return fds_list
         fds_list.extend(
-            child.to_fds_list(context=context, full=full) for child in self.children
+            child.to_fds_list(context=context, full=full, lc_map=lc_map)
+            for child in self.children
         )
         return fds_list
 
@@ -24,7 +24,6 @@ class BFObject:
         """
         return BFNamelist.get_subclass(cls_name=self.bf_namelist_cls)(element=self)
 
-    # TODO is there a faster method?
     def get_layer_collection(self, context, _layer_collection=None):
         """!
         Return related layer_collection in current context.
@@ -50,7 +49,15 @@ class BFObject:
             return FDSList()
         if self.mode == "EDIT":  # only in interactive
             bpy.ops.object.mode_set(mode="OBJECT")
-        return self.bf_namelist.to_fds_list(context)
+        if not utils.profiler.is_active():
+            return self.bf_namelist.to_fds_list(context)
+        with utils.profiler.record("object", self.name):
+            with utils.profiler.record("namelist", self.bf_namelist_cls):
+                fds_list = self.bf_namelist.to_fds_list(context)
+        size = len(fds_list.get_fds_namelists())
+        utils.profiler.add_size("object", self.name, size)
+        utils.profiler.add_size("namelist", self.bf_namelist_cls, size)
+        return fds_list
 
     @classmethod
     def register(cls):
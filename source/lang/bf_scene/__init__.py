@@ -1,3 +1,4 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from .bf_scene import BFScene
\ No newline at end of file
+from .bf_scene import BFScene, ExportResult
+from .estimate_helper import estimate_to_string
\ No newline at end of file
@@ -3,14 +3,34 @@
 import logging, bpy, os
 from bpy.types import Scene
 from bpy.props import IntVectorProperty
-from ...config import MAXLEN
-from ...types import BFNamelist, FDSList, BFParam
+from ...config import MAXLEN, ADDON_PACKAGE
+from ...types import BFNamelist, FDSList, BFParam, iter_fds_namelists
 from ... import utils
-from . import export_helper, import_helper
+from . import export_helper, import_helper, estimate_helper
 
 log = logging.getLogger(__name__)
 
 
+class ExportResult:
+    """!
+    Result of the export of a Scene saved to disk, from BFScene.to_fds().
+    """
+
+    def __init__(self, filepath, skipped):
+        """!
+        Class constructor.
+        @param filepath: the saved FDS case filepath.
+        @param skipped: the list of the unchanged filepaths, not written again.
+        """
+        ## the saved FDS case filepath
+        self.filepath = filepath
+        ## the list of the unchanged filepaths, not written again
+        self.skipped = skipped
+
+    def __repr__(self) -> str:
+        return f"ExportResult(filepath={self.filepath!r}, skipped={self.skipped!r})"
+
+
 class BFScene:
     """!
     Extension of Blender Scene.
@@ -23,26 +43,61 @@ class BFScene:
         """
         return (n(element=self) for n in BFNamelist.subclasses if n.bpy_type == Scene)
 
-    def to_fds_list(self, context, full=False) -> FDSList:
+    def to_fds_list(self, context, full=False, parts=None) -> FDSList:
         """!
         Return the FDSList instance from self, never None.
+        @param parts: if a dict and full, filled with the FDSLists
+        to be saved to their own files, {filename: FDSList}, included by CATF.
         """
         # Set mysef as the right Scene instance in the context
         # It is needed, because context.scene is needed elsewhere
-        bpy.context.window.scene = self  # set context.scene
-        return export_helper.sc_to_fds_list(context=context, sc=self, full=full)
+        # In background mode there is no window, context.scene is overridden
+        if bpy.context.window:
+            bpy.context.window.scene = self  # set context.scene
+        with utils.io.write_session():  # eg. bingeom files
+            return export_helper.sc_to_fds_list(
+                context=context, sc=self, full=full, parts=parts
+            )
 
     def to_fds(self, context, full=False, save=False):
         """!
-        Return the FDS formatted string.
+        Return the FDS formatted string, or save it to disk.
         @param context: the Blender context.
         @param full: if True, return full FDS case.
-        @param save: if True, save to disk.
-        @return FDS formatted string (eg. "&OBST ID='Test' /"), or None.
+        @param save: if True, save to disk, streaming the text.
+        @return FDS formatted string (eg. "&OBST ID='Test' /") if not saved,
+        or the ExportResult of the saved files.
         """
         log.debug(f"Export from Scene {self.name}...")
-        text = self.to_fds_list(context=context, full=full).to_string()
-        if save:
+        bf_prefs = context.preferences.addons[ADDON_PACKAGE].preferences
+        profile = full and bf_prefs.bf_pref_export_profile in ("TEXT", "JSON")
+        if profile:
+            utils.profiler.start()
+        try:
+            result, filepath = self._to_fds(context, full=full, save=save)
+        finally:
+            report = profile and utils.profiler.stop()
+        if report:
+            json_filepath = None
+            if bf_prefs.bf_pref_export_profile == "JSON" and filepath:
+                json_filepath = f"{os.path.splitext(filepath)[0]}.profile.json"
+            utils.profiler.write_report(report, filepath=json_filepath)
+        log.debug("Done!")
+        return result
+
+    def _to_fds(self, context, full, save):
+        """!
+        Return the FDS formatted string, or save it.
+        @return the FDS formatted string or the ExportResult,
+        and the saved filepath or None.
+        """
+        parts = dict() if save and full and self.bf_config_catf_export else None
+        if not save:
+            fds_list = self.to_fds_list(context=context, full=full, parts=parts)
+            return fds_list.to_string(), None
+        # All the written files in one session, for the skipped files
+        with utils.io.write_session() as skipped:
+            fds_list = self.to_fds_list(context=context, full=full, parts=parts)
             filepath = utils.io.transform_rbl_to_abs(
                 context=context,
                 filepath_rbl=self.bf_config_directory,
@@ -50,9 +105,30 @@ class BFScene:
                 extension=".fds",
             )
             log.debug(f"Save Scene {self.name} to {filepath}...")
-            utils.io.write_txt_file(filepath, text)
-        log.debug("Done!")
-        return text
+            # Concatenated files, next to the FDS case file
+            dirname = os.path.dirname(filepath)
+            for filename, part_fds_list in (parts or dict()).items():
+                with utils.profiler.record("write", filename):
+                    utils.io.write_txt_stream(
+                        os.path.join(dirname, filename),
+                        write_to=part_fds_list.write_to,
+                    )
+            with utils.profiler.record("write", os.path.basename(filepath)):
+                utils.io.write_txt_stream(filepath, write_to=fds_list.write_to)
+        if skipped:
+            log.info(f"Unchanged files, not written again: {len(skipped)}")
+        if utils.profiler.is_active():
+            size = os.path.getsize(filepath)
+            utils.profiler.add_size("write", os.path.basename(filepath), size)
+        return ExportResult(filepath=filepath, skipped=skipped), filepath
+
+    def to_estimate(self, context):
+        """!
+        Estimate the FDS export, without exporting it.
+        @param context: the Blender context.
+        @return the estimate dict (see estimate_helper.sc_to_estimate()).
+        """
+        return estimate_helper.sc_to_estimate(context=context, sc=self)
 
     def from_fds(
         self,
@@ -67,8 +143,9 @@ class BFScene:
         @param context: the Blender context.
         @param filepath: filepath of FDS case to be imported.
         @param f90_namelists: FDS formatted string of namelists, eg. "&OBST ID='Test' /\n&TAIL /".
-        @param fds_list: FDSList of FDSNamelists.
+        @param fds_list: FDSList or iterable of FDSNamelists.
         @param set_tmp: set temporary Objects.
+        @return number of imported namelists.
         """
         log.debug(f"Import to Scene {self.name}...")
 
@@ -84,56 +161,60 @@ class BFScene:
                 context=context,
                 filepath_rbl=filepath,
             )
-            f90_namelists = utils.io.read_txt_file(filepath=filepath)
+            bf_prefs = context.preferences.addons[ADDON_PACKAGE].preferences
+            fds_list = iter_fds_namelists(  # read while importing
+                filepath=filepath,
+                max_workers=None if bf_prefs.bf_pref_parallel_import else 1,
+            )
             # and set imported fds case dir, because others rely on it
             # it is restored later
             bf_config_directory = self.bf_config_directory
             self.bf_config_directory = os.path.dirname(filepath)
 
-        # Load fds case from f90_namelists
-        if f90_namelists:
-            fds_list = FDSList(f90_namelists=f90_namelists)
-
-        # Load fds_case from fds_list (protect from None)
-        if not fds_list:
-            log.debug("Prepare FDSList...")
-            fds_list = FDSList()
-
-        fds_namelist_qty = len(fds_list)
-
-        # Prepare free text for unmanaged namelists, no rewind
-        # if not existing, create
-        log.debug("Prepare free text...")
-        self.bf_config_text = utils.ui.show_bl_text(
-            context=context,
-            bl_text=self.bf_config_text,
-            name="New Free Text",
-        )
-
-        # Import
-        texts = list()
-        filename = bpy.path.basename(filepath or "")
-        import_helper.sc_from_fds_list(
-            context,
-            sc=self,
-            fds_list=fds_list,
-            set_tmp=set_tmp,
-            texts=texts,
-            filename=filename,
-        )
-
-        # Finally, write free text
-        log.debug("Write free text...")
-        header = None
-        if filepath:
-            header = f"-- From: <{filename}>"
-        utils.ui.write_bl_text(
-            context, bl_text=self.bf_config_text, header=header, texts=texts
-        )
+        # The file is read while importing, so restore fds case dir on error too,
+        # to avoid overwriting imported case
+        try:
+            # Load fds case from f90_namelists
+            if f90_namelists:
+                fds_list = FDSList(f90_namelists=f90_namelists)
+
+            # Load fds_case from fds_list (protect from None)
+            if fds_list is None:
+                log.debug("Prepare FDSList...")
+                fds_list = FDSList()
+
+            # Prepare free text for unmanaged namelists, no rewind
+            # if not existing, create
+            log.debug("Prepare free text...")
+            self.bf_config_text = utils.ui.show_bl_text(
+                context=context,
+                bl_text=self.bf_config_text,
+                name="New Free Text",
+            )
 
-        # Restore fds case dir, to avoid overwriting imported case
-        if filepath:
-            self.bf_config_directory = bf_config_directory
+            # Import
+            texts = list()
+            filename = bpy.path.basename(filepath or "")
+            fds_namelist_qty = import_helper.sc_from_fds_list(
+                context,
+                sc=self,
+                fds_list=fds_list,
+                set_tmp=set_tmp,
+                texts=texts,
+                filename=filename,
+            )
+
+            # Finally, write free text
+            log.debug("Write free text...")
+            header = None
+            if filepath:
+                header = f"-- From: <{filename}>"
+            utils.ui.write_bl_text(
+                context, bl_text=self.bf_config_text, header=header, texts=texts
+            )
+        finally:
+            if filepath:
+                self.bf_config_directory = bf_config_directory
 
         log.debug("Done!")
         return fds_namelist_qty  # feedback
@@ -147,6 +228,7 @@ class BFScene:
         Scene.bf_namelists = cls.bf_namelists
         Scene.to_fds_list = cls.to_fds_list
         Scene.to_fds = cls.to_fds
+        Scene.to_estimate = cls.to_estimate
         Scene.from_fds = cls.from_fds
 
     @classmethod
@@ -156,6 +238,7 @@ class BFScene:
         @param cls: class to be unregistered.
         """
         del Scene.from_fds
+        del Scene.to_estimate
         del Scene.to_fds
         del Scene.to_fds_list
         del Scene.bf_namelists
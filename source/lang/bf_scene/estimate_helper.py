@@ -0,0 +1,215 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, dry-run estimate of the FDS export of a Scene.
+Namelists, cells and file sizes are counted from cheap Object properties,
+without converting the geometry nor formatting the FDS text.
+"""
+
+import time, math, logging
+from mathutils import Vector
+from ...types import BFNamelist, BFException
+from ... import utils, config
+from ..OP_XB import OP_XB
+from ..OP_XB.calc_voxels import _get_voxel_size
+from ..OP_XYZ import OP_XYZ
+from ..OP_PB import OP_PB
+from ..ON_MULT import get_nmult, get_mult_native
+from ..ON_MESH.split_mesh import split_mesh
+
+log = logging.getLogger(__name__)
+
+# Exported chars of each float, with the LP decimal positions (eg. "-12.345,")
+_FLOAT_CHARS = config.LP + 5
+
+
+def _get_bbox_xb(ob, scale_length):
+    """!
+    Get the Object bounding box in xb format, from its cached bound_box.
+    Faster than utils.geometry.get_bbox_xb(), as no bmesh is built.
+    @param ob: the Blender object.
+    @param scale_length: the Scene unit scale.
+    @return the bounding box in world coordinates.
+    """
+    m = ob.matrix_world
+    cos = tuple(m @ Vector(co) for co in ob.bound_box)
+    xs, ys, zs = tuple(zip(*cos))
+    return (
+        min(xs) * scale_length,
+        max(xs) * scale_length,
+        min(ys) * scale_length,
+        max(ys) * scale_length,
+        min(zs) * scale_length,
+        max(zs) * scale_length,
+    )
+
+
+def _get_nxbs(context, ob, scale_length):
+    """!
+    Get the number of xbs of an Object, before multiplication.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param scale_length: the Scene unit scale.
+    @return the number of xbs, True if exact, and the upper bound of voxels.
+    """
+    cache = ob.get("ob_to_xbs_cache")
+    if cache is not None:
+        return len(cache[0]), True, 0
+    match ob.bf_xb:
+        case "BBOX":
+            return 1, True, 0
+        case "FACES":
+            return len(ob.data.polygons), not ob.modifiers, 0
+        case "EDGES":
+            return len(ob.data.edges), not ob.modifiers, 0
+        case "VOXELS" | "PIXELS":
+            # Upper bound, the bounding box is filled
+            xb = _get_bbox_xb(ob, scale_length)
+            voxel_size = _get_voxel_size(context, ob) * scale_length
+            ns = sorted(
+                max(1, math.ceil((xb[i + 1] - xb[i]) / voxel_size)) for i in (0, 2, 4)
+            )
+            if ob.bf_xb == "PIXELS":
+                ns[0] = 1  # flat along the smaller dimension
+            nvoxels = ns[0] * ns[1] * ns[2]
+            return nvoxels, False, nvoxels
+        case _:
+            raise AssertionError(f"Unknown XB <{ob.bf_xb}>")
+
+
+def _get_bingeom_size(ob):
+    """!
+    Get the exact size of the bingeom file of an Object, from its Mesh.
+    The faces are triangulated, there are no volumes.
+    @param ob: the Blender object.
+    @return the size in bytes.
+    """
+    me = ob.data
+    nverts = len(me.vertices)
+    nfaces = len(me.loops) - 2 * len(me.polygons)  # triangles
+    # Six records (tagged by 8 bytes): type, sizes, verts, faces, surfs, volus
+    return 6 * 8 + 4 + 4 * 4 + 24 * nverts + 16 * nfaces
+
+
+def _add_ob(context, ob, scale_length, est):
+    """!
+    Add the estimate of an exported Object to est.
+    @param context: the Blender context.
+    @param ob: the Blender object.
+    @param scale_length: the Scene unit scale.
+    @param est: the estimate dict, updated.
+    """
+    bf_namelist = BFNamelist.get_subclass(cls_name=ob.bf_namelist_cls)
+    fds_label = bf_namelist.fds_label
+    if not isinstance(fds_label, str):  # property, eg. ON_other
+        fds_label = ob.bf_other_namelist
+    n, nfloats, exact, nvoxels = 1, 0, True, 0
+    nmult = get_nmult(ob)
+    if get_mult_native(context, ob):  # multiples generated by FDS
+        est["namelists"]["MULT"] = est["namelists"].get("MULT", 0) + 1
+        nmult_ns = 1
+    else:
+        nmult_ns = nmult
+    if ob.bf_namelist_cls == "ON_MESH":
+        ijk = ob.bf_mesh_ijk
+        try:
+            nsplit = split_mesh(
+                hid=ob.name,
+                ijk=ijk,
+                export=ob.bf_mesh_nsplits_export,
+                nsplits=ob.bf_mesh_nsplits,
+                xb=_get_bbox_xb(ob, scale_length),
+            )[5]
+        except BFException:
+            nsplit = 1  # error shown by the export
+        n, nfloats = nsplit * nmult_ns, 9
+        est["cells"] += ijk[0] * ijk[1] * ijk[2] * nmult
+    elif ob.bf_namelist_cls == "ON_GEOM":
+        if config.EXPORT_ASCII_GEOM:
+            me = ob.data
+            nfloats = 3 * len(me.vertices) + 4 * (len(me.loops) - 2 * len(me.polygons))
+        else:
+            est["bingeom_size"] += _get_bingeom_size(ob)
+            est["bingeom_files"] += 1
+    elif bf_namelist.has_bf_param(OP_XB) and ob.bf_xb_export:
+        n, exact, nvoxels = _get_nxbs(context, ob, scale_length)
+        n *= nmult_ns
+        nfloats = 6
+    elif bf_namelist.has_bf_param(OP_XYZ) and ob.bf_xyz_export:
+        n = ob.bf_xyz == "VERTICES" and len(ob.data.vertices) or 1
+        nfloats = 3
+    elif bf_namelist.has_bf_param(OP_PB) and ob.bf_pb_export:
+        n, nfloats = len(ob.data.polygons), 1
+    # Add
+    key = exact and "namelists" or "estimated"
+    est[key][fds_label] = est[key].get(fds_label, 0) + n
+    est["voxels"] += nvoxels
+    est["fds_size"] += n * (
+        len(fds_label)
+        + len(ob.name)
+        + nfloats * _FLOAT_CHARS
+        + config.ESTIMATE_NAMELIST_CHARS
+    )
+
+
+def sc_to_estimate(context, sc):
+    """!
+    Estimate the FDS export of a Scene, without exporting it.
+    @param context: the Blender context.
+    @param sc: the Blender Scene.
+    @return the estimate dict: {"obs", "namelists": {fds_label: n}, "estimated": {fds_label: n},
+    "cells", "voxels", "voxel_time", "fds_size", "bingeom_files", "bingeom_size", "time"}.
+    """
+    t0 = time.perf_counter()
+    est = {
+        "obs": 0,
+        "namelists": dict(),  # exact counts
+        "estimated": dict(),  # upper bounds, eg. non cached voxels
+        "cells": 0,
+        "voxels": 0,
+        "voxel_time": 0.0,
+        "fds_size": 0,
+        "bingeom_files": 0,
+        "bingeom_size": 0,
+        "time": 0.0,
+    }
+    scale_length = sc.unit_settings.scale_length
+    lc_map = utils.geometry.get_layer_collection_map(context)
+    for ob in utils.geometry.get_exported_obs(context, obs=sc.objects, lc_map=lc_map):
+        _add_ob(context, ob, scale_length, est)
+        est["obs"] += 1
+    if sc.bf_config_text:
+        est["fds_size"] += len(sc.bf_config_text.as_string())
+    est["voxel_time"] = est["voxels"] / config.ESTIMATE_VOXEL_RATE
+    est["time"] = time.perf_counter() - t0
+    log.debug(f"Estimated export of {est['obs']} Objects in {est['time']:.3f} s")
+    return est
+
+
+def estimate_to_string(est):
+    """!
+    Format the estimate for the user.
+    @param est: the estimate dict from sc_to_estimate().
+    @return the formatted string.
+    """
+    lines = [
+        f"Exported Objects: {est['obs']} (estimated in {est['time']:.3f} s)",
+        f"MESH cells: {est['cells']:,}",
+    ]
+    for fds_label in sorted(set(est["namelists"]) | set(est["estimated"])):
+        n = est["namelists"].get(fds_label, 0)
+        n_est = est["estimated"].get(fds_label, 0)
+        line = f"{fds_label} namelists: {n:,}"
+        if n_est:
+            line += f" + up to {n_est:,} from voxels"
+        lines.append(line)
+    if est["voxels"]:
+        lines.append(
+            f"Voxels to be computed: up to {est['voxels']:,} (roughly {est['voxel_time']:.1f} s)"
+        )
+    lines.append(f"FDS file size: ~{est['fds_size'] / 1e6:.2f} MB")
+    if est["bingeom_files"]:
+        lines.append(
+            f"Bingeom files: {est['bingeom_files']}, size: {est['bingeom_size'] / 1e6:.2f} MB"
+        )
+    return "\n".join(lines)
@@ -3,8 +3,9 @@
 import time, logging, bpy
 
 from ...config import MAXLEN
-from ...types import FDSList, FDSParam
+from ...types import BFNamelist, FDSList, FDSParam, FDSNamelist
 from ... import utils, config
+from ..OP_XB import OP_XB, calc_xbs_caches, get_max_workers
 
 log = logging.getLogger(__name__)
 
@@ -44,11 +45,13 @@ def _get_free_text(context):
     return FDSList(header=header, msg=msg)
 
 
-def _get_domain(context):
+def _get_domain(context, lc_map):
     sc = context.scene
 
     # Get all exported MESHes and sort them by name
-    obs = utils.geometry.get_exported_obs(context, obs=context.scene.objects)
+    obs = utils.geometry.get_exported_obs(
+        context, obs=context.scene.objects, lc_map=lc_map
+    )
     mesh_obs = list((ob for ob in obs if ob.bf_namelist_cls == "ON_MESH"))
     mesh_obs.sort(key=lambda k: k.name)
 
@@ -71,7 +74,8 @@ def _get_domain(context):
 
     # Binpack
     nbin = sc.bf_config_mpi_processes
-    bins = utils.binpacking.binpack(nbin=nbin, item_weigths=item_weigths)
+    with utils.profiler.record("stage", "binpacking"):
+        bins = utils.binpacking.binpack(nbin=nbin, item_weigths=item_weigths)
 
     # Prepare output
     ncell_tot = sum(w for w, _ in bins)
@@ -100,88 +104,169 @@ def _get_domain(context):
     return domain_fds_list
 
 
-def _get_collections(context):
-    header = "\n--- Geometric namelists from Blender Collections"
-    iterable = context.scene.collection.to_fds_list(context, full=True)
-    return FDSList(header=header, iterable=iterable)
+def _calc_geometry(context, lc_map):
+    """!
+    Convert the geometry of the exported Objects in parallel, if requested.
+    The results are cached, and used by the following serial export.
+    """
+    max_workers = get_max_workers(context)
+    if max_workers < 2:
+        return
+    obs = list(
+        ob
+        for ob in utils.geometry.get_exported_obs(
+            context, obs=context.scene.objects, lc_map=lc_map
+        )
+        if BFNamelist.get_subclass(cls_name=ob.bf_namelist_cls).has_bf_param(OP_XB)
+    )
+    obs.sort(key=lambda k: k.name)
+    calc_xbs_caches(context, obs=obs, max_workers=max_workers)
 
 
-def _fill_mas(fds_namelist, mas, fds_label):
+def _get_collections(context, lc_map, ref_ids, co_parts=None):
     """!
-    Fill mas with Materials referenced by fds_namelist.
+    Get the geometric namelists from the Scene Collections.
+    @param co_parts: if a dict, filled with {Collection name: FDSList},
+    one for the Scene Collection and one for each top level Collection.
     """
-    for fds_param in fds_namelist.get_fds_params(fds_label=fds_label):
-        for hid in fds_param:
-            ma = bpy.data.materials.get(hid)
-            if ma:
-                mas.append(ma)
-        return True
+    with utils.profiler.record("stage", "geometry"):
+        _calc_geometry(context, lc_map=lc_map)
+    header = "\n--- Geometric namelists from Blender Collections"
+    co = context.scene.collection
+    utils.refs.start()  # record the references while exporting
+    try:
+        if co_parts is None:
+            iterable = co.to_fds_list(context, full=True, lc_map=lc_map)
+        else:  # each with the header
+            co_parts[co.name] = FDSList(
+                header=header,
+                iterable=(
+                    co.to_fds_list(context, full=True, lc_map=lc_map, children=False),
+                ),
+            )
+            for child in co.children:
+                co_parts[child.name] = FDSList(
+                    header=header,
+                    iterable=(child.to_fds_list(context, full=True, lc_map=lc_map),),
+                )
+            iterable = co_parts.values()
+    finally:
+        ref_ids.update(utils.refs.stop())
+    return FDSList(header=header, iterable=iterable)
 
 
-def _get_ref_mas(context, collections_fds_list):
+def _get_ref_mas(context, ref_ids):
     """!
     Get list of referenced Blender Materials.
+    @param ref_ids: IDs referenced by the exported Objects.
     """
-    # Prepare list of namelists from free_text and collections
-    fds_list = FDSList()
+    # Add references from free_text (cached)
     sc = context.scene
-    if sc.bf_config_text:
-        fds_list.from_fds(f90_namelists=sc.bf_config_text.as_string())
-    fds_list.append(collections_fds_list)
-
-    # Get references to mas
-    mas = list()
-    for fds_namelist in fds_list.get_fds_namelists():
-        fds_label = fds_namelist.fds_label
-        if fds_label == "OBST":
-            if _fill_mas(fds_namelist=fds_namelist, mas=mas, fds_label="SURF_ID"):
-                continue
-            if _fill_mas(fds_namelist=fds_namelist, mas=mas, fds_label="SURF_IDS"):
-                continue
-            _fill_mas(fds_namelist=fds_namelist, mas=mas, fds_label="SURF_ID6")
-        elif fds_label in ("GEOM", "VENT", "DEVC", "CTRL", "PART"):
-            _fill_mas(fds_namelist=fds_namelist, mas=mas, fds_label="SURF_ID")
-
-    # Add default SURF from Scene
+    ref_ids = set(ref_ids)
+    free_text_fds_list = utils.ui.get_bl_text_fds_list(sc.bf_config_text)
+    for fds_namelist in free_text_fds_list.get_fds_namelists():
+        ref_ids.update(utils.refs.get_ref_ids(fds_namelist))
+
+    # Get referenced mas, and default SURF from Scene
+    mas = set(bpy.data.materials.get(hid) for hid in ref_ids)
+    mas.discard(None)
     if sc.bf_default_surf:
-        mas.append(sc.bf_default_surf)
+        mas.add(sc.bf_default_surf)
 
-    # Remove doubles, set alphabetic sorting by name
-    mas = list(set(mas))
+    # Set alphabetic sorting by name
+    mas = list(mas)
     mas.sort(key=lambda k: k.name)
     return mas
 
 
-def _get_materials(context, collections_fds_list):
+def _get_materials(context, ref_ids):
     header = "\n--- Boundary conditions from Blender Materials\n"
-    mas = _get_ref_mas(context, collections_fds_list)
+    mas = _get_ref_mas(context, ref_ids)
     iterable = (ma.to_fds_list(context=context) for ma in mas)
     return FDSList(header=header, iterable=iterable)
 
 
-def sc_to_fds_list(context, sc, full=False) -> FDSList:
+def _get_stage(name, get_fds_list, context, **kwargs) -> FDSList:
+    """!
+    Get the FDSList of an export stage, recorded by the profiler if active.
+    """
+    with utils.profiler.record("stage", name):
+        fds_list = get_fds_list(context, **kwargs)
+    if utils.profiler.is_active():
+        utils.profiler.add_size("stage", name, len(fds_list.get_fds_namelists()))
+    return fds_list
+
+
+def _get_catf(context, parts, named_fds_lists):
+    """!
+    Move the FDSLists to their own files, and get the CATF namelist including them.
+    @param parts: dict filled with {filename: FDSList}.
+    @param named_fds_lists: iterable of (name, FDSList), empty ones are skipped.
+    @return the CATF namelist, or an empty FDSList.
+    """
+    sc = context.scene
+    for name, fds_list in named_fds_lists:
+        if not fds_list.get_fds_namelists():
+            continue  # nothing to include
+        filename = f"{sc.name}_{bpy.path.clean_name(name)}"
+        i, suffix = 0, ""
+        while f"{filename}{suffix}.fds" in parts:  # unique
+            i += 1
+            suffix = f"_{i}"
+        parts[f"{filename}{suffix}.fds"] = fds_list
+    if not parts:
+        return FDSList()
+    header = "\n--- Concatenated files"
+    return FDSList(
+        header=header,
+        iterable=(
+            FDSNamelist(
+                fds_label="CATF",
+                iterable=(FDSParam(fds_label="OTHER_FILES", value=tuple(parts)),),
+            ),
+        ),
+    )
+
+
+def sc_to_fds_list(context, sc, full=False, parts=None) -> FDSList:
     """!
     Return the FDSList instance from sc, never None.
+    @param parts: if a dict and full, split the case.
+    The domain, the materials and each top level Collection are moved to parts,
+    {filename: FDSList}, to be saved to their own files.
+    The returned FDSList includes them with a CATF namelist.
     """
     # Init components
     log.debug("Prepare Scene namelists...")
-    scene_fds_list = _get_scene(context)
+    scene_fds_list = _get_stage("scene", _get_scene, context)
 
     if not full:
         return scene_fds_list
 
     log.debug("Prepare header and free text...")
-    header_fds_list = _get_header(context)
-    free_text_fds_list = _get_free_text(context)
+    header_fds_list = _get_stage("header", _get_header, context)
+    free_text_fds_list = _get_stage("free text", _get_free_text, context)
+    lc_map = utils.geometry.get_layer_collection_map(context)  # once per export
     log.debug("Prepare domain...")
-    domain_fds_list = _get_domain(context)
+    domain_fds_list = _get_stage("domain", _get_domain, context, lc_map=lc_map)
     log.debug("Prepare geometric namelists...")
-    collections_fds_list = _get_collections(context)
-    log.debug("Prepare boundary conditions...")
-    materials_fds_list = _get_materials(
+    ref_ids = set()  # referenced IDs, filled while exporting
+    co_parts = None if parts is None else dict()
+    collections_fds_list = _get_stage(
+        "collections",
+        _get_collections,
         context,
-        collections_fds_list=collections_fds_list,
+        lc_map=lc_map,
+        ref_ids=ref_ids,
+        co_parts=co_parts,
+    )
+    log.debug("Prepare boundary conditions...")
+    materials_fds_list = _get_stage(
+        "materials", _get_materials, context, ref_ids=ref_ids
     )
+    summary = utils.profiler.get_summary()
+    if summary:  # before the Scene line
+        header_fds_list.msgs.insert(-1, summary)
 
     # Join components
     log.debug("Append namelists...")
@@ -190,9 +275,18 @@ def sc_to_fds_list(context, sc, full=False) -> FDSList:
     fds_list.append(scene_fds_list)
     if sc.bf_config_text_position == "BEGIN":
         fds_list.append(free_text_fds_list)
-    fds_list.append(materials_fds_list)
-    fds_list.append(domain_fds_list)
-    fds_list.append(collections_fds_list)
+    if parts is None:
+        fds_list.append(materials_fds_list)
+        fds_list.append(domain_fds_list)
+        fds_list.append(collections_fds_list)
+    else:
+        log.debug("Split to concatenated files...")
+        named_fds_lists = (
+            ("materials", materials_fds_list),
+            ("domain", domain_fds_list),
+            *co_parts.items(),
+        )
+        fds_list.append(_get_catf(context, parts, named_fds_lists))
     if sc.bf_config_text_position == "END":
         fds_list.append(free_text_fds_list)
 
@@ -3,18 +3,18 @@
 import logging, bpy
 
 from bpy.types import Scene, Object, Material
-from ...types import BFNamelist, BFNotImported
+from ...types import BFNamelist, BFNotImported, FDSList
 from ... import utils
 
 log = logging.getLogger(__name__)
 
 
 def sc_from_fds_list(context, sc, fds_list, set_tmp=False, texts=(), filename=None):
-    """Import in Scene from fds_list."""
-
-    # Special treatment for REACs
-    log.debug("Import REACs...")
-    _treat_REACs(context, sc, fds_list, texts)
+    """!
+    Import in Scene from fds_list.
+    @param fds_list: FDSList or iterable of FDSNamelist (eg. iter_fds_namelists()), consumed once.
+    @return number of imported namelists.
+    """
 
     # Get properly ordered list of managed bf_namelists
     log.debug("Get managed namelists...")
@@ -22,27 +22,38 @@ def sc_from_fds_list(context, sc, fds_list, set_tmp=False, texts=(), filename=No
         (n for n in BFNamelist.subclasses if n.fds_label),
         key=lambda k: k.bf_import_order,
     )
-    managed_fds_labels = tuple(n.fds_label for n in managed_bf_namelists)
+    managed_fds_labels = set(n.fds_label for n in managed_bf_namelists)
 
     # Get fds_namelists
     log.debug("Get importing namelists...")
-    fds_namelists = fds_list.get_fds_namelists()
+    if isinstance(fds_list, FDSList):
+        fds_namelists = fds_list.get_fds_namelists()
+    else:
+        fds_namelists = fds_list
 
-    # Select managed and unmanaged fds_namelists
+    # Select managed and unmanaged fds_namelists, while they are generated
+    # unmanaged namelists are kept as text only
     log.debug("Select managed/unmanaged namelists...")
-    fds_namelists.reverse()  # for pop from the beginning
+    fds_namelist_qty = 0
+    reac_fds_namelists = list()
     managed_fds_namelists_by_fds_label = dict()
-    unmanaged_fds_namelists = list()
-    while fds_namelists:
-        fds_namelist = fds_namelists.pop()
+    unmanaged_texts = list()
+    for fds_namelist in fds_namelists:
+        fds_namelist_qty += 1
         fds_label = fds_namelist.fds_label
-        if fds_label in managed_fds_labels:
+        if fds_label == "REAC":
+            reac_fds_namelists.append(fds_namelist)
+        elif fds_label in managed_fds_labels:
             try:
                 managed_fds_namelists_by_fds_label[fds_label].append(fds_namelist)
             except KeyError:
                 managed_fds_namelists_by_fds_label[fds_label] = list((fds_namelist,))
         else:
-            unmanaged_fds_namelists.append(fds_namelist)
+            unmanaged_texts.append(fds_namelist.to_string())
+
+    # Special treatment for REACs
+    log.debug("Import REACs...")
+    _treat_REACs(context, sc, reac_fds_namelists, texts)
 
     # Import managed namelists
     for bf_namelist in managed_bf_namelists:
@@ -90,8 +101,7 @@ def sc_from_fds_list(context, sc, fds_list, set_tmp=False, texts=(), filename=No
 
     # Import unmanaged namelists to free text
     # using the import order
-    for fds_namelist in unmanaged_fds_namelists:
-        texts.append(fds_namelist.to_string())
+    texts.extend(unmanaged_texts)
 
     # Empty temporary Scene collections and states
     # they get created in SN_MOVE, SN_MULT, SN_REAC
@@ -100,11 +110,11 @@ def sc_from_fds_list(context, sc, fds_list, set_tmp=False, texts=(), filename=No
     if "bf_mult_coll" in sc:
         del sc["bf_mult_coll"]
 
+    return fds_namelist_qty
 
-def _treat_REACs(context, sc, fds_list, texts):
-    """Special treatment for REAC namelists."""
-    fds_namelists = fds_list.get_fds_namelists(fds_label="REAC", remove=True)
 
+def _treat_REACs(context, sc, fds_namelists, texts):
+    """Special treatment for REAC namelists."""
     # Only one REAC to Scene SN_REAC
     if len(fds_namelists) == 1:
         bf_namelist = BFNamelist.get_subclass(fds_label="REAC")
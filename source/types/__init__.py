@@ -7,6 +7,13 @@ BFDS, types.
 from .bf_exception import BFException, BFNotImported
 from .bf_namelist import BFNamelist, BFNamelistMa, BFNamelistOb, BFNamelistSc
 from .bf_param import BFParam, BFParamFYI, BFParamOther
-from .fds_list import FDSList, FDSMulti, FDSNamelist, FDSParam
+from .fds_list import (
+    FDSList,
+    FDSFragment,
+    FDSMulti,
+    FDSNamelist,
+    FDSParam,
+    iter_fds_namelists,
+)
 
 # Nothing to register here
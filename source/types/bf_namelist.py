@@ -149,7 +149,7 @@ class BFNamelist(BFParam):
             return FDSList()
         self.check(context)
         if self.fds_label:
-            return FDSNamelist(
+            fds_namelist = FDSNamelist(
                 fds_label=self.fds_label,
                 iterable=(
                     bf_param.to_fds_list(context)
@@ -157,6 +157,8 @@ class BFNamelist(BFParam):
                     if bf_param
                 ),
             )
+            utils.refs.add_fds_namelist(fds_namelist)  # for the referenced SURFs
+            return fds_namelist
         return FDSList()
 
     def from_fds_list(self, context, fds_list, fds_label=None):
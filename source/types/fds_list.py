@@ -4,9 +4,15 @@
 BFDS, Blender list of FDS namelists or parameters.
 """
 
-import re, logging, f90nml  # TODO FIXME
-from ..config import DEFAULT_P, MAXLEN, INDENT
-from ..utils.text import append_word
+import re, os, sys, bisect, logging, itertools, multiprocessing, f90nml  # TODO FIXME
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import numpy as np
+from ..config import DEFAULT_P, MAXLEN, INDENT, READ_CHUNK_SIZE, COMPACT_PARAM_LEN
+from ..config import PARALLEL_READ_MIN_SIZE, PARALLEL_READ_MAX_WORKERS
+from ..utils.io import iter_txt_file
+from ..utils import profiler
 from .bf_exception import BFException
 
 log = logging.getLogger(__name__)
@@ -34,6 +40,9 @@ class FDSList(list):
         @param msg: comment message string.
         """
         super().__init__(iterable)
+        ## lazily built label index, used inside indexed()
+        self._index = None
+        self._use_index = False
         ## list of comment message strings.
         self.msgs = list(msgs)
         if msg:
@@ -51,8 +60,145 @@ class FDSList(list):
         iterable = ",".join(str(item) for item in self)
         return f"{self.__class__.__name__}({iterable})"
 
+    # Any change of my items invalidates the label index
+
+    def append(self, item):
+        self._index = None
+        super().append(item)
+
+    def extend(self, iterable):
+        self._index = None
+        super().extend(iterable)
+
+    def insert(self, i, item):
+        self._index = None
+        super().insert(i, item)
+
+    def pop(self, i=-1):
+        self._index = None
+        return super().pop(i)
+
+    def remove(self, item):
+        self._index = None
+        super().remove(item)
+
+    def clear(self):
+        self._index = None
+        super().clear()
+
+    def sort(self, *args, **kwargs):
+        self._index = None
+        super().sort(*args, **kwargs)
+
+    def reverse(self):
+        self._index = None
+        super().reverse()
+
+    def __setitem__(self, key, value):
+        self._index = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._index = None
+        super().__delitem__(key)
+
+    def __iadd__(self, iterable):
+        self._index = None
+        return super().__iadd__(iterable)
+
+    def __imul__(self, n):
+        self._index = None
+        return super().__imul__(n)
+
+    @contextmanager
+    def indexed(self):
+        """!
+        Context manager, search my items by fds_label through a label index.
+        The index is built when first needed, and dropped when self is changed.
+        Removed items are replaced by None tombstones, so that the positions
+        in the index stay valid, and are purged on exit.
+        """
+        if self._use_index:  # nested
+            yield self
+            return
+        self._use_index = True
+        try:
+            yield self
+        finally:
+            self._use_index = False
+            self._index = None
+            if any(item is None for item in super().__iter__()):
+                super().__setitem__(
+                    slice(None),
+                    [item for item in super().__iter__() if item is not None],
+                )
+
+    def _get_index(self, cls):
+        """!
+        Get my label index, if available.
+        @param cls: class of the searched items, FDSNamelist or FDSParam,
+        or None for any of them.
+        @return dict {fds_label: list of positions}, or None.
+        """
+        if not self._use_index:
+            return None
+        if self._index is None:
+            # Only flat lists of FDSNamelist or FDSParam are indexed
+            index, index_cls = dict(), None
+            for i, item in enumerate(self):
+                match item:
+                    case None:
+                        continue
+                    case FDSNamelist() | FDSParam():
+                        item_cls = (
+                            FDSParam if isinstance(item, FDSParam) else FDSNamelist
+                        )
+                        if index_cls not in (None, item_cls):
+                            index_cls = False
+                            break
+                        index_cls = item_cls
+                        index.setdefault(item.fds_label, list()).append(i)
+                    case _:
+                        index_cls = False
+                        break
+            self._index = index_cls, index
+        index_cls, index = self._index
+        if index_cls is False:
+            return None
+        if cls is None or index_cls is None or index_cls is cls:
+            return index
+
+    def _pop_indexed(self, index, fds_label, remove, first=False):
+        """!
+        Get my items with fds_label from the label index.
+        @param index: the label index.
+        @param fds_label: label of the items.
+        @param remove: if True, replace the items by None tombstones.
+        @param first: if True, get only the first item.
+        @return list of items.
+        """
+        positions = index.get(fds_label)
+        if not positions:
+            return list()
+        if first:
+            positions, rest = positions[:1], positions[1:]
+        else:
+            rest = None
+        items = [super(FDSList, self).__getitem__(i) for i in positions]
+        if remove:
+            for i in positions:
+                super(FDSList, self).__setitem__(i, None)  # keep the index
+            if rest:
+                index[fds_label] = rest
+            else:
+                del index[fds_label]
+        return items
+
     def __contains__(self, fds_label) -> bool:
         """!Check if fds_label is in self."""
+        index = self._get_index(cls=None)
+        if index is not None:
+            return fds_label in index
         for item in self:
             match item:
                 case FDSNamelist() | FDSParam():
@@ -68,6 +214,10 @@ class FDSList(list):
 
     def get_fds_namelist(self, fds_label=None, remove=False):
         """!Get first FDSNamelist instance in self."""
+        index = self._get_index(cls=FDSNamelist) if fds_label else None
+        if index is not None:
+            items = self._pop_indexed(index, fds_label, remove=remove, first=True)
+            return items[0] if items else None
         for i, item in enumerate(self):
             match item:
                 case FDSNamelist():
@@ -83,6 +233,10 @@ class FDSList(list):
 
     def get_fds_param(self, fds_label=None, remove=False):
         """!Get first FDSParam instance in self."""
+        index = self._get_index(cls=FDSParam) if fds_label else None
+        if index is not None:
+            items = self._pop_indexed(index, fds_label, remove=remove, first=True)
+            return items[0] if items else None
         for i, item in enumerate(self):
             match item:
                 case FDSParam():
@@ -99,6 +253,9 @@ class FDSList(list):
 
     def get_fds_namelists(self, fds_label=None, remove=False):
         """!Get FDSList of all my FDSNamelist instances."""
+        index = self._get_index(cls=FDSNamelist) if fds_label else None
+        if index is not None:
+            return FDSList(self._pop_indexed(index, fds_label, remove=remove))
         indexes, items = list(), FDSList()
         for i, item in enumerate(self):
             match item:
@@ -117,6 +274,9 @@ class FDSList(list):
 
     def get_fds_params(self, fds_label=None, remove=False):
         """!Get FDSList of all my FDSParam instances."""
+        index = self._get_index(cls=FDSParam) if fds_label else None
+        if index is not None:
+            return FDSList(self._pop_indexed(index, fds_label, remove=remove))
         indexes, items = list(), FDSList()
         for i, item in enumerate(self):
             match item:
@@ -147,10 +307,7 @@ class FDSList(list):
                 case FDSMulti():
                     if multi_ps:
                         raise ValueError("Only one FDSMulti in FDSNamelist.")
-                    multi_ps = item
-                    # Replace generators
-                    for i, item in enumerate(multi_ps):
-                        multi_ps[i] = tuple(item)  # break if None
+                    multi_ps = item  # of generators, expanded lazily
                 case FDSNamelist():
                     add_ns.append(item)
                 case FDSList():
@@ -167,55 +324,43 @@ class FDSList(list):
                     raise ValueError(f"Unrecognized type of <{item!r}> in <{self!r}>")
         return ps, multi_ps, add_ns
 
+    def iter_lines(self):
+        """!
+        Generate the FDS formatted text, one non-empty block at a time.
+        Blocks are messages, headers, or namelists, to be joined by newlines.
+        """
+        header = self.header  # only if self is not empty
+        for line in itertools.chain(
+            self.msgs, itertools.chain.from_iterable(i.iter_lines() for i in self)
+        ):
+            if not line:
+                continue  # rm empty bodies
+            if header:
+                yield header
+                header = None
+            yield line
+
+    def write_to(self, stream) -> None:
+        """!
+        Write the FDS formatted text to stream, without building it in memory.
+        @param stream: text stream (eg. a buffered file).
+        """
+        separator = ""
+        for line in self.iter_lines():
+            stream.write(separator)
+            stream.write(line)
+            separator = "\n"
+
     def to_string(self) -> str:
         """!
         Return the FDS formatted string.
         """
-        body = list()
-        body.extend(self.msgs)
-        body.extend(item.to_string() for item in self)
-        body = "\n".join(b for b in body if b)  # rm empty bodies
-        if self.header and body:
-            body = "\n".join((self.header, body))
-        return body
-
-    # scan f90_namelists
-    _RE_SCAN_F90_NAMELISTS = re.compile(
-        r"""
-        ^&                    # & at the beginning of the line
-        ([A-Z][A-Z0-9]{3})    # namelist label (group 0)
-        [,\s\t]               # 1 separator
-        (                     # namelist params (group 1)
-        (?:'.*?'|".*?"|.*?)*  # 0+ any char, protect quoted strings, greedy
-        )                     # (separators are stripped later)
-        /                     # / end char
-        """,
-        re.VERBOSE | re.DOTALL | re.IGNORECASE | re.MULTILINE,
-    )  # MULTILINE, so that ^ is the beginning of each line
-
-    # scan f90_params
-    _RE_SCAN_F90_PARAMS = re.compile(
-        r"""
-        ([A-Z][A-Z0-9_\(\):,]*?)  # label (group 0)
-        [,\s\t]*                  # 0+ separators
-        =                         # = sign
-        [,\s\t]*                  # 0+ separators
-        (                         # value (group 1)
-            (?:'.*?'|".*?"|.+?)*?     # 1+ any char, protect str, not greedy
-                (?=                       # end previous match when:
-                    (?:                       # there is another label:
-                        [,\s\t]+                  # 1+ separators
-                        [A-Z][A-Z0-9_\(\):,]*?    # label
-                        [,\s\t]*                  # 0+ separators
-                        =                         # = sign
-                    )
-                |                         # or
-                    $                         # it is end of line
-                )
-        )
-        """,
-        re.VERBOSE | re.DOTALL | re.IGNORECASE,
-    )  # no MULTILINE, so that $ is the end of the file
+        if not profiler.is_active():
+            return "\n".join(self.iter_lines())
+        with profiler.record("format", "to_string"):
+            text = "\n".join(self.iter_lines())
+        profiler.add_size("format", "to_string", len(text))
+        return text
 
     # scan f90_values
     _RE_SCAN_F90_VALUES = re.compile(
@@ -236,56 +381,63 @@ class FDSList(list):
         """!
         Fill self from FDS file or text, on error raise BFException.
         @param f90_namelists: FDS formatted string of namelists, eg. "&OBST ID='Test' /\n&TAIL /".
+        @param f90_params: FDS formatted string of parameters, eg. "ID='Test' XB=1,2,3,4,5,6".
+        @param f90_value: FDS formatted string of a parameter value, eg. "1.,2.,3.".
         """
         self.clear()
 
         if f90_namelists:
-            # Import from F90 case to list of FDSNamelist
-            for match in re.finditer(self._RE_SCAN_F90_NAMELISTS, f90_namelists):
-                label, f90_params = match.groups()
-                fds_namelist = FDSNamelist(fds_label=label)
-                fds_namelist.from_fds(f90_params=f90_params)
-                self.append(fds_namelist)
+            # Import from F90 case to list of FDSNamelist, single pass
+            self.extend(_scan_f90_namelists(f90_namelists))
 
         elif f90_params:
-            # Import from F90 namelist parameters to list of FDSParams
-            # Rm trailing separators and newlines
-            f90_params = " ".join(f90_params.strip(", \t").splitlines())
-            for match in re.finditer(self._RE_SCAN_F90_PARAMS, f90_params):
-                label, f90_value = match.groups()
-                self.append(FDSParam(fds_label=label, f90_value=f90_value))
+            # Import from F90 namelist parameters to list of FDSParams, single pass
+            fds_params, _ = _scan_f90_params(f90_params, pos=0, closed=False)
+            self.extend(fds_params)
 
         elif f90_value:
             # Import from F90 parameter values to list of pyvalues
             # Remove trailing spaces and newlines, then scan values
             f90_value = " ".join(f90_value.strip().splitlines())
-            values = re.findall(self._RE_SCAN_F90_VALUES, f90_value)
-
-            # Eval values
-            for i, v in enumerate(values):
-                if v in (".TRUE.", "T"):
-                    values[i] = True
-                elif v in (".FALSE.", "F"):
-                    values[i] = False
-                else:
-                    try:
-                        values[i] = eval(v)
-                    except Exception as err:
-                        msg = f"Malformed FDS file: <{self.fds_label}={f90_value}> (value: <{v}>)\n<{err}>"
-                        raise BFException(self, msg)
-
-            # Post treatment of float
-            if isinstance(values[0], float):  # first value is a float
-                # Get precision
-                match = re.findall(self._RE_SCAN_DECIMAL_POS, f90_value)
-                self.precision = match and max(len(m) for m in match) or 1
-                # Get exponential
-                match = re.findall(self._RE_SCAN_INTEGER, f90_value)
-                if match:
-                    self.exponential = True
-                    self.precision += max(len(m) for m in match) - 1
-
-            # Record
+            self._from_f90_words(
+                words=re.findall(self._RE_SCAN_F90_VALUES, f90_value),
+                f90_value=f90_value,
+            )
+
+    def _from_f90_words(self, words, f90_value) -> None:
+        """!
+        Fill self with the pyvalues of the scanned f90 value words, on error raise BFException.
+        @param words: list of f90 value words, eg. ["1.", "'Test'", ".TRUE."].
+        @param f90_value: the f90 value string containing the words, eg. "1.,'Test',.TRUE.".
+        """
+        # Convert values, long homogeneous numeric values to a compact array
+        values = None
+        if len(words) >= COMPACT_PARAM_LEN:
+            values = _f90_words_to_array(words)
+        if values is None:
+            values = list()
+            for v in words:
+                try:
+                    values.append(_f90_word_to_py(v))
+                except Exception as err:
+                    msg = f"Malformed FDS file: <{self.fds_label}={f90_value}> (value: <{v}>)\n<{err}>"
+                    raise BFException(self, msg)
+
+        # Post treatment of float
+        if isinstance(values[0], float):  # first value is a float
+            # Get precision
+            match = self._RE_SCAN_DECIMAL_POS.findall(f90_value)
+            self.precision = match and max(len(m) for m in match) or 1
+            # Get exponential
+            match = self._RE_SCAN_INTEGER.findall(f90_value)
+            if match:
+                self.exponential = True
+                self.precision += max(len(m) for m in match) - 1
+
+        # Record
+        if isinstance(values, np.ndarray):
+            self.set_value(values)
+        else:
             self.extend(values)
 
 
@@ -298,6 +450,30 @@ class FDSMulti(FDSList):
         raise Exception("Not implemented.")
 
 
+class FDSFragment(FDSList):
+    """!
+    FDSList of a preformatted FDS text, used in place of its namelists.
+    """
+
+    def __init__(self, text, iterable=(), ref_ids=()) -> None:
+        """!
+        Class constructor.
+        @param text: FDS formatted text.
+        @param iterable: FDSNamelist instances kept for inspection (eg. labels).
+        @param ref_ids: IDs referenced by the text (eg. SURF_ID).
+        """
+        super().__init__(iterable=iterable)
+        ## FDS formatted text
+        self.text = text
+        ## IDs referenced by the text
+        self.ref_ids = frozenset(ref_ids)
+
+    def iter_lines(self):
+        """Generate the preformatted text, not the namelists."""
+        if self.text:
+            yield self.text
+
+
 class FDSNamelist(FDSList):
     """!
     List representing an FDS namelist.
@@ -329,41 +505,58 @@ class FDSNamelist(FDSList):
     def clone(self):
         return FDSNamelist(fds_label=self.fds_label, iterable=self, msgs=self.msgs)
 
-    def get_flat_ns(self):
-        """Generate a flattened list of FDSNamelist instances."""
-        ns = FDSList()
+    def _get_flat_parts(self):
+        """!
+        Flatten self, the FDSMulti is expanded lazily.
+        @return the FDSMulti msgs, the generator of flat FDSNamelist instances,
+        and the invariant params shared by all the expanded multiples.
+        """
         ps, multi_ps, add_ns = self._get_flat_components()
         # Treat ps and multi_ps related to self
         self.clear()
         if multi_ps:
-            # Rm duplicated ps
-            for mp in multi_ps:
-                fds_label = mp[0].fds_label  # break if mp empty
-                ps.get_fds_param(fds_label=fds_label, remove=True)
-            # Get FDSMulti msgs, before deletion
-            ns.msgs.extend(multi_ps.msgs)
-            # Zip multi_ps
-            multi_ps = list(zip(*(mp for mp in multi_ps if mp)))
-            # Extend with invariant parameters: mp + ps
-            for i, mp in enumerate(multi_ps):
-                multi_ps[i] = list(mp)
-                multi_ps[i].extend(ps)
-            # Build multi namelists and save them
+            columns = list()
             for mp in multi_ps:
-                n = self.clone()
-                n.extend(mp)
-                ns.append(n)
+                mp = iter(mp)  # break if None
+                first = next(mp, None)
+                if first is None:
+                    raise ValueError(f"Empty FDSMulti in <{self!r}>")
+                # Rm duplicated ps
+                ps.get_fds_param(fds_label=first.fds_label, remove=True)
+                columns.append(itertools.chain((first,), mp))
+            # Zip multi_ps, extend with invariant parameters: mp + ps
+            ns = self._iter_multi_ns(zip(*columns), ps)
+            msgs, shared_ps = multi_ps.msgs, ps
         else:
             # Rebuild depurated self
             self.extend(ps)
-            ns.append(self)
+            ns = (self,)
+            msgs, shared_ps = (), ()
         # Treat add_ns additional namelists
-        for add_n in add_ns:
-            ns.extend(add_n.get_flat_ns())
-        return ns
+        ns = itertools.chain(
+            ns, itertools.chain.from_iterable(n._get_flat_parts()[1] for n in add_ns)
+        )
+        return msgs, ns, shared_ps
 
-    def _flat_n_to_string(self, n) -> str:
-        """Get string representation of flat namelist."""
+    def _iter_multi_ns(self, multi_ps, ps):
+        """Generate multi namelists, one at a time."""
+        for mp in multi_ps:
+            n = self.clone()
+            n.extend(mp)
+            n.extend(ps)
+            yield n
+
+    def get_flat_ns(self):
+        """Generate a flattened list of FDSNamelist instances."""
+        msgs, ns, _ = self._get_flat_parts()
+        return FDSList(iterable=ns, msgs=msgs)
+
+    def _flat_n_to_string(self, n, strings=None) -> str:
+        """!
+        Get string representation of flat namelist.
+        @param n: flat FDSNamelist.
+        @param strings: dict of preformatted values {id(p): p._to_strings()}.
+        """
         body = list()
 
         # Add namelist and param msgs
@@ -372,39 +565,54 @@ class FDSNamelist(FDSList):
         if msg:
             body.append(msg)
 
-        # Add namelist
-        body.append(f"&{self.fds_label}")
+        # Add namelist, the current line is kept as a list of words
+        # and its length is tracked, each line is joined once
+        words, size = [f"&{self.fds_label}"], len(self.fds_label) + 1
         for p in n:
-            fds_label, fds_values = p.fds_label, p._to_strings()
+            fds_label = p.fds_label
+            fds_values = strings.get(id(p)) if strings else None
+            if fds_values is None:
+                fds_values = p._to_strings()
+            is_long = False
             if not fds_values:
                 # fds_label only provided, probably preformatted (eg. BFParamOther)
-                body = append_word(body, word=fds_label)
+                word = fds_label
             else:
                 # fds_label and its values provided
                 word = f"{fds_label}={','.join(fds_values)}"
-                if len(word) <= MAXLEN - INDENT or len(fds_values) == 1:
-                    # short param, keep together
-                    body = append_word(body, word=word)
-                else:
+                if len(word) > MAXLEN - INDENT and len(fds_values) > 1:
                     # long param, split in lines
-                    body = append_word(
-                        body, word=f"{fds_label}={fds_values[0]},"
-                    )  # first
-                    for v in fds_values[1:-1]:
-                        body = append_word(body, word=f"{v},", separator="")
-                    body = append_word(
-                        body, word=f"{fds_values[-1]}", separator=""
-                    )  # last
-        body[-1] += " /"  # close
+                    word, is_long = f"{fds_label}={fds_values[0]},", True  # first
+            if size + 1 + len(word) <= MAXLEN:
+                words.extend((" ", word))
+                size += 1 + len(word)
+            else:
+                body.append("".join(words))
+                words, size = [" " * INDENT, word], INDENT + len(word)
+            if is_long:
+                words, size = _wrap_values(body, words, size, fds_values)
+        words.append(" /")  # close
+        body.append("".join(words))
         return "\n".join(body)
 
-    def to_string(self) -> str:
-        """Get string representation."""
-        ns = self.get_flat_ns()
-        if len(ns) == 1:
-            return self._flat_n_to_string(ns[0])
-        else:
-            return ns.to_string()
+    def iter_lines(self):
+        """Generate the string representation of the flattened namelists."""
+        msgs, ns, shared_ps = self._get_flat_parts()
+        first, second = next(ns, None), next(ns, None)
+        if first is not None and second is None:
+            yield self._flat_n_to_string(first)
+            return
+        yield from (m for m in msgs if m)
+        if first is None:
+            return
+        # Each multiple is built, serialized and dropped in turn,
+        # the invariant params are formatted once
+        strings = {id(p): p._to_strings() for p in shared_ps}
+        for n in itertools.chain((first, second), ns):
+            if all(isinstance(p, FDSParam) for p in n):  # already flat
+                yield n._flat_n_to_string(n, strings=strings)
+            else:
+                yield from n.iter_lines()
 
 
 class FDSParam(FDSList):
@@ -440,6 +648,8 @@ class FDSParam(FDSList):
         self.precision = precision
         ## if True sets exponential representation of floats
         self.exponential = exponential
+        ## compact np.array of numeric values, replacing the list items
+        self.array = None
         # Init
         super().__init__(iterable=iterable, f90_value=f90_value, msgs=msgs, msg=msg)
         # Set parameter value from f90_value
@@ -450,10 +660,36 @@ class FDSParam(FDSList):
         iterable = ",".join(str(item) for item in self)
         return f"{self.__class__.__name__}({self.fds_label}, {iterable})"
 
+    # The compact array replaces the list items
+
+    def __len__(self):
+        if self.array is not None:
+            return len(self.array)
+        return super().__len__()
+
+    def __iter__(self):
+        if self.array is not None:
+            return iter(self.array.tolist())
+        return super().__iter__()
+
+    def __getitem__(self, key):
+        if self.array is not None:
+            value = self.array[key]
+            if isinstance(value, np.ndarray):
+                return value  # slice
+            return value.item()
+        return super().__getitem__(key)
+
+    def clear(self):
+        self.array = None
+        super().clear()
+
     def get_value(self):
         """!
-        Return value from self.values.
+        Return value from self.values, or the compact np.array.
         """
+        if self.array is not None:
+            return self.array
         if not self:
             return None
         if len(self) == 1:
@@ -462,12 +698,14 @@ class FDSParam(FDSList):
 
     def set_value(self, value=None) -> None:
         """!
-        Set self.values from value.
+        Set self.values from value, a np.array is kept as compact array.
         """
         self.clear()
         match value:
             case None:
                 pass
+            case np.ndarray():
+                self.array = value.ravel()
             case int() | float() | str():
                 self.append(value)
             case _:
@@ -479,22 +717,23 @@ class FDSParam(FDSList):
         """
         if not len(self):  # no content
             return tuple()
-        match self[0]:
+        values = self if self.array is None else self.array.tolist()
+        match values[0]:
             case float():
-                if self.exponential:
-                    return tuple(f"{v:.{self.precision}E}" for v in self)
-                else:
-                    return tuple(
-                        f"{round(v,self.precision):.{self.precision}f}" for v in self
-                    )
+                return _format_floats(values, self.precision, self.exponential)
             case str():
-                return tuple("'" in v and f'"{v}"' or f"'{v}'" for v in self)
+                return tuple("'" in v and f'"{v}"' or f"'{v}'" for v in values)
             case bool():  # always before int
-                return tuple(v and "T" or "F" for v in self)
+                return tuple(v and "T" or "F" for v in values)
             case int():
-                return tuple(str(v) for v in self)
+                return tuple(str(v) for v in values)
             case _:
-                raise ValueError(f"Unknown value type <{self[0]}> in {self}")
+                raise ValueError(f"Unknown value type <{values[0]}> in {self}")
+
+    def iter_lines(self):
+        line = self.to_string()
+        if line:
+            yield line
 
     def to_string(self) -> str:  # used by SN_MULT and SN_MOVE when importing
         """!
@@ -506,3 +745,421 @@ class FDSParam(FDSList):
                 return f"{self.fds_label}={v}"
             else:  # "ABC"
                 return self.fds_label
+
+
+# Batch formatting of float values.
+# "%.3f" % v gives the same string of f"{round(v,3):.3f}",
+# as round() and formatting are both correctly rounded, including -0.000.
+# Not true for np.float64, rounded by numpy, so formatted one at a time.
+
+_BATCH_FLOAT_TYPES = frozenset((float, int, bool))
+
+
+def _wrap_values(body, words, size, fds_values):
+    """!
+    Wrap the values of a long param, following its first value.
+    @param body: list of the completed lines, appended in place.
+    @param words: list of words of the current line.
+    @param size: length of the current line.
+    @param fds_values: formatted values of the long param.
+    @return the words and the length of the new current line.
+    """
+    # The following values are joined once, then cut at value boundaries
+    # so that each line is built from a single slice
+    text = ",".join(fds_values[1:])
+    stop = len(text)
+    if text.count(",") == len(fds_values) - 2:
+        ends = None  # commas separate values only
+    else:  # some string value contains commas, use the value boundaries
+        ends = list(
+            itertools.accumulate((len(v) + 1 for v in fds_values[1:]), initial=0)
+        )
+        ends[-1] -= 1  # no comma after the last value
+    start = 0
+    while start < stop:
+        limit = start + MAXLEN - size
+        if stop <= limit:
+            end = stop
+        elif limit <= start:
+            end = start  # line already full
+        elif ends is None:
+            end = text.rfind(",", start, limit) + 1
+        else:
+            end = ends[bisect.bisect_right(ends, limit) - 1]
+        if end <= start:
+            # break the line, the value goes to the next one anyway
+            body.append("".join(words))
+            if ends is None:
+                end = text.find(",", start) + 1 or stop
+            else:
+                end = ends[bisect.bisect_right(ends, start)]
+            words, size = [" " * INDENT], INDENT
+        words.append(text[start:end])
+        size += end - start
+        start = end
+    return words, size
+
+
+def _format_floats(values, precision, exponential) -> tuple:
+    """!
+    Format a sequence of float values at once, same as one at a time.
+    @param values: sequence of float values.
+    @param precision: float precision, number of decimal digits.
+    @param exponential: if True sets exponential representation of floats.
+    @return tuple of FDS formatted values.
+    """
+    if exponential:
+        f = f"%.{precision}E,"
+    elif _BATCH_FLOAT_TYPES.issuperset(map(type, values)):
+        f = f"%.{precision}f,"
+    else:
+        return tuple(f"{round(v,precision):.{precision}f}" for v in values)
+    return tuple(((f * len(values)) % tuple(values))[:-1].split(","))
+
+
+# Single-pass scanner of f90 namelists.
+# The text between namelists (eg. comments) is skipped by searching
+# the next namelist start, then the namelist tokens are consumed
+# by a small state machine up to the / end char outside quoted strings.
+# Each token is visited once, no lookahead, no eval of common values.
+
+# scan namelist start
+_RE_SCAN_F90_START = re.compile(
+    r"""
+    ^&                    # & at the beginning of the line
+    ([A-Z][A-Z0-9]{3})    # namelist label (group 1)
+    [,\s\t]               # 1 separator
+    """,
+    re.VERBOSE | re.IGNORECASE | re.MULTILINE,
+)  # MULTILINE, so that ^ is the beginning of each line
+
+# scan namelist tokens, the token type is its match.lastindex
+_RE_SCAN_F90_TOKENS = re.compile(
+    r"""
+    [,\s\t]*                                 # 0+ separators
+    (?:
+        ('[^']*'|"[^"]*")                       # quoted string (group 1)
+        |(=)                                    # = sign (group 2)
+        |(/)                                    # / end char (group 3)
+        |((?:[^,\s\t='"/(]+|\([^)/]*\)|['"(])+)  # word, protect indexes (group 4)
+    )
+    """,
+    re.VERBOSE,
+)
+
+# check param label
+_RE_SCAN_F90_LABEL = re.compile(r"[A-Z][A-Z0-9_\(\):,]*\Z", re.IGNORECASE)
+
+# chars of f90 int or float words
+_F90_NUMBER_CHARS = frozenset("0123456789+-.eE")
+
+
+def _f90_word_to_py(v):
+    """!
+    Return the pyvalue of an f90 value word, on error raise an Exception.
+    @param v: f90 value word, eg. "1.", "'Test'", ".TRUE.".
+    @return the pyvalue.
+    """
+    if v in (".TRUE.", "T"):
+        return True
+    if v in (".FALSE.", "F"):
+        return False
+    c = v[0]
+    if c in "'\"":
+        # Plain quoted string
+        if len(v) > 1 and v[-1] == c and c not in v[1:-1] and "\\" not in v:
+            return v[1:-1]
+    elif _F90_NUMBER_CHARS.issuperset(v):
+        # Plain int or float
+        try:
+            return int(v)
+        except ValueError:
+            try:
+                return float(v)
+            except ValueError:
+                pass
+    return eval(v)  # uncommon words only, eg. escaped strings
+
+
+def _f90_words_to_array(words):
+    """!
+    Return the compact np.array of homogeneous numeric f90 value words.
+    @param words: list of f90 value words, eg. ["1.", "2.", "3."].
+    @return the np.array, or None if the words are not homogeneous numeric.
+    """
+    try:
+        match _f90_word_to_py(words[0]):
+            case bool():
+                return None
+            case float():
+                return np.array(words, dtype=np.float64)
+            case int():
+                return np.array(words, dtype=np.int64)
+    except Exception:
+        return None  # eg. malformed, bool, or str words
+
+
+def _get_f90_param(fds_label, words):
+    """!
+    Return the FDSParam from its fds_label and f90 value words.
+    @param fds_label: the parameter label.
+    @param words: list of the f90 value words.
+    @return the FDSParam.
+    """
+    fds_param = FDSParam(fds_label=fds_label)
+    if words:
+        fds_param._from_f90_words(words=words, f90_value=",".join(words))
+    return fds_param
+
+
+def _scan_f90_params(f90, pos, closed, partial=False):
+    """!
+    Scan f90 string for parameters, on error raise BFException.
+    @param f90: the f90 string.
+    @param pos: start position in f90.
+    @param closed: if True, the params are closed by the / end char.
+    @param partial: if True, f90 is a partial chunk, and unclosed quotes are not closed.
+    @return the list of FDSParam (None if not closed) and the end position in f90.
+    """
+    fds_params, fds_label, words, is_word = list(), None, list(), False
+    for token in _RE_SCAN_F90_TOKENS.finditer(f90, pos):
+        match token.lastindex:
+            case 1:  # quoted string, join multiline
+                words.append(" ".join(token.group(1).splitlines()))
+                is_word = False
+                continue
+            case 2:  # = sign, the previous word is a label
+                if is_word and _RE_SCAN_F90_LABEL.match(words[-1]):
+                    label = words.pop()
+                    if fds_label:
+                        fds_params.append(_get_f90_param(fds_label, words))
+                    fds_label, words, is_word = label, list(), False
+                    continue
+            case 3:  # / end char
+                if closed:
+                    if fds_label:
+                        fds_params.append(_get_f90_param(fds_label, words))
+                    return fds_params, token.end()
+            case None:  # trailing separators
+                continue
+            case 4:  # word, an unclosed quote may end in the next chunk
+                if partial and ("'" in token.group(4) or '"' in token.group(4)):
+                    return None, len(f90)
+        words.append(token.group(token.lastindex))  # value words
+        is_word = token.lastindex == 4
+    if closed:
+        return None, len(f90)
+    if fds_label:
+        fds_params.append(_get_f90_param(fds_label, words))
+    return fds_params, len(f90)
+
+
+def _scan_f90_namelists(f90):
+    """!
+    Scan f90 string for namelists, on error raise BFException.
+    @param f90: the f90 string.
+    @return generator of FDSNamelist.
+    """
+    pos = 0
+    while True:
+        match = _RE_SCAN_F90_START.search(f90, pos)
+        if not match:
+            return
+        fds_params, pos = _scan_f90_params(f90, pos=match.end(), closed=True)
+        if fds_params is None:
+            return  # namelist not closed
+        yield FDSNamelist(fds_label=match.group(1), iterable=fds_params)
+
+
+def _iter_f90_namelists(chunks):
+    """!
+    Scan the f90 chunks, and generate FDSNamelist instances one at a time.
+    Only the unscanned text is kept in memory, on error raise BFException.
+    @param chunks: iterable of f90 text chunks.
+    @return generator of FDSNamelist.
+    """
+    f90, pos, buffered = "", 0, list()
+    for chunk in itertools.chain(chunks, (None,)):
+        # Read chunks until a namelist could be closed
+        is_eof = chunk is None
+        if not is_eof:
+            buffered.append(chunk)
+            if "/" not in chunk:
+                continue
+        f90 = "".join((f90, *buffered))
+        buffered.clear()
+        # Scan complete namelists
+        while True:
+            match = _RE_SCAN_F90_START.search(f90, pos)
+            if not match:
+                pos = max(pos, f90.rfind("\n", pos) + 1)  # keep a partial label
+                break
+            fds_params, end = _scan_f90_params(
+                f90, pos=match.end(), closed=True, partial=not is_eof
+            )
+            if fds_params is None:
+                pos = match.start()  # not closed, read more
+                break
+            yield FDSNamelist(fds_label=match.group(1), iterable=fds_params)
+            pos = end
+        # Rm scanned text, keep the previous char for the ^ line start
+        keep = max(pos - 1, 0)
+        f90, pos = f90[keep:], pos - keep
+
+
+# Parallel scanner of f90 namelists.
+# The f90 text is split in pieces at the namelist starts, by a cheap pre-scan.
+# The pieces are scanned by worker processes, and the results merged in order.
+# A namelist start inside a multiline quoted string is a false split:
+# the previous piece ends with an unclosed namelist, so the scan continues serially.
+
+
+# Max length of a namelist start, eg. "\n&OBST ", for rescanning the text tail
+_F90_START_LEN = 7
+
+
+def _rfind_f90_start(f90, start=0):
+    """!
+    Get the position of the last namelist start in f90.
+    @param f90: the f90 string.
+    @param start: the position where the search starts, as f90[:start] was searched.
+    @return the position, or -1 if not found.
+    """
+    i = len(f90)
+    while (i := f90.rfind("\n&", start, i)) >= 0:
+        if _RE_SCAN_F90_START.match(f90, i + 1):
+            return i + 1
+    return -1
+
+
+def _scan_f90_piece(f90, partial):
+    """!
+    Scan a piece of f90 text in a worker process, on error raise BFException.
+    @param f90: the f90 piece, starting at a namelist start.
+    @param partial: if True, f90 is followed by other pieces.
+    @return the list of scanned namelists, as compact tuples for fast transfer,
+    and the position of the unclosed namelist (None if all closed).
+    """
+    ns, pos = list(), 0
+    while match := _RE_SCAN_F90_START.search(f90, pos):
+        fds_params, pos = _scan_f90_params(
+            f90, pos=match.end(), closed=True, partial=partial
+        )
+        if fds_params is None:
+            return ns, match.start()
+        ps = tuple(
+            (
+                p.fds_label,
+                tuple(p) if p.array is None else p.array,
+                p.precision,
+                p.exponential,
+            )
+            for p in fds_params
+        )
+        ns.append((match.group(1), ps))
+    return ns, None
+
+
+def _get_f90_namelist(n):
+    """!
+    Return the FDSNamelist from its compact tuple, see _scan_f90_piece().
+    """
+    fds_label, ps = n
+    return FDSNamelist(
+        fds_label=fds_label,
+        iterable=(
+            FDSParam(fds_label=l, value=v, precision=p, exponential=e)
+            for l, v, p, e in ps
+        ),
+    )
+
+
+def _iter_f90_namelists_parallel(chunks, max_workers):
+    """!
+    Scan the f90 chunks in parallel, and generate FDSNamelist instances in order.
+    @param chunks: iterator of f90 text chunks.
+    @param max_workers: number of worker processes.
+    @return generator of FDSNamelist.
+    """
+    # Fork, as the workers cannot import bpy
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("fork")
+    )
+    try:
+        pending = deque()  # pending (future, piece, partial)
+        f90, buffered, start = "", list(), 0
+        for chunk in itertools.chain(chunks, (None,)):
+            # Split a piece at the last namelist start
+            if chunk is None:
+                piece, f90, partial = "".join((f90, *buffered)), "", False
+                buffered.clear()
+            else:
+                # Join and search only new text with a namelist start,
+                # so that a long namelist is not scanned again at each chunk
+                buffered.append(chunk)
+                if "&" not in chunk:
+                    continue
+                f90 = "".join((f90, *buffered))
+                buffered.clear()
+                i = _rfind_f90_start(f90, start=start)
+                if i <= 0:
+                    start = max(len(f90) - _F90_START_LEN, 0)
+                    continue
+                piece, f90, partial = f90[:i], f90[i:], True
+                start = max(len(f90) - _F90_START_LEN, 0)
+            if piece:
+                future = executor.submit(_scan_f90_piece, piece, partial)
+                pending.append((future, piece, partial))
+            # Merge in order, limit the pieces in memory
+            while pending and (chunk is None or len(pending) > 2 * max_workers):
+                future, piece, partial = pending.popleft()
+                ns, pos = future.result()
+                yield from (_get_f90_namelist(n) for n in ns)
+                if partial and pos is not None:
+                    # False split, continue serially from the unclosed namelist
+                    log.debug("Unclosed namelist in parallel scan, continue serially")
+                    for future, _, _ in pending:
+                        future.cancel()
+                    yield from _iter_f90_namelists(
+                        itertools.chain(
+                            (piece[pos:],), (p for _, p, _ in pending), (f90,), chunks
+                        )
+                    )
+                    return
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _get_max_workers(filepath):
+    """!
+    Get the number of worker processes for scanning the FDS case file.
+    @param filepath: filepath of the FDS case file.
+    @return the number of workers, 1 for serial scanning.
+    """
+    if sys.platform != "linux":  # fork is unavailable or unsafe
+        return 1
+    if os.path.getsize(filepath) < PARALLEL_READ_MIN_SIZE:
+        return 1
+    return PARALLEL_READ_MAX_WORKERS or os.cpu_count() or 1
+
+
+def iter_fds_namelists(filepath, chunk_size=READ_CHUNK_SIZE, max_workers=1):
+    """!
+    Read the FDS case file in chunks, and generate its FDSNamelist instances one at a time.
+    Only the unscanned text is kept in memory, on error raise BFException.
+    The parallel scan is opt-in: its workers are forked from the running process,
+    as they cannot import bpy, and forking a multithreaded process
+    (eg. Blender) can deadlock the workers.
+    @param filepath: filepath of the FDS case file.
+    @param chunk_size: size of the read chunks, chars.
+    @param max_workers: number of worker processes, 1 for serial scanning,
+    None for automatic (parallel for large files on Linux only).
+    @return generator of FDSNamelist.
+    """
+    if max_workers is None:
+        max_workers = _get_max_workers(filepath)
+    chunks = iter_txt_file(filepath, chunk_size)
+    if max_workers > 1:
+        yield from _iter_f90_namelists_parallel(chunks, max_workers=max_workers)
+    else:
+        yield from _iter_f90_namelists(chunks)
@@ -1,5 +1,17 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from . import geometry, io, gis, ui, binpacking, run, text
+from . import (
+    geometry,
+    io,
+    gis,
+    ui,
+    binpacking,
+    run,
+    text,
+    cache,
+    profiler,
+    refs,
+    voxel_cache,
+)
 
 # Nothing to register here
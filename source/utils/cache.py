@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, cache of the exported FDS text of Blender Objects.
+"""
+
+from bpy.types import ID, PropertyGroup
+from .. import config
+from . import refs
+
+# Cache of the FDS text of Objects, {session_uid: (key, FDSFragment)}
+_ob_fds_fragments = dict()
+
+# Identifiers of BFDS properties by RNA type, {rna identifier: identifiers}
+_bf_identifiers = dict()
+
+
+def _get_value(value):
+    """!
+    Get a comparable copy of a Blender property value.
+    """
+    match value:
+        case ID():
+            return value.name
+        case PropertyGroup():
+            return tuple(
+                _get_value(getattr(value, p.identifier))
+                for p in value.bl_rna.properties
+                if p.identifier != "rna_type"
+            )
+        case str() | int() | float() | None:
+            return value
+        case _ if hasattr(value, "__len__"):  # arrays, collections, mathutils
+            return tuple(_get_value(v) for v in value)
+    return value
+
+
+def _get_bf_values(element):
+    """!
+    Get the values of the BFDS properties of a Blender element.
+    @param element: Blender Object, Mesh, Scene, ...
+    @return tuple of comparable values.
+    """
+    rna = element.bl_rna
+    identifiers = _bf_identifiers.get(rna.identifier)
+    if identifiers is None:
+        identifiers = _bf_identifiers[rna.identifier] = tuple(
+            p.identifier
+            for p in rna.properties
+            if p.identifier.startswith("bf_")
+            and p.identifier not in {"bf_is_tmp", "bf_has_tmp"}  # service
+        )
+    return tuple(_get_value(getattr(element, i)) for i in identifiers)
+
+
+def get_sc_key(context):
+    """!
+    Get the Scene part of the cache keys, as Object export depends on it.
+    @param context: the Blender context.
+    @return comparable key.
+    """
+    sc = context.scene
+    return sc.name, sc.unit_settings.scale_length, _get_bf_values(sc)
+
+
+def get_ob_fds_list(context, ob, sc_key):
+    """!
+    Get the FDSList of an Object, its FDS text is cached until it is changed.
+    The cache is keyed on the Object, its BFDS properties, its Materials and the Scene,
+    geometry and transform changes are caught by rm_ob_fds_cache().
+    @param context: the Blender context.
+    @param ob: the Blender Object.
+    @param sc_key: Scene part of the cache key, from get_sc_key().
+    @return the FDSList, or the FDSFragment of the cached text.
+    """
+    from ..types import FDSList, FDSFragment, FDSNamelist
+
+    if (
+        not config.OB_FDS_CACHE
+        or ob.hide_render
+        or ob.bf_is_tmp
+        or ob.type != "MESH"
+        or ob.mode == "EDIT"
+        or ob.bf_namelist_cls in config.OB_FDS_CACHE_SKIP
+    ):
+        return ob.to_fds_list(context=context)
+
+    key = (
+        ob.name,
+        tuple(ob.color),
+        tuple(  # the export checks the referenced Materials (eg. bf_surf_export)
+            (ms.name, ms.material and _get_bf_values(ms.material))
+            for ms in ob.material_slots
+        ),
+        _get_bf_values(ob),
+        ob.data and _get_bf_values(ob.data),
+        sc_key,
+    )
+    cached = _ob_fds_fragments.get(ob.session_uid)
+    if cached and cached[0] == key:
+        refs.add_ref_ids(cached[1].ref_ids)  # as if exported
+        return cached[1]
+
+    _ob_fds_fragments.pop(ob.session_uid, None)
+    fds_list = ob.to_fds_list(context=context)
+    # Keep the namelist labels and references only, the text replaces the namelists
+    fds_namelists = fds_list.get_fds_namelists()
+    fds_fragment = FDSFragment(
+        text=fds_list.to_string(),
+        iterable=(FDSNamelist(fds_label=n.fds_label) for n in fds_namelists),
+        ref_ids=set().union(*(refs.get_ref_ids(n) for n in fds_namelists)),
+    )
+    _ob_fds_fragments[ob.session_uid] = key, fds_fragment
+    return fds_fragment
+
+
+def rm_ob_fds_cache(ob):
+    """!
+    Remove the cached FDS text of an Object, eg. when its geometry is changed.
+    @param ob: the Blender Object.
+    """
+    _ob_fds_fragments.pop(ob.session_uid, None)
+
+
+def rm_ob_fds_caches():
+    """!
+    Remove the cached FDS text of all Objects.
+    """
+    _ob_fds_fragments.clear()
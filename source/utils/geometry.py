@@ -7,6 +7,7 @@ BFDS, geometric utilities.
 # TODO change file name
 
 import bpy, bmesh
+import numpy as np
 from mathutils import Matrix
 from ..types import BFException
 
@@ -38,19 +39,41 @@ def get_sc_collections(context, sc):
 # Working on Blender objects
 
 
-def get_exported_obs(context, obs):
+def get_layer_collection_map(context):
+    """!
+    Map Objects and Collections to their layer_collection in the View Layer, in one pass.
+    As by get_layer_collection(), the first layer_collection found is kept.
+    @param context: the Blender Context.
+    @return dict {Object or Collection: layer_collection}
+    """
+    lc_map = dict()
+    layer_collections = [context.view_layer.layer_collection]
+    while layer_collections:
+        layer_collection = layer_collections.pop()
+        collection = layer_collection.collection
+        lc_map.setdefault(collection, layer_collection)
+        for ob in collection.objects:
+            lc_map.setdefault(ob, layer_collection)
+        layer_collections.extend(reversed(layer_collection.children))  # depth first
+    return lc_map
+
+
+def get_exported_obs(context, obs, lc_map=None):
     """!
     Get generator of all exported Objects in context.
     @param context: the Blender Context.
     @param obs: the pool of Blender Objects to examine (eg. sc.objects)
+    @param lc_map: the layer_collection map from get_layer_collection_map().
     @return generator of exported Objects
     """
+    if lc_map is None:
+        lc_map = get_layer_collection_map(context)
     return (
         ob
         for ob in context.scene.objects
         if ob.type == "MESH"  # no lights, cameras, ...
         and not ob.hide_render  # Object is exported
-        and not ob.get_layer_collection(context).exclude  # visible in the View Layer
+        and not lc_map[ob].exclude  # visible in the View Layer
         and not ob.bf_is_tmp  # not tmp geometry
     )
 
@@ -88,6 +111,54 @@ def get_object_bmesh(
     return bm
 
 
+def get_bmesh_arrays(bm):
+    """!
+    Get the bmesh geometry as plain arrays, in bulk through a tmp Mesh.
+    The arrays can be pickled and used without Blender (eg. by worker processes).
+    @param bm: the bmesh, freed.
+    @return the vertex coordinates, face vertex numbers, face vertex indexes,
+    face normals, and edge vertex indexes, as np.arrays.
+    """
+    me_tmp = bpy.data.meshes.new("tmp")
+    try:
+        bm.to_mesh(me_tmp)
+        bm.free()  # clean up bmesh
+        co = np.empty(3 * len(me_tmp.vertices), dtype=np.float32)
+        me_tmp.vertices.foreach_get("co", co)
+        loop_totals = np.empty(len(me_tmp.polygons), dtype=np.int32)
+        me_tmp.polygons.foreach_get("loop_total", loop_totals)
+        vertex_index = np.empty(len(me_tmp.loops), dtype=np.int32)
+        me_tmp.loops.foreach_get("vertex_index", vertex_index)
+        normals = np.empty(3 * len(me_tmp.polygons), dtype=np.float32)
+        me_tmp.polygons.foreach_get("normal", normals)
+        edges = np.empty(2 * len(me_tmp.edges), dtype=np.int32)
+        me_tmp.edges.foreach_get("vertices", edges)
+    finally:
+        bpy.data.meshes.remove(me_tmp)
+    return (
+        co.astype(np.float64).reshape(-1, 3),  # same as bmesh vertex co
+        loop_totals,
+        vertex_index,
+        normals.astype(np.float64).reshape(-1, 3),
+        edges.reshape(-1, 2),
+    )
+
+
+def get_face_centers(co, loop_totals, vertex_index):
+    """!
+    Get the face centers, same as the mean of the face vertex coordinates.
+    @param co: vertex coordinates, from get_bmesh_arrays().
+    @param loop_totals: face vertex numbers.
+    @param vertex_index: face vertex indexes.
+    @return np.array of face centers: [[x, y, z], ...].
+    """
+    if not len(loop_totals):
+        return np.empty((0, 3))
+    loop_starts = np.cumsum(loop_totals) - loop_totals
+    sums = np.add.reduceat(co[vertex_index], loop_starts, axis=0)
+    return sums / loop_totals[:, np.newaxis]
+
+
 def get_new_object(context, name="New", co=None):
     """!
     Create a new Object
@@ -4,9 +4,12 @@
 BFDS, input/output routines.
 """
 
-import os, bpy, logging
+import os, bpy, json, shutil, hashlib, tempfile, logging, codecs
 from pathlib import Path
+from contextlib import contextmanager
 from ..types import BFException, BFNotImported
+from ..config import WRITE_BUFFER_SIZE, WRITE_SKIP_UNCHANGED, WRITE_MANIFEST_NAME
+from ..config import WRITE_HASH_SKIP, WRITE_SPOOL_SIZE
 
 log = logging.getLogger(__name__)
 
@@ -48,17 +51,267 @@ def read_txt_file(filepath):
     raise UnicodeDecodeError(f"Unknown text encoding in file: <{filepath}>")
 
 
-def write_txt_file(filepath, text=None, force_dir=False):
+def get_txt_file_encoding(filepath, chunk_size=2**20):
+    """!
+    Get the text encoding of filepath, by decoding it in chunks.
+    Same encodings of read_txt_file(), without keeping the decoded text.
+    @return encoding and errors, as used by open().
+    """
+    for e in ("utf8", "windows-1252"):
+        decoder = codecs.getincrementaldecoder(e)()
+        try:
+            with open(filepath, "rb") as f:
+                while chunk := f.read(chunk_size):
+                    decoder.decode(chunk)
+                decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            continue
+        except Exception as err:
+            raise BFException(None, f"Error reading file: <{filepath}>\n{err}")
+        return e, None
+    return "utf8", "ignore"
+
+
+def iter_txt_file(filepath, chunk_size=2**20):
+    """!
+    Read text file from filepath in chunks.
+    @return generator of text chunks.
+    """
+    encoding, errors = get_txt_file_encoding(filepath, chunk_size=chunk_size)
+    try:
+        with open(filepath, "r", encoding=encoding, errors=errors) as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+    except Exception as err:
+        raise BFException(None, f"Error reading file: <{filepath}>\n{err}")
+
+
+# Skip writing unchanged files
+# Each directory has a manifest of the files written by BFDS:
+# {filename: [hash, size, mtime_ns]}
+# A file is unchanged if its hash is equal and it was not touched since
+# (same size and mtime), so that the file itself is never read back.
+
+# Loaded manifests, {dirpath: manifest}, until flushed
+_manifests = dict()
+# Filepaths of the skipped unchanged files, until flushed
+_skipped = list()
+# Depth of the nested write sessions
+_session_depth = 0
+
+
+def _get_manifest(filepath):
+    """!
+    Get the manifest of the directory of filepath, loaded once.
+    """
+    dirpath = os.path.dirname(os.path.abspath(filepath))
+    manifest = _manifests.get(dirpath)
+    if manifest is None:
+        try:
+            with open(os.path.join(dirpath, WRITE_MANIFEST_NAME), "r") as f:
+                manifest = dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            manifest = dict()  # missing or corrupted, rebuilt
+        _manifests[dirpath] = manifest
+    return manifest
+
+
+def _is_unchanged(filepath, digest):
+    """!
+    Check if the file at filepath has the digest, from the manifest.
+    """
+    if not WRITE_SKIP_UNCHANGED:
+        return False
+    entry = _get_manifest(filepath).get(os.path.basename(filepath))
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return False
+    if entry != [digest, st.st_size, st.st_mtime_ns]:
+        return False
+    log.debug(f"Unchanged, skip writing: {filepath}")
+    _skipped.append(filepath)
+    return True
+
+
+def _set_manifest(filepath, digest):
     """!
-    Write text file to filepath.
+    Record the digest of the written file at filepath in the manifest.
     """
+    if not WRITE_SKIP_UNCHANGED:
+        return
+    st = os.stat(filepath)
+    entry = [digest, st.st_size, st.st_mtime_ns]
+    _get_manifest(filepath)[os.path.basename(filepath)] = entry
+
+
+def flush_manifests():
+    """!
+    Write the loaded manifests to their directories, eg. at the end of the export.
+    @return the list of filepaths of the skipped unchanged files.
+    """
+    skipped = list(_skipped)
+    for dirpath, manifest in _manifests.items():
+        if manifest:
+            try:
+                _write_atomic(
+                    os.path.join(dirpath, WRITE_MANIFEST_NAME),
+                    lambda f: json.dump(manifest, f, indent=1, sort_keys=True),
+                )
+            except BFException as err:
+                log.warning(str(err))  # next export writes all files again
+    _manifests.clear()
+    _skipped.clear()
+    return skipped
+
+
+@contextmanager
+def write_session():
+    """!
+    Context manager, for the files written by an export (eg. .fds, .bingeom, .ge1).
+    The outermost session starts with no loaded manifests and skipped files,
+    and flushes the manifests on exit, also on error.
+    Yield the list of filepaths of the skipped unchanged files, filled on exit.
+    """
+    global _session_depth
+    if not _session_depth:
+        _manifests.clear()  # eg. left by writes out of a session
+        _skipped.clear()
+    _session_depth += 1
+    skipped = list()
+    try:
+        yield skipped
+    finally:
+        _session_depth -= 1
+        if not _session_depth:
+            skipped.extend(flush_manifests())
+
+
+def _write_atomic(filepath, write, binary=False, force_dir=False):
+    """!
+    Write file to filepath, atomically.
+    The file is written to a temporary file, that replaces filepath when complete.
+    @param filepath: destination filepath.
+    @param write: function that writes to the open file.
+    @param binary: open the file in binary mode.
+    @param force_dir: make the directory.
+    """
+    tmp_filepath = f"{filepath}.tmp"
     try:
         if force_dir:
             make_dir(filepath)
-        with open(filepath, "w", encoding="utf8", errors="ignore") as f:
-            f.write(text or str())
-    except Exception as err:
+        if binary:
+            f = open(tmp_filepath, "wb", buffering=WRITE_BUFFER_SIZE)
+        else:
+            f = open(
+                tmp_filepath,
+                "w",
+                encoding="utf8",
+                errors="ignore",
+                buffering=WRITE_BUFFER_SIZE,
+            )
+        with f:
+            write(f)
+        os.replace(tmp_filepath, filepath)
+    except OSError as err:
         raise BFException(None, f"Error writing file: <{filepath}>\n{err}")
+    finally:
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+
+
+def write_txt_file(filepath, text=None, force_dir=False):
+    """!
+    Write text file to filepath, atomically, if changed.
+    @param filepath: destination filepath.
+    @param text: the text.
+    @param force_dir: make the directory.
+    @return True if written, False if unchanged.
+    """
+    text = text or str()
+    digest = hashlib.sha256(text.encode("utf8", errors="ignore")).hexdigest()
+    if _is_unchanged(filepath, digest):
+        return False
+    _write_atomic(filepath, lambda f: f.write(text), force_dir=force_dir)
+    _set_manifest(filepath, digest)
+    return True
+
+
+def write_bin_file(filepath, data, force_dir=False):
+    """!
+    Write binary file to filepath, atomically, if changed.
+    @param filepath: destination filepath.
+    @param data: the bytes.
+    @param force_dir: make the directory.
+    @return True if written, False if unchanged.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if _is_unchanged(filepath, digest):
+        return False
+    _write_atomic(filepath, lambda f: f.write(data), binary=True, force_dir=force_dir)
+    _set_manifest(filepath, digest)
+    return True
+
+
+class _HashedStream:
+    """!
+    Text stream encoding the text to a binary stream, and hashing it.
+    The lines in WRITE_HASH_SKIP are not hashed, if written as a whole
+    (eg. by FDSList.write_to).
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+        self._texts, self._size = list(), 0
+
+    def write(self, text):
+        if text.startswith(WRITE_HASH_SKIP):
+            self.flush()
+            self.stream.write(self._encode(text))
+            return
+        self._texts.append(text)
+        self._size += len(text)
+        if self._size > WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        data = self._encode("".join(self._texts))
+        self.stream.write(data)
+        self.hash.update(data)
+        self._texts, self._size = list(), 0
+
+    def _encode(self, text):
+        if os.linesep != "\n":  # as written in text mode
+            text = text.replace("\n", os.linesep)
+        return text.encode("utf8", errors="ignore")
+
+
+def write_txt_stream(filepath, write_to, force_dir=False):
+    """!
+    Write text file to filepath, streaming the text, atomically, if changed.
+    The text is spooled and hashed, then copied to filepath if changed.
+    @param filepath: destination filepath.
+    @param write_to: function that writes the text to a stream (eg. FDSList.write_to).
+    @param force_dir: make the directory.
+    @return True if written, False if unchanged.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=WRITE_SPOOL_SIZE) as spool:
+        stream = _HashedStream(spool)
+        write_to(stream)
+        stream.flush()
+        digest = stream.hash.hexdigest()
+        if _is_unchanged(filepath, digest):
+            return False
+        spool.seek(0)
+        _write_atomic(
+            filepath,
+            lambda f: shutil.copyfileobj(spool, f, WRITE_BUFFER_SIZE),
+            binary=True,
+            force_dir=force_dir,
+        )
+    _set_manifest(filepath, digest)
+    return True
 
 
 # Transform paths
@@ -0,0 +1,161 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, opt-in profiler of the FDS export.
+"""
+
+import time, json, logging, bpy
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Report categories, in order, and the unit of their recorded size
+CATEGORIES = {
+    "stage": "namelists",  # sc_to_fds_list stages
+    "namelist": "namelists",  # ob.to_fds_list by namelist class
+    "object": "namelists",  # ob.to_fds_list by Object
+    "format": "chars",  # FDSList.to_string
+    "write": "bytes",  # written files
+}
+
+# Name of the Blender Text block receiving the report
+REPORT_TEXT_NAME = "BFDS Export Profile"
+
+# Records of the running profiler, {(category, name): [calls, time, size]}
+# None when the profiler is not running
+_records = None
+_t0 = 0.0
+
+
+def start():
+    """!
+    Start recording, discarding previous records.
+    """
+    global _records, _t0
+    _records, _t0 = dict(), time.perf_counter()
+
+
+def stop():
+    """!
+    Stop recording and return the report.
+    @return the report dict: {"total": seconds, "records": [record, ...]},
+    the records sorted by category, then by decreasing time.
+    """
+    global _records
+    if _records is None:
+        return None
+    total, records, _records = time.perf_counter() - _t0, _records, None
+    cats = tuple(CATEGORIES)
+    items = sorted(
+        records.items(), key=lambda k: (cats.index(k[0][0]), -k[1][1], k[0][1])
+    )
+    return {
+        "total": total,
+        "records": list(
+            {
+                "category": category,
+                "name": name,
+                "calls": calls,
+                "time": t,
+                "size": size,
+                "unit": CATEGORIES[category],
+            }
+            for (category, name), (calls, t, size) in items
+        ),
+    }
+
+
+def is_active():
+    """!
+    Return True if the profiler is recording.
+    """
+    return _records is not None
+
+
+@contextmanager
+def record(category, name):
+    """!
+    Context manager recording wall time and calls of the enclosed code, if active.
+    @param category: one of CATEGORIES.
+    @param name: name of the record (eg. the Object name).
+    """
+    if _records is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _records is not None:
+            stat = _records.setdefault((category, name), [0, 0.0, 0])
+            stat[0] += 1
+            stat[1] += time.perf_counter() - t0
+
+
+def add_size(category, name, size):
+    """!
+    Add output size to a record, if active.
+    @param category: one of CATEGORIES.
+    @param name: name of the record.
+    @param size: size in the unit of the category.
+    """
+    if _records is not None:
+        _records.setdefault((category, name), [0, 0.0, 0])[2] += size
+
+
+def get_summary():
+    """!
+    Get a one line summary of the recorded stages, for the FDS header.
+    @return the summary string, or None if not active.
+    """
+    if _records is None:
+        return None
+    stages = " | ".join(
+        f"{name} {t:.3f} s"
+        for (category, name), (_, t, _) in _records.items()
+        if category == "stage"
+    )
+    obs = tuple(
+        stat for (category, _), stat in _records.items() if category == "object"
+    )
+    t_obs = sum(stat[1] for stat in obs)
+    return f"! Export profile: {stages} | Objects: {len(obs)} in {t_obs:.3f} s"
+
+
+def report_to_string(report):
+    """!
+    Format the report as an aligned table.
+    @param report: the report from stop().
+    @return the formatted string.
+    """
+    total = report["total"] or 1.0
+    lines = [f"BFDS export profile, total time: {report['total']:.3f} s"]
+    category = None
+    for r in report["records"]:
+        if r["category"] != category:
+            category = r["category"]
+            lines.append(
+                f"\n{category.upper():<40} {'calls':>8} {'time (s)':>10} {'%':>6} {r['unit']:>12}"
+            )
+        lines.append(
+            f"{r['name'][:40]:<40} {r['calls']:>8} {r['time']:>10.3f} {100.*r['time']/total:>6.1f} {r['size']:>12}"
+        )
+    return "\n".join(lines)
+
+
+def write_report(report, filepath=None):
+    """!
+    Write the report to a sidecar JSON file, or to a Blender Text block.
+    @param report: the report from stop().
+    @param filepath: the JSON filepath, if None write to the Text block.
+    """
+    if filepath:
+        log.debug(f"Write export profile to {filepath}...")
+        with open(filepath, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=1)
+        return
+    log.debug(f"Write export profile to Text <{REPORT_TEXT_NAME}>...")
+    bl_text = bpy.data.texts.get(REPORT_TEXT_NAME) or bpy.data.texts.new(
+        REPORT_TEXT_NAME
+    )
+    bl_text.from_string(report_to_string(report))
@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, index of the Material references, recorded while exporting.
+"""
+
+# Referencing FDS params by namelist label, only the first one found is used
+REF_FDS_LABELS = {
+    "OBST": ("SURF_ID", "SURF_IDS", "SURF_ID6"),
+    "GEOM": ("SURF_ID",),
+    "VENT": ("SURF_ID",),
+    "DEVC": ("SURF_ID",),
+    "CTRL": ("SURF_ID",),
+    "PART": ("SURF_ID",),
+}
+
+# Referenced IDs of the running export, None when not recording
+_ref_ids = None
+
+
+def start():
+    """!
+    Start recording the referenced IDs, discarding previous records.
+    """
+    global _ref_ids
+    _ref_ids = set()
+
+
+def stop():
+    """!
+    Stop recording and return the referenced IDs.
+    @return set of the referenced IDs.
+    """
+    global _ref_ids
+    ref_ids, _ref_ids = _ref_ids, None
+    return ref_ids or set()
+
+
+def get_ref_ids(fds_namelist):
+    """!
+    Get the IDs referenced by an FDSNamelist (eg. SURF_ID='Inert').
+    @param fds_namelist: the FDSNamelist.
+    @return set of the referenced IDs.
+    """
+    for fds_label in REF_FDS_LABELS.get(fds_namelist.fds_label, ()):
+        fds_param = fds_namelist.get_fds_param(fds_label=fds_label)
+        if fds_param is not None:
+            return set(fds_param)
+    return set()
+
+
+def add_fds_namelist(fds_namelist):
+    """!
+    Record the IDs referenced by an exported FDSNamelist, if recording.
+    @param fds_namelist: the FDSNamelist.
+    """
+    if _ref_ids is not None and fds_namelist.fds_label in REF_FDS_LABELS:
+        _ref_ids.update(get_ref_ids(fds_namelist))
+
+
+def add_ref_ids(ref_ids):
+    """!
+    Record referenced IDs, if recording (eg. from cached FDS text).
+    @param ref_ids: iterable of IDs.
+    """
+    if _ref_ids is not None:
+        _ref_ids.update(ref_ids)
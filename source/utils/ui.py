@@ -4,7 +4,7 @@
 BFDS, Blender user interface utilities.
 """
 
-import bpy
+import bpy, hashlib
 
 
 def get_screen_area(context, area_type="PROPERTIES"):
@@ -68,6 +68,40 @@ def write_bl_text(context, bl_text, header=None, texts=()):
     bl_text.from_string(body)
 
 
+# Cache of FDSList parsed from Blender texts, {session_uid: (content hash, FDSList)}
+_bl_text_fds_lists = dict()
+
+
+def get_bl_text_fds_list(bl_text):
+    """!
+    Get the FDSList parsed from bl_text, on error raise BFException.
+    The parsed FDSList is cached, until the bl_text content is changed.
+    @param bl_text: the Blender Text, or None.
+    @return the FDSList, shared by all callers: do not change it.
+    """
+    from ..types import FDSList
+
+    if not bl_text:
+        return FDSList()
+    text = bl_text.as_string()
+    digest = hashlib.blake2b(
+        text.encode("utf8", errors="surrogatepass"), digest_size=16
+    ).digest()
+    cached = _bl_text_fds_lists.get(bl_text.session_uid)
+    if cached and cached[0] == digest:
+        return cached[1]
+    fds_list = FDSList(f90_namelists=text)
+    _bl_text_fds_lists[bl_text.session_uid] = digest, fds_list
+    return fds_list
+
+
+def rm_bl_text_caches():
+    """!
+    Remove the cached FDSList of all Blender texts.
+    """
+    _bl_text_fds_lists.clear()
+
+
 def show_property_panel(context, space_context="MATERIAL"):
     """!
     Show Material Panel.
@@ -0,0 +1,172 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""!
+BFDS, persistent disk cache of the voxels of Blender Objects.
+The merged voxels survive the Blender sessions and the file saves,
+they are keyed by the hash of the evaluated geometry and of the voxel settings.
+"""
+
+import os, bpy, hashlib, tempfile, logging
+import numpy as np
+from .. import config
+from ..types import BFException
+from .io import _write_atomic
+
+log = logging.getLogger(__name__)
+
+
+def _get_dirpath():
+    """!
+    Get the cache directory, in the extension user directory, created if needed.
+    """
+    try:
+        return bpy.utils.extension_path_user(
+            config.ADDON_PACKAGE, path=config.VOXEL_CACHE_DIRNAME, create=True
+        )
+    except ValueError:  # not an extension, eg. legacy add-on
+        dirpath = os.path.join(
+            tempfile.gettempdir(), f"bfds_{config.VOXEL_CACHE_DIRNAME}"
+        )
+        os.makedirs(dirpath, exist_ok=True)
+        return dirpath
+
+
+def get_key(context, ob, world=True):
+    """!
+    Get the cache key of the voxels of an Object.
+    @param context: the Blender context.
+    @param ob: the Blender Object.
+    @param world: True for the object in world coordinates.
+    @return the key, the hash of the evaluated Mesh, the world matrix
+    and the voxel settings, or None if not cached.
+    """
+    if not config.VOXEL_CACHE:
+        return None
+    h = hashlib.sha256()
+    # Evaluated Mesh (eg. modifiers applied), owned by ob_eval
+    ob_eval = ob.evaluated_get(context.evaluated_depsgraph_get())
+    me = ob_eval.to_mesh()
+    if me is None:  # eg. an Empty
+        ob_eval.to_mesh_clear()
+        return None
+    try:
+        for items, attr, dtype, size in (
+            (me.vertices, "co", np.float32, 3),
+            (me.polygons, "loop_total", np.int32, 1),
+            (me.loops, "vertex_index", np.int32, 1),
+        ):
+            data = np.empty(size * len(items), dtype=dtype)
+            items.foreach_get(attr, data)
+            h.update(np.int64(len(items)).tobytes())
+            h.update(data.tobytes())
+    finally:
+        ob_eval.to_mesh_clear()
+    # World matrix
+    h.update(np.array(ob.matrix_world, dtype=np.float64).tobytes())
+    # Voxel settings, and versions for algorithm changes
+    sc = context.scene
+    settings = (
+        config.VOXEL_CACHE_VERSION,
+        config.ADDON_VERSION,
+        world,
+        ob.bf_xb,
+        ob.bf_xb_custom_voxel,
+        ob.bf_xb_voxel_size,
+        ob.bf_xb_center_voxels,
+        ob.bf_xb_voxelizer,
+        ob.bf_xb_voxel_merge,
+        sc.bf_default_voxel_size,
+        sc.unit_settings.scale_length,
+    )
+    h.update(repr(settings).encode())
+    return h.hexdigest()
+
+
+def load(key):
+    """!
+    Load the cached voxels, and mark them as recently used.
+    @param key: the cache key, from get_key().
+    @return the xbs and msgs, or None if not cached.
+    """
+    if not key:
+        return None
+    filepath = os.path.join(_get_dirpath(), f"{key}.npz")
+    try:
+        with np.load(filepath, allow_pickle=False) as data:
+            xbs = list(tuple(xb) for xb in data["xbs"].tolist())
+            msgs = data["msgs"].tolist()
+        os.utime(filepath)  # recently used, for eviction
+    except FileNotFoundError:
+        return None
+    except Exception as err:  # corrupted, removed
+        log.debug(f"Invalid voxel cache file <{filepath}>: {err}")
+        _remove(filepath)
+        return None
+    log.debug(f"Voxels loaded from cache: <{filepath}>")
+    return xbs, msgs
+
+
+def save(key, xbs, msgs):
+    """!
+    Save the voxels to the cache, and evict the least recently used files.
+    Errors are logged, as the cache is not needed.
+    @param key: the cache key, from get_key().
+    @param xbs: the voxels in xbs format.
+    @param msgs: the voxels messages.
+    """
+    if not key:
+        return
+    dirpath = _get_dirpath()
+    filepath = os.path.join(dirpath, f"{key}.npz")
+    write = lambda f: np.savez_compressed(
+        f,
+        xbs=np.array(xbs, dtype=np.float64).reshape(-1, 6),
+        msgs=np.array(msgs, dtype=str),
+    )
+    try:
+        _write_atomic(filepath, write, binary=True)
+    except BFException as err:
+        log.warning(str(err))
+        return
+    evict(dirpath, max_size=config.VOXEL_CACHE_MAX_SIZE)
+
+
+def evict(dirpath, max_size):
+    """!
+    Remove the least recently used cache files, until their size is below max_size.
+    @param dirpath: the cache directory.
+    @param max_size: the max size of the cache, bytes.
+    """
+    entries = list()
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if entry.name.endswith(".npz") and entry.is_file():
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+    size = sum(e[1] for e in entries)
+    entries.sort()  # least recently used first
+    for _, file_size, filepath in entries:
+        if size <= max_size:
+            break
+        if _remove(filepath):
+            size -= file_size
+            log.debug(f"Voxel cache file evicted: <{filepath}>")
+
+
+def clear():
+    """!
+    Remove all the cache files.
+    """
+    evict(_get_dirpath(), max_size=0)
+
+
+def _remove(filepath):
+    """!
+    Remove a cache file, if possible.
+    @return True if removed.
+    """
+    try:
+        os.remove(filepath)
+    except OSError:
+        return False
+    return True